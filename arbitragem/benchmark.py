@@ -0,0 +1,218 @@
+"""Benchmark do pipeline de arbitragem contra marketplaces falsos locais.
+
+Sobe um servidor HTTP (processo separado) que simula N marketplaces com
+latência, taxa de erro e tamanho de catálogo configuráveis, e roda o ciclo
+completo do bot (busca -> margens -> store/histórico -> relatório) algumas
+vezes. O primeiro ciclo é frio; os seguintes revalidam as páginas com 304.
+
+Uso: python benchmark.py [--catalog 500] [--marketplaces 4] [--latency-ms 50]
+                         [--error-rate 0.02] [--cycles 2] [--output resultado.json]
+"""
+import os
+import sys
+import json
+import time
+import zlib
+import random
+import logging
+import resource
+import argparse
+import platform
+import tempfile
+import multiprocessing
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+
+FILLER = (
+    "Produto com nota fiscal, garantia do fabricante e envio para todo o Brasil. "
+    "Confira as condições de parcelamento, prazo de entrega e política de troca. "
+) * 3
+
+
+def catalog_price(marketplace: str, product: str) -> float:
+    """Preço determinístico por (marketplace, produto), com dispersão de até ~30%"""
+    base = 1000 + zlib.crc32(product.encode("utf-8")) % 4000
+    spread = zlib.crc32(f"{marketplace}|{product}".encode("utf-8")) % 300 / 1000
+    return round(base * (1 + spread), 2)
+
+
+def format_brl(value: float) -> str:
+    return f"R$ {value:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
+
+
+class FakeMarketplaceHandler(BaseHTTPRequestHandler):
+    """GET /<marketplace>/produto?q=<nome> -> página HTML com o preço (ETag = hash do preço)"""
+
+    protocol_version = "HTTP/1.1"
+    config: dict = {}
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status: int, body: bytes = b"", headers: dict = None):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if body:
+            self.wfile.write(body)
+
+    def do_GET(self):
+        config = self.config
+        delay = max(0.0, random.gauss(config["latency"], config["jitter"]))
+        time.sleep(delay)
+        if random.random() < config["error_rate"]:
+            self._send(503, b"indisponivel")
+            return
+
+        url = urlparse(self.path)
+        marketplace = url.path.strip("/").split("/")[0]
+        product = parse_qs(url.query).get("q", [""])[0]
+        if marketplace not in config["marketplaces"] or product not in config["catalog"]:
+            self._send(404, b"nao encontrado")
+            return
+
+        price = catalog_price(marketplace, product)
+        etag = f'"{zlib.crc32(f"{marketplace}|{product}|{price}".encode("utf-8")):08x}"'
+        if self.headers.get("If-None-Match") == etag:
+            self._send(304, headers={"ETag": etag})
+            return
+        body = (
+            f"<html><head><title>{product} | {marketplace}</title></head><body>"
+            f"<h1>{product}</h1><p>{FILLER}</p>"
+            f"<div class=\"buy-box\"><span class=\"price\">{format_brl(price)}</span></div>"
+            f"</body></html>"
+        ).encode("utf-8")
+        self._send(200, body, {"Content-Type": "text/html; charset=utf-8", "ETag": etag})
+
+
+def serve(config: dict, ready):
+    FakeMarketplaceHandler.config = config
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeMarketplaceHandler)
+    server.daemon_threads = True
+    ready.put(server.server_address[1])
+    server.serve_forever()
+
+
+def start_fake_marketplaces(config: dict):
+    """Servidor num processo à parte, para não disputar GIL/memória com o bot medido"""
+    ready = multiprocessing.Queue()
+    process = multiprocessing.Process(target=serve, args=(config, ready), daemon=True)
+    process.start()
+    return process, ready.get(timeout=10)
+
+
+def percentile_ms(values, q):
+    return float(np.percentile(np.fromiter(values, dtype=float), q) * 1000) if values else 0.0
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss vem em KB no Linux e em bytes no macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def build_bot(base_url: str, marketplaces, catalog, workdir: str, concurrency: int):
+    """Bot real com adaptadores HTTP apontando para o servidor falso e saída num diretório temporário"""
+    from fetcher import PriceFetchEngine, ScrapingAdapter
+    from main import SuperBotArbitragem
+    from matching import ProductMatcher
+    from opportunity_store import OpportunityStore
+    from page_fetcher import PageCache, PageFetcher
+    from report_writer import ReportWriter
+
+    bot = SuperBotArbitragem(store=OpportunityStore(), output_dir=workdir, cache_dir=os.path.join(workdir, "pages"))
+    bot.products = list(catalog)
+    bot.report_writer = ReportWriter(workdir, write_deltas=True)
+    bot.matcher = ProductMatcher(path=None)
+    # Sem navegador: as páginas do servidor falso são HTML estático
+    bot.page_fetcher = PageFetcher(None, cache=PageCache(os.path.join(workdir, "pages")))
+    bot.fetch_engine = PriceFetchEngine([
+        ScrapingAdapter(name, f"{base_url}/{name}/produto?q={{query}}", bot.page_fetcher,
+                        selector="span.price", max_concurrency=concurrency, timeout=10.0)
+        for name in marketplaces
+    ], max_concurrency=concurrency)
+    return bot
+
+
+def run(catalog_size, marketplace_count, latency_ms, jitter_ms, error_rate, cycles, concurrency):
+    marketplaces = [f"loja{i}" for i in range(marketplace_count)]
+    catalog = [f"Produto {i}" for i in range(catalog_size)]
+    config = {
+        "marketplaces": marketplaces,
+        "catalog": set(catalog),
+        "latency": latency_ms / 1000,
+        "jitter": jitter_ms / 1000,
+        "error_rate": error_rate,
+    }
+    server, port = start_fake_marketplaces(config)
+    results = []
+    try:
+        with tempfile.TemporaryDirectory(prefix="arbitragem-bench-") as workdir:
+            bot = build_bot(f"http://127.0.0.1:{port}", marketplaces, catalog, workdir, concurrency)
+            for cycle in range(1, cycles + 1):
+                before = dict(bot.page_fetcher.stats)
+                bot.fetch_engine.last_latencies.clear()
+                started = time.perf_counter()
+                bot._analyze_arbitrage(catalog)
+                bot._generate_report()
+                elapsed = time.perf_counter() - started
+                latencies = list(bot.fetch_engine.last_latencies.values())
+                results.append({
+                    "cycle": cycle,
+                    "products": len(catalog),
+                    "elapsed_s": round(elapsed, 3),
+                    "products_per_minute": round(len(catalog) / elapsed * 60, 1),
+                    "p50_ms": round(percentile_ms(latencies, 50), 1),
+                    "p99_ms": round(percentile_ms(latencies, 99), 1),
+                    "opportunities": len(bot.store),
+                    "pages": {k: bot.page_fetcher.stats[k] - before[k] for k in before},
+                })
+    finally:
+        server.terminate()
+        server.join()
+
+    return {
+        "timestamp": time.time(),
+        "python": platform.python_version(),
+        "cpus": os.cpu_count(),
+        "config": {
+            "catalog": catalog_size,
+            "marketplaces": marketplace_count,
+            "latency_ms": latency_ms,
+            "jitter_ms": jitter_ms,
+            "error_rate": error_rate,
+            "concurrency": concurrency,
+        },
+        "cycles": results,
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--catalog", type=int, default=500)
+    parser.add_argument("--marketplaces", type=int, default=4)
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--jitter-ms", type=float, default=10.0)
+    parser.add_argument("--error-rate", type=float, default=0.02)
+    parser.add_argument("--cycles", type=int, default=2)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--output", default="benchmark_result.json")
+    args = parser.parse_args()
+
+    import main  # noqa: F401 - configura o logging do bot antes de reduzirmos o nível
+    # O log por produto do bot distorceria a medição
+    logging.getLogger().setLevel(logging.WARNING)
+    report = run(args.catalog, args.marketplaces, args.latency_ms, args.jitter_ms,
+                 args.error_rate, args.cycles, args.concurrency)
+    for cycle in report["cycles"]:
+        print(f"ciclo {cycle['cycle']}: {cycle['products_per_minute']:.0f} produtos/min, "
+              f"p50 {cycle['p50_ms']:.0f} ms, p99 {cycle['p99_ms']:.0f} ms, páginas {cycle['pages']}")
+    print(f"pico de RSS: {report['peak_rss_mb']:.0f} MB")
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Resultado salvo em {args.output}")
@@ -0,0 +1,195 @@
+import os
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Callable, List, Optional
+
+import psutil
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+
+logger = logging.getLogger(__name__)
+
+POOL_SIZE = int(os.getenv("ARBITRAGEM_BROWSER_POOL_SIZE", "2"))
+MAX_PAGES = int(os.getenv("ARBITRAGEM_BROWSER_MAX_PAGES", "200"))
+MAX_RSS_MB = int(os.getenv("ARBITRAGEM_BROWSER_MAX_RSS_MB", "768"))
+
+# Recursos bloqueados em todas as páginas (imagens e fontes não influenciam o preço)
+BLOCKED_URL_PATTERNS = [
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.avif", "*.svg", "*.ico",
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+]
+
+
+def chrome_options() -> Options:
+    options = Options()
+    options.add_argument('--headless')
+    options.add_argument('--no-sandbox')
+    options.add_argument('--disable-dev-shm-usage')
+    options.add_argument('--disable-gpu')
+    options.add_argument('--blink-settings=imagesEnabled=false')
+    options.add_experimental_option("prefs", {
+        "profile.managed_default_content_settings.images": 2,
+        "profile.default_content_setting_values.notifications": 2,
+    })
+    return options
+
+
+def create_chrome_driver():
+    """Chrome headless com imagens e fontes bloqueadas via CDP"""
+    driver = webdriver.Chrome(options=chrome_options())
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOCKED_URL_PATTERNS})
+    except Exception as e:
+        logger.warning(f"Não foi possível bloquear imagens/fontes via CDP: {e}")
+    return driver
+
+
+class PooledDriver:
+    """Driver do pool com o contador de páginas desde que foi criado"""
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.pages = 0
+        self.created_at = time.time()
+
+    def rss_bytes(self) -> int:
+        """Memória do chromedriver e de todos os processos do Chrome abertos por ele"""
+        try:
+            process = psutil.Process(self.driver.service.process.pid)
+            processes = [process] + process.children(recursive=True)
+        except Exception:
+            return 0
+        total = 0
+        for p in processes:
+            try:
+                total += p.memory_info().rss
+            except psutil.Error:
+                pass
+        return total
+
+
+class DriverPool:
+    """Pool de N navegadores headless com checkout/checkin.
+
+    Os drivers são criados sob demanda até `size`. No checkin o driver é
+    reciclado (quit + novo na próxima vez) depois de `max_pages` páginas ou se
+    o Chrome passar de `max_rss_mb`; no checkout, um driver que não responde
+    é descartado e substituído.
+    """
+
+    def __init__(self, size: int = POOL_SIZE, factory: Callable[[], object] = create_chrome_driver,
+                 max_pages: int = MAX_PAGES, max_rss_mb: int = MAX_RSS_MB, checkout_timeout: float = 120.0):
+        self.size = size
+        self.factory = factory
+        self.max_pages = max_pages
+        self.max_rss = max_rss_mb * 1024 * 1024
+        self.checkout_timeout = checkout_timeout
+        self._idle: List[PooledDriver] = []  # LIFO: o driver mais recente está mais "quente"
+        self._lock = threading.Lock()
+        # Acorda quem espera no checkout quando um driver volta ou uma vaga é liberada
+        self._available = threading.Condition(self._lock)
+        self._created = 0
+        self.recycled = 0
+        self.replaced = 0
+
+    def _create(self) -> PooledDriver:
+        try:
+            return PooledDriver(self.factory())
+        except Exception:
+            with self._available:
+                self._created -= 1
+                self._available.notify()
+            raise
+
+    def _discard(self, pooled: PooledDriver):
+        with self._available:
+            self._created -= 1
+            self._available.notify()
+        try:
+            pooled.driver.quit()
+        except Exception as e:
+            logger.warning(f"Erro ao encerrar driver: {e}")
+
+    @staticmethod
+    def is_alive(pooled: PooledDriver) -> bool:
+        try:
+            pooled.driver.execute_script("return 1")
+            return True
+        except Exception:
+            return False
+
+    def checkout(self, timeout: Optional[float] = None) -> PooledDriver:
+        """Pega um driver livre (ou cria um, se o pool ainda não está cheio)"""
+        deadline = time.monotonic() + (self.checkout_timeout if timeout is None else timeout)
+        while True:
+            with self._available:
+                while not self._idle and self._created >= self.size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise TimeoutError(f"Nenhum navegador livre no pool após {self.checkout_timeout}s")
+                    self._available.wait(remaining)
+                pooled = self._idle.pop() if self._idle else None
+                if pooled is None:
+                    self._created += 1
+            if pooled is None:
+                return self._create()
+
+            if self.is_alive(pooled):
+                return pooled
+            logger.warning("Driver sem resposta, substituindo...")
+            self.replaced += 1
+            self._discard(pooled)
+
+    def checkin(self, pooled: PooledDriver, broken: bool = False):
+        """Devolve o driver ao pool, reciclando-o se atingiu os limites"""
+        pooled.pages += 1
+        if broken:
+            self.replaced += 1
+            self._discard(pooled)
+            return
+        if pooled.pages >= self.max_pages:
+            logger.info(f"Reciclando driver após {pooled.pages} páginas")
+            self.recycled += 1
+            self._discard(pooled)
+            return
+        rss = pooled.rss_bytes()
+        if rss > self.max_rss:
+            logger.info(f"Reciclando driver com {rss / 1024 / 1024:.0f} MB de memória")
+            self.recycled += 1
+            self._discard(pooled)
+            return
+        with self._available:
+            self._idle.append(pooled)
+            self._available.notify()
+
+    @contextmanager
+    def driver(self, timeout: Optional[float] = None):
+        """with pool.driver() as driver: ... (checkout e checkin automáticos)"""
+        pooled = self.checkout(timeout)
+        broken = False
+        try:
+            yield pooled.driver
+        except Exception:
+            broken = not self.is_alive(pooled)
+            raise
+        finally:
+            self.checkin(pooled, broken=broken)
+
+    def stats(self) -> dict:
+        return {
+            "size": self.size,
+            "created": self._created,
+            "idle": len(self._idle),
+            "recycled": self.recycled,
+            "replaced": self.replaced,
+        }
+
+    def close(self):
+        """Encerra todos os drivers livres"""
+        with self._lock:
+            drivers, self._idle = self._idle, []
+        for pooled in drivers:
+            self._discard(pooled)
@@ -20,4 +20,15 @@ selenium_mock.webdriver.Chrome = MagicMock()
 selenium_mock.webdriver.Chrome.return_value = MagicMock()
 
 sys.modules["selenium"] = selenium_mock
-sys.modules["selenium.webdriver"] = selenium_mock.webdriver 
\ No newline at end of file
+sys.modules["selenium.webdriver"] = selenium_mock.webdriver 
+# Submódulos importados diretamente pelo main
+for submodule in (
+    "selenium.webdriver.common",
+    "selenium.webdriver.common.by",
+    "selenium.webdriver.support",
+    "selenium.webdriver.support.ui",
+    "selenium.webdriver.support.expected_conditions",
+    "selenium.webdriver.chrome",
+    "selenium.webdriver.chrome.options",
+):
+    sys.modules[submodule] = MagicMock()
@@ -0,0 +1,211 @@
+import os
+import re
+import time
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional
+from urllib.parse import quote_plus
+
+from bs4 import BeautifulSoup
+
+logger = logging.getLogger(__name__)
+
+# Limite global de buscas simultâneas (todas as lojas somadas)
+MAX_CONCURRENCY = int(os.getenv("ARBITRAGEM_MAX_CONCURRENCY", "32"))
+
+
+class MarketplaceAdapter:
+    """Interface de um marketplace para o motor de busca de preços.
+
+    Cada adaptador define seu próprio limite de requisições simultâneas e
+    timeout; fetch_price devolve o preço ou None se o produto não existir.
+    Adaptadores que conhecem o título do anúncio sobrescrevem fetch_listing,
+    usado pelo matching de produtos.
+    """
+
+    name = "marketplace"
+    max_concurrency = 4
+    timeout = 10.0
+
+    async def fetch_price(self, product: str) -> Optional[float]:
+        raise NotImplementedError
+
+    async def fetch_listing(self, product: str) -> Optional[dict]:
+        """Anúncio encontrado ({title, price}); por padrão o título é o próprio produto buscado"""
+        price = await self.fetch_price(product)
+        return None if price is None else {"title": product, "price": price}
+
+
+class SimulatedAdapter(MarketplaceAdapter):
+    """Preço simulado (em produção, seria scraping real)"""
+
+    def __init__(self, name: str, base: float, spread: int, max_concurrency: int = 8):
+        self.name = name
+        self.base = base
+        self.spread = spread
+        self.max_concurrency = max_concurrency
+
+    async def fetch_price(self, product: str) -> Optional[float]:
+        return self.base + (hash(product) % self.spread)
+
+
+_PRICE_RE = re.compile(r"(\d+(?:\.\d{3})*)(?:,(\d{1,2}))?")
+
+
+def parse_brl(text: str) -> Optional[float]:
+    """Converte "R$ 1.234,56" em 1234.56"""
+    match = _PRICE_RE.search(text or "")
+    if not match:
+        return None
+    integer, cents = match.groups()
+    return float(f"{integer.replace('.', '')}.{cents or '0'}")
+
+
+class ScrapingAdapter(MarketplaceAdapter):
+    """Marketplace real: busca a página do produto pelo PageFetcher e extrai o preço.
+
+    url_template recebe {query}; o preço é o texto do primeiro elemento que casa
+    com o seletor CSS, a menos que um parse(html) próprio seja informado. Com
+    title_selector o título do anúncio vai para o matching de produtos.
+    """
+
+    def __init__(self, name: str, url_template: str, page_fetcher, selector: Optional[str] = None,
+                 parse: Optional[Callable[[str], Optional[float]]] = None,
+                 max_concurrency: int = 4, timeout: float = 20.0, title_selector: Optional[str] = None):
+        self.name = name
+        self.url_template = url_template
+        self.page_fetcher = page_fetcher
+        self.selector = selector
+        self.title_selector = title_selector
+        self.parse = parse or self._parse_selector
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+
+    def _parse_selector(self, html: str) -> Optional[float]:
+        element = BeautifulSoup(html, "html.parser").select_one(self.selector)
+        return parse_brl(element.get_text()) if element is not None else None
+
+    def _parse_title(self, html: str) -> Optional[str]:
+        if not self.title_selector:
+            return None
+        element = BeautifulSoup(html, "html.parser").select_one(self.title_selector)
+        return element.get_text(" ", strip=True) if element is not None else None
+
+    async def fetch_listing(self, product: str) -> Optional[dict]:
+        url = self.url_template.format(query=quote_plus(product))
+        # requests/Selenium são bloqueantes: rodam no pool de threads do loop
+        page = await asyncio.to_thread(self.page_fetcher.fetch, url)
+        price = self.parse(page.html)
+        if price is None:
+            return None
+        return {"title": self._parse_title(page.html) or product, "price": price}
+
+    async def fetch_price(self, product: str) -> Optional[float]:
+        listing = await self.fetch_listing(product)
+        return listing["price"] if listing is not None else None
+
+
+def default_adapters() -> List[MarketplaceAdapter]:
+    return [
+        SimulatedAdapter("Amazon", 1500, 500),
+        SimulatedAdapter("Mercado Livre", 1400, 400),
+        SimulatedAdapter("Americanas", 1600, 600),
+        SimulatedAdapter("Magazine Luiza", 1450, 450),
+    ]
+
+
+class PriceFetchEngine:
+    """Busca os preços de vários produtos em todos os marketplaces em paralelo.
+
+    A concorrência é limitada globalmente e por marketplace; cada busca tem o
+    timeout do seu adaptador. Um marketplace lento ou com erro só some do
+    resultado daquele produto, sem atrasar os demais; a vaga da busca que
+    estourou o timeout só é liberada quando ela termina de fato.
+    """
+
+    def __init__(self, adapters: Iterable[MarketplaceAdapter], max_concurrency: int = MAX_CONCURRENCY):
+        self.adapters = list(adapters)
+        self.max_concurrency = max_concurrency
+        self.last_latencies: Dict[str, float] = {}
+        # Anúncios do último fetch_all ({product, marketplace, title, price}), para o matching
+        self.last_listings: List[dict] = []
+
+    async def _fetch_one(self, adapter: MarketplaceAdapter, product: str,
+                         global_limit: asyncio.Semaphore, adapter_limit: asyncio.Semaphore,
+                         spans: List[tuple]) -> Optional[dict]:
+        # Primeiro o limite da loja: quem espera por uma loja saturada não ocupa vaga global
+        await adapter_limit.acquire()
+        try:
+            await global_limit.acquire()
+        except BaseException:
+            adapter_limit.release()
+            raise
+        started = time.perf_counter()
+        task = asyncio.ensure_future(adapter.fetch_listing(product))
+
+        def release(done: asyncio.Future):
+            # As vagas só voltam quando a busca termina de fato: num timeout a thread de um
+            # adaptador bloqueante (asyncio.to_thread) continua rodando e ocupando o limite
+            global_limit.release()
+            adapter_limit.release()
+            if not done.cancelled():
+                done.exception()  # já registrado (ou descartado após o timeout)
+
+        task.add_done_callback(release)
+        try:
+            return await asyncio.wait_for(asyncio.shield(task), timeout=adapter.timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Timeout ao buscar {product} em {adapter.name}")
+        except Exception as e:
+            logger.error(f"Erro ao buscar {product} em {adapter.name}: {e}")
+        finally:
+            spans.append((started, time.perf_counter()))
+        return None
+
+    async def _fetch_product(self, product: str, global_limit: asyncio.Semaphore,
+                             adapter_limits: Dict[str, asyncio.Semaphore]) -> Dict[str, dict]:
+        spans: List[tuple] = []
+        listings = await asyncio.gather(*(
+            self._fetch_one(adapter, product, global_limit, adapter_limits[adapter.name], spans)
+            for adapter in self.adapters
+        ))
+        # Latência do produto: da primeira busca iniciada à última concluída (sem a espera na fila)
+        if spans:
+            self.last_latencies[product] = max(end for _, end in spans) - min(start for start, _ in spans)
+        return {
+            adapter.name: listing
+            for adapter, listing in zip(self.adapters, listings)
+            if listing is not None
+        }
+
+    async def fetch_all(self, products: Iterable[str]) -> Dict[str, Dict[str, float]]:
+        """Preços por produto e marketplace (apenas os que responderam a tempo)"""
+        # Semáforos criados dentro do loop corrente (cada ciclo roda num asyncio.run novo)
+        global_limit = asyncio.Semaphore(self.max_concurrency)
+        adapter_limits = {adapter.name: asyncio.Semaphore(adapter.max_concurrency) for adapter in self.adapters}
+        products = list(products)
+        results = await asyncio.gather(*(
+            self._fetch_product(product, global_limit, adapter_limits) for product in products
+        ))
+        self.last_listings = [
+            {"product": product, "marketplace": marketplace, **listing}
+            for product, listings in zip(products, results)
+            for marketplace, listing in listings.items()
+        ]
+        return {
+            product: {marketplace: listing["price"] for marketplace, listing in listings.items()}
+            for product, listings in zip(products, results)
+        }
+
+    async def _run(self, products: Iterable[str]) -> Dict[str, Dict[str, float]]:
+        # Adaptadores bloqueantes usam asyncio.to_thread; o executor padrão tem só
+        # min(32, CPUs + 4) threads e limitaria a concorrência bem abaixo do configurado
+        asyncio.get_running_loop().set_default_executor(
+            ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="fetch")
+        )
+        return await self.fetch_all(products)
+
+    def run(self, products: Iterable[str]) -> Dict[str, Dict[str, float]]:
+        """Versão síncrona para o loop principal do bot"""
+        return asyncio.run(self._run(products))
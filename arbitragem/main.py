@@ -2,17 +2,24 @@ import time
 import logging
 import requests
 from bs4 import BeautifulSoup
-from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.chrome.options import Options
-import json
 import os
 from fastapi import FastAPI
 import threading
 from prometheus_fastapi_instrumentator import Instrumentator
 
+from browser_pool import DriverPool
+from fetcher import PriceFetchEngine, default_adapters
+from margin_engine import MarginEngine, PriceMatrix
+from matching import MATCH_DIR, ProductMatcher
+from opportunity_store import OpportunityStore
+from price_history import COMPACT_INTERVAL, HISTORY_DIR, PriceHistoryStore
+from report_writer import ReportWriter
+from scheduler import RescanScheduler
+from page_fetcher import PageCache, PageFetcher
+
 # Configurar logging para arquivo e stdout
 log_dir = '/app/logs'
 os.makedirs(log_dir, exist_ok=True)
@@ -33,33 +40,63 @@ app = FastAPI(title="Arbitragem Service", version="1.0.0")
 # Instrumentação Prometheus
 Instrumentator().instrument(app).expose(app, include_in_schema=False, should_gzip=True)
 
+# Oportunidades atuais, compartilhadas entre o bot e a API
+opportunity_store = OpportunityStore()
+
 @app.get("/health")
 def health():
     return {"status": "healthy", "timestamp": time.strftime("%Y-%m-%d %H:%M:%S")}
 
+@app.get("/changes")
+def changes(since: float = 0.0):
+    """Oportunidades alteradas e produtos removidos depois de `since` (epoch)"""
+    now = time.time()
+    changed, removed = opportunity_store.changed_since(since)
+    return {"timestamp": now, "opportunities": changed, "removed": removed}
+
 class SuperBotArbitragem:
-    def __init__(self):
-        self.driver = None
-        self.wait = None
-        self.opportunities = []
-        self.output_dir = "/app/output"
+    def __init__(self, store=None, output_dir=None, cache_dir=None):
+        """output_dir/cache_dir trocam /app/output e o cache de páginas (testes, benchmark)"""
+        self.browser_pool = DriverPool()
+        # HTTP primeiro; navegador só para páginas que dependem de JavaScript
+        self.page_fetcher = PageFetcher(self.browser_pool, cache=PageCache(cache_dir) if cache_dir else None)
+        self.store = store if store is not None else opportunity_store
+        self.last_report_at = 0.0
+        # Produtos para analisar
+        self.products = [
+            "iPhone 15",
+            "Samsung Galaxy S24",
+            "MacBook Pro",
+            "PlayStation 5"
+        ]
+        self.fetch_engine = PriceFetchEngine(default_adapters())
+        self.scheduler = RescanScheduler(adapter.name for adapter in self.fetch_engine.adapters)
+        self.margin_engine = MarginEngine()
+        # Anúncios com títulos diferentes agrupados como o mesmo produto
+        self.matcher = ProductMatcher(os.path.join(output_dir, "matching") if output_dir else MATCH_DIR)
+        # Produto buscado -> grupo do matching em que seus anúncios caíram
+        self.product_groups = {}
+        # Todas as observações de preço, para análise de tendência e backtest de limites
+        self.history = PriceHistoryStore(os.path.join(output_dir, "history") if output_dir else HISTORY_DIR)
+        self.last_compaction = time.time()
+        self.output_dir = output_dir or "/app/output"
         
         # Criar diretório de saída se não existir
         os.makedirs(self.output_dir, exist_ok=True)
+        self.report_writer = ReportWriter(self.output_dir)
+    
+    @property
+    def opportunities(self):
+        """Oportunidades atuais (última por produto)"""
+        return self.store.all()
     
     def setup_driver(self):
-        """Configura o driver do Selenium"""
+        """Configura o pool de navegadores (abre um driver para validar o Chrome)"""
         try:
-            chrome_options = Options()
-            chrome_options.add_argument('--headless')
-            chrome_options.add_argument('--no-sandbox')
-            chrome_options.add_argument('--disable-dev-shm-usage')
-            chrome_options.add_argument('--disable-gpu')
+            with self.browser_pool.driver():
+                pass
             
-            self.driver = webdriver.Chrome(options=chrome_options)
-            self.wait = WebDriverWait(self.driver, 10)
-            
-            logger.info("Driver Selenium configurado com sucesso!")
+            logger.info(f"Pool de navegadores configurado: {self.browser_pool.size} driver(s)")
             
         except Exception as e:
             logger.error(f"Erro ao configurar driver: {e}")
@@ -75,14 +112,17 @@ class SuperBotArbitragem:
             # Loop principal
             while True:
                 try:
-                    # Executar análise de arbitragem
-                    self._analyze_arbitrage()
+                    # Produtos novos no catálogo entram na fila já vencidos
+                    self.scheduler.add(self.products)
                     
-                    # Gerar relatório
-                    self._generate_report()
+                    # Varrer só os produtos vencidos que cabem no orçamento dos marketplaces
+                    batch = self.scheduler.pop_due()
+                    if batch:
+                        self._analyze_arbitrage(batch)
+                        self._generate_report()
                     
-                    # Aguardar 30 minutos
-                    time.sleep(1800)
+                    # Aguardar até o próximo vencimento
+                    time.sleep(max(self.scheduler.seconds_until_next(), 1.0))
                     
                 except KeyboardInterrupt:
                     logger.info("Parando bot de arbitragem...")
@@ -94,163 +134,118 @@ class SuperBotArbitragem:
         except Exception as e:
             logger.error(f"Erro ao inicializar bot: {e}")
         finally:
-            if self.driver:
-                self.driver.quit()
+            self.browser_pool.close()
     
-    def _analyze_arbitrage(self):
-        """Analisa oportunidades de arbitragem"""
+    def _analyze_arbitrage(self, products=None):
+        """Analisa oportunidades de arbitragem (por padrão, todo o catálogo)"""
+        products = list(self.products if products is None else products)
         try:
-            logger.info("Analisando oportunidades de arbitragem...")
+            logger.info(f"Analisando oportunidades de arbitragem em {len(products)} produtos...")
             
-            # Produtos para analisar
-            products = [
-                "iPhone 15",
-                "Samsung Galaxy S24",
-                "MacBook Pro",
-                "PlayStation 5"
-            ]
+            # Todos os produtos e marketplaces em paralelo (concorrência limitada)
+            started = time.time()
+            self.fetch_engine.run(products)
+            logger.info(f"Preços de {len(products)} produtos obtidos em {time.time() - started:.2f}s")
             
-            for product in products:
-                try:
-                    self._analyze_product(product)
-                except Exception as e:
-                    logger.error(f"Erro ao analisar {product}: {e}")
+            # Anúncios de títulos diferentes do mesmo produto viram uma linha só de preços
+            self._analyze_listings(self.fetch_engine.last_listings)
+            # Compactação por níveis, no máximo uma vez por COMPACT_INTERVAL
+            if time.time() - self.last_compaction >= COMPACT_INTERVAL:
+                self.history.compact()
+                self.last_compaction = time.time()
+            
+            evicted = self.store.evict()
+            if evicted:
+                logger.info(f"{evicted} produtos sem observação recente removidos")
             
-            logger.info(f"Encontradas {len(self.opportunities)} oportunidades!")
+            logger.info(f"Encontradas {len(self.store)} oportunidades!")
             
         except Exception as e:
             logger.error(f"Erro na análise de arbitragem: {e}")
+        finally:
+            self._reschedule(products)
+    
+    def _reschedule(self, products):
+        """Próxima varredura conforme a volatilidade e a oportunidade atual de cada produto"""
+        now = time.time()
+        for product in products:
+            group = self.product_groups.get(product, product)
+            self.scheduler.reschedule(product, now, self.store.volatility(group), self.store.get(group))
     
-    def _analyze_product(self, product):
-        """Analisa um produto específico em diferentes marketplaces"""
+    def _analyze_product(self, product, marketplaces):
+        """Analisa um produto com os preços obtidos em cada marketplace"""
+        self._analyze_prices({product: marketplaces})
+    
+    def _analyze_listings(self, listings):
+        """Analisa anúncios crus ({marketplace, title, price[, product]}) agrupando-os por produto"""
+        listings = list(listings)
         try:
-            logger.info(f"Analisando {product}...")
-            
-            # Simular preços em diferentes marketplaces
-            marketplaces = {
-                "Amazon": self._get_amazon_price(product),
-                "Mercado Livre": self._get_mercadolivre_price(product),
-                "Americanas": self._get_americanas_price(product),
-                "Magazine Luiza": self._get_magazineluiza_price(product)
-            }
-            
-            # Encontrar melhor preço
-            min_price = min(marketplaces.values())
-            max_price = max(marketplaces.values())
-            
-            # Calcular margem
-            margin = ((max_price - min_price) / min_price) * 100
+            prices_by_product = self.matcher.group_prices(listings)
+            listing_ids = self.matcher.add_listings(listings)  # já inseridos: só devolve os ids
+            names = self.matcher.group_names(listing_ids)
+            self.matcher.save()
+        except Exception as e:
+            logger.error(f"Erro no matching de anúncios: {e}")
+            return
+        for listing, listing_id in zip(listings, listing_ids):
+            if "product" in listing:
+                self.product_groups[listing["product"]] = names[listing_id]
+        self._analyze_prices(prices_by_product)
+    
+    def _analyze_prices(self, prices_by_product):
+        """Calcula as margens de todos os produtos de uma vez e atualiza o store"""
+        try:
+            result = self.margin_engine.compute(PriceMatrix.from_dict(prices_by_product))
+            now = time.time()
+            self._record_history(prices_by_product, now)
             
-            if margin > 10:  # Oportunidade se margem > 10%
-                opportunity = {
-                    'product': product,
-                    'prices': marketplaces,
-                    'min_price': min_price,
-                    'max_price': max_price,
-                    'margin': margin,
-                    'timestamp': time.time()
-                }
-                self.opportunities.append(opportunity)
+            for i, product in enumerate(result.matrix.products):
+                # Resultado parcial: basta comparar dois marketplaces
+                if not result.valid[i]:
+                    count = len(prices_by_product[product])
+                    logger.warning(f"Preços insuficientes para {product}: {count} marketplace(s)")
+                    continue
+                
+                opportunity = result.opportunity(i, now) if result.is_opportunity[i] else None
                 
-                logger.info(f"Oportunidade encontrada para {product}: {margin:.2f}% de margem")
+                # Mesma oportunidade de antes não é duplicada, só tem o timestamp renovado
+                changed = self.store.update(
+                    product, float(result.min_price[i]), float(result.max_price[i]), now, opportunity
+                )
+                if changed and opportunity:
+                    logger.info(
+                        f"Oportunidade encontrada para {product}: {opportunity['margin']:.2f}% de margem "
+                        f"({opportunity['net_margin']:.2f}% líquida, comprar em {opportunity['buy_from']}, "
+                        f"vender em {opportunity['sell_to']})"
+                    )
             
         except Exception as e:
-            logger.error(f"Erro ao analisar produto {product}: {e}")
-    
-    def _get_amazon_price(self, product):
-        """Simula obtenção de preço na Amazon"""
-        # Em produção, seria scraping real
-        return 1500 + (hash(product) % 500)
-    
-    def _get_mercadolivre_price(self, product):
-        """Simula obtenção de preço no Mercado Livre"""
-        return 1400 + (hash(product) % 400)
+            logger.error(f"Erro ao analisar preços: {e}")
     
-    def _get_americanas_price(self, product):
-        """Simula obtenção de preço nas Americanas"""
-        return 1600 + (hash(product) % 600)
-    
-    def _get_magazineluiza_price(self, product):
-        """Simula obtenção de preço no Magazine Luiza"""
-        return 1450 + (hash(product) % 450)
+    def _record_history(self, prices_by_product, timestamp):
+        """Grava as observações do ciclo no histórico colunar"""
+        try:
+            self.history.append_prices(prices_by_product, timestamp)
+            self.history.flush()
+        except Exception as e:
+            logger.error(f"Erro ao gravar histórico de preços: {e}")
     
     def _generate_report(self):
         """Gera relatório de oportunidades"""
         try:
             logger.info("Gerando relatório de arbitragem...")
             
-            report = {
-                'timestamp': time.time(),
-                'opportunities': self.opportunities,
-                'total_opportunities': len(self.opportunities)
-            }
-            
-            # Salvar relatório JSON
-            report_file = os.path.join(self.output_dir, "arbitrage_report.json")
-            with open(report_file, 'w', encoding='utf-8') as f:
-                json.dump(report, f, indent=2, ensure_ascii=False)
+            now = time.time()
+            changed, removed = self.store.changed_since(self.last_report_at)
+            delta_file = self.report_writer.write(self.opportunities, changed, removed, now)
             
-            # Gerar HTML
-            html_content = self._create_html_report()
-            html_file = os.path.join(self.output_dir, "arbitrage_report.html")
-            with open(html_file, 'w', encoding='utf-8') as f:
-                f.write(html_content)
-            
-            logger.info(f"Relatório gerado: {report_file}")
+            self.last_report_at = now
+            logger.info(f"Relatório gerado: {self.report_writer.json_path}")
+            if delta_file:
+                logger.info(f"Delta do ciclo: {len(changed)} alteradas, {len(removed)} removidas ({delta_file})")
             
         except Exception as e:
             logger.error(f"Erro ao gerar relatório: {e}")
-    
-    def _create_html_report(self):
-        """Cria relatório HTML"""
-        html = f"""
-<!DOCTYPE html>
-<html lang="pt-BR">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Super-Bot Relatório de Arbitragem</title>
-    <style>
-        body {{ font-family: Arial, sans-serif; margin: 20px; }}
-        .opportunity {{ border: 1px solid #ddd; padding: 15px; margin: 10px 0; border-radius: 5px; }}
-        .margin-high {{ background-color: #d4edda; }}
-        .margin-medium {{ background-color: #fff3cd; }}
-        .price {{ font-weight: bold; color: #28a745; }}
-    </style>
-</head>
-<body>
-    <h1>Super-Bot Relatório de Arbitragem</h1>
-    <p>Total de oportunidades: {len(self.opportunities)}</p>
-    
-    <div class="opportunities">
-"""
-        
-        for opp in self.opportunities:
-            margin_class = "margin-high" if opp['margin'] > 20 else "margin-medium"
-            html += f"""
-        <div class="opportunity {margin_class}">
-            <h3>{opp['product']}</h3>
-            <p><strong>Margem:</strong> {opp['margin']:.2f}%</p>
-            <p><strong>Menor preço:</strong> <span class="price">R$ {opp['min_price']:.2f}</span></p>
-            <p><strong>Maior preço:</strong> R$ {opp['max_price']:.2f}</p>
-            <h4>Preços por marketplace:</h4>
-            <ul>
-"""
-            
-            for marketplace, price in opp['prices'].items():
-                html += f"<li>{marketplace}: R$ {price:.2f}</li>"
-            
-            html += """
-            </ul>
-        </div>
-"""
-        
-        html += """
-    </div>
-</body>
-</html>
-"""
-        return html
 
 def start_api():
     import uvicorn
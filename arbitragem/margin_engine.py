@@ -0,0 +1,124 @@
+import os
+import json
+import logging
+from typing import Dict, Iterable, List, Mapping, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Margem líquida mínima (%) para considerar oportunidade
+MARGIN_THRESHOLD = float(os.getenv("ARBITRAGEM_MARGIN_THRESHOLD", "10"))
+# Custos por marketplace, ex.: {"Amazon": {"fee": 0.15, "shipping": 25.0}}
+# fee é a comissão sobre a venda; shipping é o frete pago na compra
+MARKETPLACE_COSTS = json.loads(os.getenv("ARBITRAGEM_MARKETPLACE_COSTS", "{}"))
+
+
+class PriceMatrix:
+    """Preços produto × marketplace; mask marca os preços ausentes"""
+
+    def __init__(self, products: List[str], marketplaces: List[str], prices: np.ndarray,
+                 mask: Optional[np.ndarray] = None):
+        self.products = products
+        self.marketplaces = marketplaces
+        self.prices = np.asarray(prices, dtype=np.float64)
+        self.mask = np.isnan(self.prices) if mask is None else np.asarray(mask, dtype=bool)
+
+    @classmethod
+    def from_dict(cls, prices_by_product: Mapping[str, Mapping[str, float]],
+                  marketplaces: Optional[Iterable[str]] = None) -> "PriceMatrix":
+        products = list(prices_by_product)
+        if marketplaces is None:
+            marketplaces = sorted({m for prices in prices_by_product.values() for m in prices})
+        marketplaces = list(marketplaces)
+        column = {name: j for j, name in enumerate(marketplaces)}
+        prices = np.full((len(products), len(marketplaces)), np.nan)
+        for i, product in enumerate(products):
+            row = prices[i]
+            for marketplace, price in prices_by_product[product].items():
+                j = column.get(marketplace)
+                if j is not None and price is not None:
+                    row[j] = price
+        return cls(products, marketplaces, prices)
+
+
+class MarginResult:
+    """Resultado por linha da matriz (arrays alinhados com matrix.products)"""
+
+    def __init__(self, matrix: PriceMatrix, valid, min_price, max_price, buy, sell,
+                 margin, net_margin, is_opportunity):
+        self.matrix = matrix
+        self.valid = valid
+        self.min_price = min_price
+        self.max_price = max_price
+        self.buy = buy
+        self.sell = sell
+        self.margin = margin
+        self.net_margin = net_margin
+        self.is_opportunity = is_opportunity
+
+    def prices(self, i: int) -> Dict[str, float]:
+        row, missing = self.matrix.prices[i], self.matrix.mask[i]
+        return {
+            name: float(row[j])
+            for j, name in enumerate(self.matrix.marketplaces)
+            if not missing[j]
+        }
+
+    def opportunity(self, i: int, timestamp: float) -> dict:
+        return {
+            'product': self.matrix.products[i],
+            'prices': self.prices(i),
+            'min_price': float(self.min_price[i]),
+            'max_price': float(self.max_price[i]),
+            'margin': float(self.margin[i]),
+            'net_margin': float(self.net_margin[i]),
+            'buy_from': self.matrix.marketplaces[self.buy[i]],
+            'sell_to': self.matrix.marketplaces[self.sell[i]],
+            'timestamp': timestamp
+        }
+
+
+class MarginEngine:
+    """Calcula margens de todos os produtos de uma vez com NumPy.
+
+    Compra onde o custo (preço + frete) é menor e vende onde a receita
+    (preço - comissão) é maior; a margem líquida é (receita - custo) / custo.
+    A margem bruta é a mesma de antes: (maior - menor) / menor.
+    """
+
+    def __init__(self, costs: Mapping[str, Mapping[str, float]] = MARKETPLACE_COSTS,
+                 threshold: float = MARGIN_THRESHOLD):
+        self.costs = costs
+        self.threshold = threshold
+
+    def _cost_vectors(self, marketplaces: List[str]):
+        fees = np.array([self.costs.get(m, {}).get("fee", 0.0) for m in marketplaces])
+        shipping = np.array([self.costs.get(m, {}).get("shipping", 0.0) for m in marketplaces])
+        return fees, shipping
+
+    def compute(self, matrix: PriceMatrix) -> MarginResult:
+        prices, missing = matrix.prices, matrix.mask
+        n = prices.shape[0]
+        fees, shipping = self._cost_vectors(matrix.marketplaces)
+
+        valid = (~missing).sum(axis=1) >= 2
+        low = np.where(missing, np.inf, prices)
+        high = np.where(missing, -np.inf, prices)
+        min_price = low.min(axis=1, initial=np.inf)
+        max_price = high.max(axis=1, initial=-np.inf)
+
+        cost = low + shipping
+        revenue = np.where(missing, -np.inf, prices * (1.0 - fees))
+        buy = cost.argmin(axis=1) if n else np.zeros(0, dtype=np.intp)
+        sell = revenue.argmax(axis=1) if n else np.zeros(0, dtype=np.intp)
+        rows = np.arange(n)
+        best_cost = cost[rows, buy]
+        best_revenue = revenue[rows, sell]
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            margin = np.where(valid, (max_price - min_price) / min_price * 100, np.nan)
+            net_margin = np.where(valid, (best_revenue - best_cost) / best_cost * 100, np.nan)
+        is_opportunity = valid & (net_margin > self.threshold)
+
+        return MarginResult(matrix, valid, min_price, max_price, buy, sell, margin, net_margin, is_opportunity)
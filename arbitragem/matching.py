@@ -0,0 +1,301 @@
+import os
+import re
+import json
+import zlib
+import logging
+import unicodedata
+from typing import Dict, Iterable, List, Optional, Set
+
+import numpy as np
+
+from report_writer import atomic_writer
+
+logger = logging.getLogger(__name__)
+
+MATCH_DIR = os.getenv("ARBITRAGEM_MATCH_DIR", "/app/output/matching")
+# Similaridade mínima (0 a 1) para dois anúncios serem o mesmo produto
+MATCH_THRESHOLD = float(os.getenv("ARBITRAGEM_MATCH_THRESHOLD", "0.6"))
+# Anúncios comparados por bucket LSH (limita buckets gigantes de títulos genéricos)
+MAX_BUCKET_CANDIDATES = 200
+
+_MERSENNE_PRIME = (1 << 31) - 1
+
+STOPWORDS = {
+    "de", "da", "do", "com", "para", "e", "o", "a", "em", "por", "na", "no",
+    "novo", "nova", "original", "lacrado", "oficial", "garantia", "nf", "envio", "imediato",
+    "smartphone", "celular", "console", "notebook",
+}
+COLORS = {
+    "preto", "branco", "azul", "verde", "vermelho", "rosa", "roxo", "cinza", "prata",
+    "dourado", "amarelo", "grafite", "titanio", "meia-noite", "estelar",
+}
+
+_STORAGE = re.compile(r"\b(\d+)\s*(gb|tb)\b")
+_RAM = re.compile(r"\b(\d+)gb\s*(?:de\s*)?ram\b|\bram\s*(\d+)gb\b")
+_NON_WORD = re.compile(r"[^a-z0-9\- ]+")
+
+
+def strip_accents(text: str) -> str:
+    return "".join(c for c in unicodedata.normalize("NFKD", text) if not unicodedata.combining(c))
+
+
+def normalize_title(title: str) -> str:
+    """Minúsculas, sem acento/pontuação, unidades coladas ("128 GB" -> "128gb"), sem stopwords"""
+    text = strip_accents(title.lower())
+    text = _NON_WORD.sub(" ", text)
+    text = _STORAGE.sub(lambda m: f"{m.group(1)}{m.group(2)}", text)
+    return " ".join(token for token in text.split() if token not in STOPWORDS and token.strip("-"))
+
+
+def extract_attributes(normalized: str) -> dict:
+    """Armazenamento, RAM, cor e tokens de modelo (com dígitos) de um título normalizado"""
+    ram = _RAM.search(normalized)
+    ram_value = f"{ram.group(1) or ram.group(2)}gb" if ram else None
+    text = _RAM.sub(" ", normalized) if ram else normalized
+    storage = _STORAGE.search(text)
+    tokens = text.split()
+    return {
+        "storage": f"{storage.group(1)}{storage.group(2)}" if storage else None,
+        "ram": ram_value,
+        "color": next((t for t in tokens if t in COLORS), None),
+        "model": sorted(t for t in tokens if any(c.isdigit() for c in t) and not _STORAGE.fullmatch(t)),
+    }
+
+
+def shingles(tokens: Iterable[str]) -> Set[str]:
+    """Conjunto usado no MinHash: os tokens do título, sem cor (mesmo critério do score)"""
+    return set(tokens) - COLORS or {""}
+
+
+class MinHasher:
+    """Assinaturas MinHash com permutações (a*x + b) mod p vetorizadas em NumPy"""
+
+    def __init__(self, num_perm: int = 64, seed: int = 7):
+        rng = np.random.default_rng(seed)
+        self.num_perm = num_perm
+        self.a = rng.integers(1, _MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+        self.b = rng.integers(0, _MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+
+    def signature(self, items: Iterable[str]) -> np.ndarray:
+        hashes = np.fromiter((zlib.crc32(s.encode("utf-8")) for s in items), dtype=np.uint64)
+        # a < 2^31 e hash < 2^32: o produto cabe em uint64
+        permuted = (np.outer(hashes, self.a) + self.b) % _MERSENNE_PRIME
+        return permuted.min(axis=0).astype(np.uint32)
+
+
+def token_similarity(a: dict, b: dict) -> float:
+    """Jaccard dos tokens, zerado se armazenamento, RAM ou modelo divergirem"""
+    for key in ("storage", "ram"):
+        if a[key] and b[key] and a[key] != b[key]:
+            return 0.0
+    # Modelos conflitam quando cada lado tem um código que o outro não tem
+    # ("iphone 15" x "iphone 14"); um código a mais de um lado só ("15 a3090") é aceito
+    ma, mb = set(a["model"]), set(b["model"])
+    if ma - mb and mb - ma:
+        return 0.0
+    # Cor diferente não muda o produto para arbitragem
+    ta, tb = set(a["tokens"]) - COLORS, set(b["tokens"]) - COLORS
+    if not ta or not tb:
+        return 0.0
+    return len(ta & tb) / len(ta | tb)
+
+
+def _cluster_attributes(listing: dict) -> dict:
+    return {
+        "storage": {listing["storage"]} - {None},
+        "ram": {listing["ram"]} - {None},
+        "model": set(listing["model"]),
+    }
+
+
+def attributes_conflict(a: dict, b: dict) -> bool:
+    """Mesma regra do token_similarity, aplicada aos atributos somados de dois grupos"""
+    for key in ("storage", "ram"):
+        if a[key] and b[key] and a[key] != b[key]:
+            return True
+    return bool(a["model"] - b["model"] and b["model"] - a["model"])
+
+
+class ProductMatcher:
+    """Agrupa anúncios de marketplaces diferentes que são o mesmo produto.
+
+    Os títulos viram assinaturas MinHash; o LSH (bands × rows) só gera pares
+    candidatos entre anúncios que colidem em alguma banda, que então são
+    pontuados por token_similarity. Pares acima do limite são unidos num
+    union-find, desde que os atributos do grupo inteiro (armazenamento, RAM,
+    modelos) não conflitem: sem isso um título genérico ("iPhone 15") ligaria
+    por transitividade o 128GB ao 256GB. Anúncios, assinaturas e grupos ficam em disco, então cada
+    ciclo só processa anúncios novos.
+    """
+
+    def __init__(self, path: Optional[str] = MATCH_DIR, threshold: float = MATCH_THRESHOLD,
+                 num_perm: int = 64, bands: int = 16):
+        if num_perm % bands:
+            raise ValueError("num_perm deve ser múltiplo de bands")
+        self.path = path
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.hasher = MinHasher(num_perm)
+        self.listings: Dict[str, dict] = {}
+        self._signatures: Dict[str, np.ndarray] = {}
+        self._buckets: Dict[tuple, List[str]] = {}
+        self._parent: Dict[str, str] = {}
+        # atributos somados de cada grupo, por raiz
+        self._attributes: Dict[str, dict] = {}
+        if path:
+            self.load()
+
+    # union-find
+    def find(self, listing_id: str) -> str:
+        parent = self._parent
+        root = listing_id
+        while parent[root] != root:
+            root = parent[root]
+        while parent[listing_id] != root:
+            parent[listing_id], listing_id = root, parent[listing_id]
+        return root
+
+    def union(self, a: str, b: str) -> bool:
+        """Une os grupos de a e b; recusa (False) se os atributos dos grupos conflitarem"""
+        ra, rb = self.find(a), self.find(b)
+        if ra == rb:
+            return True
+        attributes_a, attributes_b = self._attributes[ra], self._attributes[rb]
+        if attributes_conflict(attributes_a, attributes_b):
+            return False
+        # raiz estável: o anúncio mais antigo (menor id de inserção) continua raiz
+        if self.listings[ra]["seq"] > self.listings[rb]["seq"]:
+            ra, rb = rb, ra
+        self._parent[rb] = ra
+        self._attributes[ra] = {key: attributes_a[key] | attributes_b[key] for key in attributes_a}
+        self._attributes.pop(rb, None)
+        return True
+
+    def _band_keys(self, signature: np.ndarray):
+        for band in range(self.bands):
+            yield band, signature[band * self.rows:(band + 1) * self.rows].tobytes()
+
+    def _index(self, listing_id: str, signature: np.ndarray):
+        self._signatures[listing_id] = signature
+        for key in self._band_keys(signature):
+            self._buckets.setdefault(key, []).append(listing_id)
+
+    def candidates(self, signature: np.ndarray) -> Set[str]:
+        found: Set[str] = set()
+        for key in self._band_keys(signature):
+            bucket = self._buckets.get(key)
+            if bucket:
+                found.update(bucket[-MAX_BUCKET_CANDIDATES:])
+        return found
+
+    def add_listing(self, marketplace: str, title: str, listing_id: Optional[str] = None) -> str:
+        """Adiciona um anúncio (ignorado se o id já existe) e devolve seu id"""
+        listing_id = listing_id or f"{marketplace}:{title}"
+        if listing_id in self.listings:
+            return listing_id
+        normalized = normalize_title(title)
+        attributes = extract_attributes(normalized)
+        listing = {
+            "marketplace": marketplace,
+            "title": title,
+            "tokens": normalized.split(),
+            "seq": len(self.listings),
+            **attributes,
+        }
+        signature = self.hasher.signature(shingles(listing["tokens"]))
+
+        self.listings[listing_id] = listing
+        self._parent[listing_id] = listing_id
+        self._attributes[listing_id] = _cluster_attributes(listing)
+        for other in self.candidates(signature):
+            if self.find(other) == self.find(listing_id):
+                continue
+            if token_similarity(listing, self.listings[other]) >= self.threshold:
+                self.union(listing_id, other)
+        self._index(listing_id, signature)
+        return listing_id
+
+    def add_listings(self, listings: Iterable[dict]) -> List[str]:
+        return [self.add_listing(l["marketplace"], l["title"], l.get("id")) for l in listings]
+
+    def clusters(self) -> Dict[str, List[str]]:
+        groups: Dict[str, List[str]] = {}
+        for listing_id in self.listings:
+            groups.setdefault(self.find(listing_id), []).append(listing_id)
+        return groups
+
+    def label(self, listing_id: str) -> str:
+        """Nome do grupo: título do anúncio mais antigo"""
+        return self.listings[self.find(listing_id)]["title"]
+
+    def group_names(self, listing_ids: Iterable[str]) -> Dict[str, str]:
+        """Nome de exibição do grupo de cada anúncio: o título da raiz, com o id da raiz
+        quando grupos diferentes do lote têm o mesmo título"""
+        roots = {listing_id: self.find(listing_id) for listing_id in listing_ids}
+        by_title: Dict[str, List[str]] = {}
+        for root in dict.fromkeys(roots.values()):
+            by_title.setdefault(self.listings[root]["title"], []).append(root)
+        names = {}
+        for title, same_title in by_title.items():
+            for root in same_title:
+                names[root] = title if len(same_title) == 1 else f"{title} [{root}]"
+        return {listing_id: names[root] for listing_id, root in roots.items()}
+
+    def group_prices(self, priced_listings: Iterable[dict]) -> Dict[str, Dict[str, float]]:
+        """Menor preço por marketplace de cada grupo, no formato do PriceMatrix"""
+        priced_listings = list(priced_listings)
+        # Agrupa pela raiz só depois de inserir o lote inteiro: uma união posterior muda a raiz
+        listing_ids = self.add_listings(priced_listings)
+        names = self.group_names(listing_ids)
+        grouped: Dict[str, Dict[str, float]] = {}
+        for listing_id, listing in zip(listing_ids, priced_listings):
+            prices = grouped.setdefault(names[listing_id], {})
+            marketplace, price = listing["marketplace"], listing["price"]
+            if marketplace not in prices or price < prices[marketplace]:
+                prices[marketplace] = price
+        return grouped
+
+    def save(self):
+        if not self.path:
+            return
+        os.makedirs(self.path, exist_ok=True)
+        ids = list(self.listings)
+        signatures = np.stack([self._signatures[i] for i in ids]) if ids else np.zeros((0, self.hasher.num_perm), np.uint32)
+        with atomic_writer(os.path.join(self.path, "signatures.npy"), "wb") as f:
+            np.save(f, signatures)
+        with atomic_writer(os.path.join(self.path, "listings.json")) as f:
+            json.dump({
+                "ids": ids,
+                "listings": self.listings,
+                "parent": {i: self.find(i) for i in ids},
+            }, f, ensure_ascii=False)
+
+    def load(self):
+        listings_file = os.path.join(self.path, "listings.json")
+        signatures_file = os.path.join(self.path, "signatures.npy")
+        if not (os.path.exists(listings_file) and os.path.exists(signatures_file)):
+            return
+        try:
+            with open(listings_file, encoding="utf-8") as f:
+                data = json.load(f)
+            signatures = np.load(signatures_file)
+        except (OSError, ValueError) as e:
+            logger.error(f"Erro ao carregar grupos de produtos: {e}")
+            return
+        if len(signatures) != len(data["ids"]) or signatures.shape[1:] != (self.hasher.num_perm,):
+            logger.warning("Assinaturas incompatíveis com a configuração atual, refazendo o matching")
+            return
+        self.listings = data["listings"]
+        self._parent = data["parent"]
+        for listing_id, signature in zip(data["ids"], signatures):
+            self._index(listing_id, signature)
+        self._attributes = {}
+        for listing_id, listing in self.listings.items():
+            root = self.find(listing_id)
+            attributes = _cluster_attributes(listing)
+            current = self._attributes.setdefault(root, attributes)
+            if current is not attributes:
+                for key in current:
+                    current[key] |= attributes[key]
+        logger.info(f"{len(self.listings)} anúncios carregados em {len(self.clusters())} grupos")
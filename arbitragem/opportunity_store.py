@@ -0,0 +1,165 @@
+import os
+import time
+import statistics
+import threading
+from array import array
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+# Por quanto tempo um produto que não foi mais analisado continua no store
+WINDOW = float(os.getenv("ARBITRAGEM_OPPORTUNITY_WINDOW", str(24 * 3600)))
+# Quantas observações de preço guardar por produto
+HISTORY_SIZE = int(os.getenv("ARBITRAGEM_HISTORY_SIZE", "96"))
+
+
+class PriceHistory:
+    """Buffer circular de (timestamp, menor preço, maior preço) em arrays de double"""
+
+    __slots__ = ("capacity", "timestamps", "min_prices", "max_prices", "next", "count")
+
+    def __init__(self, capacity: int = HISTORY_SIZE):
+        self.capacity = capacity
+        self.timestamps = array("d", bytes(8 * capacity))
+        self.min_prices = array("d", bytes(8 * capacity))
+        self.max_prices = array("d", bytes(8 * capacity))
+        self.next = 0
+        self.count = 0
+
+    def append(self, timestamp: float, min_price: float, max_price: float):
+        i = self.next
+        self.timestamps[i] = timestamp
+        self.min_prices[i] = min_price
+        self.max_prices[i] = max_price
+        self.next = (i + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+
+    def items(self) -> List[dict]:
+        """Observações da mais antiga para a mais recente"""
+        start = (self.next - self.count) % self.capacity
+        result = []
+        for k in range(self.count):
+            i = (start + k) % self.capacity
+            result.append({
+                "timestamp": self.timestamps[i],
+                "min_price": self.min_prices[i],
+                "max_price": self.max_prices[i],
+            })
+        return result
+
+    def __len__(self):
+        return self.count
+
+
+class OpportunityStore:
+    """Última oportunidade por produto, histórico de preços e consulta de deltas.
+
+    _latest fica ordenado por updated_at (só muda quando preços ou margem
+    mudam), então changed_since percorre apenas o final do dicionário. Produtos
+    que não são observados há mais de `window` segundos são removidos.
+    """
+
+    def __init__(self, window: float = WINDOW, history_size: int = HISTORY_SIZE):
+        self.window = window
+        self.history_size = history_size
+        self._latest: "OrderedDict[str, dict]" = OrderedDict()
+        self._removed: "OrderedDict[str, float]" = OrderedDict()
+        self._seen: "OrderedDict[str, float]" = OrderedDict()
+        self._history: Dict[str, PriceHistory] = {}
+        self._lock = threading.RLock()
+
+    def update(self, product: str, min_price: float, max_price: float,
+               timestamp: float, opportunity: Optional[dict] = None) -> bool:
+        """Registra uma observação do produto; retorna True se a oportunidade mudou.
+
+        Sem `opportunity` (margem abaixo do limite) a oportunidade anterior do
+        produto, se houver, deixa de valer e aparece como removida nos deltas.
+        """
+        with self._lock:
+            history = self._history.get(product)
+            if history is None:
+                history = self._history[product] = PriceHistory(self.history_size)
+            history.append(timestamp, min_price, max_price)
+            self._seen[product] = timestamp
+            self._seen.move_to_end(product)
+
+            previous = self._latest.get(product)
+            if opportunity is None:
+                if previous is None:
+                    return False
+                del self._latest[product]
+                self._removed[product] = timestamp
+                self._removed.move_to_end(product)
+                return True
+
+            if previous is not None and previous["prices"] == opportunity["prices"]:
+                previous["timestamp"] = timestamp
+                return False
+            self._latest[product] = dict(opportunity, updated_at=timestamp)
+            self._latest.move_to_end(product)
+            self._removed.pop(product, None)
+            return True
+
+    def changed_since(self, since: float) -> Tuple[List[dict], List[str]]:
+        """Oportunidades alteradas e produtos removidos depois de `since`"""
+        with self._lock:
+            changed = []
+            for opportunity in reversed(self._latest.values()):
+                if opportunity["updated_at"] <= since:
+                    break
+                changed.append(opportunity)
+            removed = []
+            for product, removed_at in reversed(self._removed.items()):
+                if removed_at <= since:
+                    break
+                removed.append(product)
+        changed.reverse()
+        removed.reverse()
+        return changed, removed
+
+    def all(self) -> List[dict]:
+        with self._lock:
+            return list(self._latest.values())
+
+    def get(self, product: str) -> Optional[dict]:
+        return self._latest.get(product)
+
+    def history(self, product: str) -> List[dict]:
+        with self._lock:
+            history = self._history.get(product)
+            return history.items() if history is not None else []
+
+    def volatility(self, product: str) -> float:
+        """Desvio padrão / média do menor preço observado (0 sem histórico suficiente)"""
+        with self._lock:
+            history = self._history.get(product)
+            if history is None or history.count < 2:
+                return 0.0
+            prices = history.min_prices[:history.count]
+        mean = statistics.fmean(prices)
+        return statistics.pstdev(prices) / mean if mean else 0.0
+
+    def evict(self, now: Optional[float] = None) -> int:
+        """Remove produtos não observados dentro da janela; retorna quantos saíram"""
+        now = time.time() if now is None else now
+        cutoff = now - self.window
+        evicted = 0
+        with self._lock:
+            while self._seen:
+                product, seen_at = next(iter(self._seen.items()))
+                if seen_at >= cutoff:
+                    break
+                del self._seen[product]
+                self._history.pop(product, None)
+                if self._latest.pop(product, None) is not None:
+                    self._removed[product] = now
+                    self._removed.move_to_end(product)
+                evicted += 1
+            while self._removed:
+                product, removed_at = next(iter(self._removed.items()))
+                if removed_at >= cutoff:
+                    break
+                del self._removed[product]
+        return evicted
+
+    def __len__(self):
+        return len(self._latest)
@@ -0,0 +1,178 @@
+import os
+import re
+import json
+import time
+import hashlib
+import logging
+import threading
+from typing import Iterable, Optional
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from selenium.webdriver.support.ui import WebDriverWait
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = os.getenv("ARBITRAGEM_PAGE_CACHE_DIR", "/app/cache/pages")
+# Domínios que sempre precisam de navegador (separados por vírgula)
+JS_DOMAINS = [d.strip() for d in os.getenv("ARBITRAGEM_JS_DOMAINS", "").split(",") if d.strip()]
+HTTP_TIMEOUT = float(os.getenv("ARBITRAGEM_HTTP_TIMEOUT", "10"))
+# Validade (s) do HTML renderizado pelo navegador; depois disso a página é renderizada de novo
+RENDER_TTL = float(os.getenv("ARBITRAGEM_RENDER_TTL", "300"))
+
+USER_AGENT = (
+    "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/124.0 Safari/537.36"
+)
+
+_JS_REQUIRED_MARKERS = re.compile(
+    r"enable javascript|habilite o javascript|ative o javascript|javascript is (disabled|required)",
+    re.IGNORECASE,
+)
+_EMPTY_APP_ROOT = re.compile(r'<div id="(root|app|__next)"[^>]*>\s*</div>', re.IGNORECASE)
+_SCRIPT_OR_STYLE = re.compile(r"<(script|style|noscript)\b.*?</\1>", re.IGNORECASE | re.DOTALL)
+_TAG = re.compile(r"<[^>]+>")
+
+
+def visible_text_length(html: str) -> int:
+    text = _TAG.sub(" ", _SCRIPT_OR_STYLE.sub(" ", html))
+    return len(" ".join(text.split()))
+
+
+def looks_js_rendered(html: str, min_text: int = 200) -> bool:
+    """Heurística: a página só tem conteúdo depois de executar JavaScript"""
+    if _JS_REQUIRED_MARKERS.search(html) or _EMPTY_APP_ROOT.search(html):
+        return True
+    return visible_text_length(html) < min_text
+
+
+class Page:
+    """HTML obtido e de onde veio: http, browser ou cache (revalidado com 304)"""
+
+    def __init__(self, url: str, html: str, source: str, rendered: bool = False):
+        self.url = url
+        self.html = html
+        self.source = source
+        self.rendered = rendered
+
+
+class PageCache:
+    """Cache em disco: corpo em <hash>.html e validadores em <hash>.json"""
+
+    def __init__(self, directory: str = CACHE_DIR):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, url: str, ext: str) -> str:
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, f"{key}.{ext}")
+
+    def load(self, url: str) -> Optional[dict]:
+        try:
+            with open(self._path(url, "json"), encoding="utf-8") as f:
+                meta = json.load(f)
+            with open(self._path(url, "html"), encoding="utf-8") as f:
+                meta["html"] = f.read()
+            return meta
+        except (OSError, ValueError):
+            return None
+
+    def _write(self, path: str, content: str):
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(content)
+        os.replace(tmp, path)
+
+    def store(self, url: str, html: str, etag: Optional[str], last_modified: Optional[str], rendered: bool):
+        # Corpo antes dos metadados: quem lê metadados novos sempre acha o corpo correspondente
+        self._write(self._path(url, "html"), html)
+        self._write(self._path(url, "json"), json.dumps({
+            "url": url,
+            "etag": etag,
+            "last_modified": last_modified,
+            "rendered": rendered,
+            "fetched_at": time.time(),
+        }))
+
+
+class PageFetcher:
+    """Busca páginas por HTTP primeiro e só usa o navegador quando precisa.
+
+    Páginas estáticas são buscadas com GET condicional (If-None-Match/
+    If-Modified-Since) e um 304 devolve a cópia em cache. Páginas de domínios
+    marcados em ARBITRAGEM_JS_DOMAINS, ou que parecem depender de JavaScript,
+    são renderizadas pelo pool de navegadores; o HTML renderizado vale por
+    render_ttl segundos e depois é renderizado de novo, já que os validadores
+    do shell não mudam quando os preços carregados por XHR mudam.
+    """
+
+    def __init__(self, browser_pool=None, cache: Optional[PageCache] = None,
+                 js_domains: Iterable[str] = JS_DOMAINS, session: Optional[requests.Session] = None,
+                 timeout: float = HTTP_TIMEOUT, render_timeout: float = 10.0, render_ttl: float = RENDER_TTL):
+        self.browser_pool = browser_pool
+        self.cache = cache or PageCache()
+        self.js_domains = set(js_domains)
+        self.timeout = timeout
+        self.render_timeout = render_timeout
+        self.render_ttl = render_ttl
+        self.session = session or self._create_session()
+        self.stats = {"http": 0, "cache": 0, "browser": 0}
+
+    @staticmethod
+    def _create_session() -> requests.Session:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=16, pool_maxsize=32)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        session.headers["User-Agent"] = USER_AGENT
+        return session
+
+    def needs_js(self, url: str, html: str) -> bool:
+        host = urlparse(url).hostname or ""
+        if host in self.js_domains or any(host.endswith(f".{d}") for d in self.js_domains):
+            return True
+        return looks_js_rendered(html)
+
+    def fetch(self, url: str) -> Page:
+        cached = self.cache.load(url)
+        if cached and cached.get("rendered"):
+            if time.time() - cached.get("fetched_at", 0.0) < self.render_ttl:
+                self.stats["cache"] += 1
+                return Page(url, cached["html"], "cache", rendered=True)
+            cached = None  # expirou: GET sem validadores e nova renderização
+        headers = {}
+        if cached:
+            if cached.get("etag"):
+                headers["If-None-Match"] = cached["etag"]
+            if cached.get("last_modified"):
+                headers["If-Modified-Since"] = cached["last_modified"]
+
+        response = self.session.get(url, headers=headers, timeout=self.timeout)
+        if response.status_code == 304 and cached:
+            self.stats["cache"] += 1
+            return Page(url, cached["html"], "cache", rendered=cached.get("rendered", False))
+        response.raise_for_status()
+
+        html, source, rendered = response.text, "http", False
+        if self.needs_js(url, html):
+            if self.browser_pool is None:
+                logger.warning(f"{url} parece depender de JavaScript, mas não há pool de navegadores")
+            else:
+                html, source, rendered = self._render(url), "browser", True
+
+        self.stats[source] += 1
+        # Validadores do shell não valem para o HTML renderizado
+        etag = last_modified = None
+        if not rendered:
+            etag, last_modified = response.headers.get("ETag"), response.headers.get("Last-Modified")
+        self.cache.store(url, html, etag, last_modified, rendered)
+        return Page(url, html, source, rendered=rendered)
+
+    def _render(self, url: str) -> str:
+        with self.browser_pool.driver() as driver:
+            driver.get(url)
+            WebDriverWait(driver, self.render_timeout).until(
+                lambda d: d.execute_script("return document.readyState") == "complete"
+            )
+            return driver.page_source
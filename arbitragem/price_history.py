@@ -0,0 +1,298 @@
+"""Histórico de preços colunar, particionado por mês e bucket de produto.
+
+Layout em disco:
+
+    <root>/manifest.json
+    <root>/month=2025-01/bucket=03/part-000042/{timestamp,product,marketplace,price}.npy
+
+Cada coluna é um .npy lido com mmap; dentro de um part as linhas ficam
+ordenadas por (produto, timestamp), então um filtro por produto vira um
+searchsorted. A compactação é por níveis: min_parts parts de um nível viram
+um part do nível seguinte, então cada linha é reescrita O(log n) vezes e o
+part grande não é regravado a cada ciclo. O manifest guarda os dicionários produto/marketplace -> id e,
+por part, o intervalo de timestamps, para descartar partições sem abrir.
+
+flush() e compact() trocam o manifest sob um flock em <root>/.lock e relêem a
+lista de parts do disco antes de gravar, então o bot e o comando compact
+podem rodar ao mesmo tempo; as leituras recarregam o manifest quando ele muda.
+
+Uso: python price_history.py compact [--root DIR] [--min-parts N]
+"""
+import os
+import json
+import time
+import zlib
+import fcntl
+import shutil
+import logging
+import argparse
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Mapping, Optional
+
+import numpy as np
+
+from report_writer import atomic_writer
+
+logger = logging.getLogger(__name__)
+
+HISTORY_DIR = os.getenv("ARBITRAGEM_HISTORY_DIR", "/app/output/history")
+PRODUCT_BUCKETS = int(os.getenv("ARBITRAGEM_HISTORY_BUCKETS", "16"))
+# Parts do mesmo nível numa partição que disparam a compactação
+COMPACT_MIN_PARTS = int(os.getenv("ARBITRAGEM_HISTORY_COMPACT_PARTS", "8"))
+# Intervalo mínimo (s) entre duas compactações disparadas pelo bot
+COMPACT_INTERVAL = float(os.getenv("ARBITRAGEM_HISTORY_COMPACT_INTERVAL", "3600"))
+
+COLUMNS = {
+    "timestamp": np.float64,
+    "product": np.uint32,
+    "marketplace": np.uint16,
+    "price": np.float64,
+}
+
+
+def month_of(timestamp: float) -> str:
+    return time.strftime("%Y-%m", time.gmtime(timestamp))
+
+
+def bucket_of(product: str, buckets: int) -> int:
+    return zlib.crc32(product.encode("utf-8")) % buckets
+
+
+class PriceHistoryStore:
+    """Store append-only de observações (timestamp, produto, marketplace, preço)"""
+
+    def __init__(self, root: str = HISTORY_DIR, buckets: int = PRODUCT_BUCKETS):
+        self.root = root
+        self.buckets = buckets
+        self.manifest_path = os.path.join(root, "manifest.json")
+        self._pending: Dict[tuple, List[tuple]] = {}
+        self._manifest_mtime: Optional[int] = None
+        self._load_manifest()
+
+    def _read_manifest(self) -> Optional[dict]:
+        try:
+            mtime = os.stat(self.manifest_path).st_mtime_ns
+            with open(self.manifest_path, encoding="utf-8") as f:
+                manifest = json.load(f)
+        except FileNotFoundError:
+            return None
+        self._manifest_mtime = mtime
+        return manifest
+
+    def _load_manifest(self):
+        manifest = self._read_manifest()
+        if manifest is None:
+            manifest = {"buckets": self.buckets, "next_part": 0, "products": {}, "marketplaces": {}, "parts": []}
+        if manifest["buckets"] != self.buckets:
+            logger.warning(f"Histórico criado com {manifest['buckets']} buckets; usando o valor do manifest")
+            self.buckets = manifest["buckets"]
+        self.manifest = manifest
+        self.product_names = {v: k for k, v in manifest["products"].items()}
+        self.marketplace_names = {v: k for k, v in manifest["marketplaces"].items()}
+
+    def _save_manifest(self):
+        os.makedirs(self.root, exist_ok=True)
+        with atomic_writer(self.manifest_path) as f:
+            json.dump(self.manifest, f, ensure_ascii=False)
+        self._manifest_mtime = os.stat(self.manifest_path).st_mtime_ns
+
+    @contextmanager
+    def _locked(self):
+        """Exclusão entre processos (bot e CLI) para ler-modificar-gravar o manifest"""
+        os.makedirs(self.root, exist_ok=True)
+        with open(os.path.join(self.root, ".lock"), "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _refresh(self, force: bool = False):
+        """Adota a lista de parts do disco se outro processo trocou o manifest.
+
+        Os dicionários de ids ficam os da memória: só este processo acrescenta
+        produtos, e ids ainda não gravados precisam sobreviver.
+        """
+        try:
+            mtime = os.stat(self.manifest_path).st_mtime_ns
+        except FileNotFoundError:
+            return
+        if not force and mtime == self._manifest_mtime:
+            return
+        manifest = self._read_manifest()
+        if manifest is None:
+            return
+        for kind, names in (("products", self.product_names), ("marketplaces", self.marketplace_names)):
+            for name, value in manifest[kind].items():
+                if name not in self.manifest[kind]:
+                    self.manifest[kind][name] = value
+                    names[value] = name
+        self.manifest["parts"] = manifest["parts"]
+        self.manifest["next_part"] = max(self.manifest["next_part"], manifest["next_part"])
+
+    def _id(self, kind: str, names: dict, name: str) -> int:
+        ids = self.manifest[kind]
+        value = ids.get(name)
+        if value is None:
+            value = ids[name] = len(ids)
+            names[value] = name
+        return value
+
+    # escrita
+    def append(self, product: str, marketplace: str, price: float, timestamp: float):
+        product_id = self._id("products", self.product_names, product)
+        marketplace_id = self._id("marketplaces", self.marketplace_names, marketplace)
+        key = (month_of(timestamp), bucket_of(product, self.buckets))
+        self._pending.setdefault(key, []).append((timestamp, product_id, marketplace_id, price))
+
+    def append_prices(self, prices_by_product: Mapping[str, Mapping[str, float]], timestamp: float):
+        for product, prices in prices_by_product.items():
+            for marketplace, price in prices.items():
+                self.append(product, marketplace, price, timestamp)
+
+    def _write_part(self, month: str, bucket: int, columns: Dict[str, np.ndarray], level: int = 0) -> dict:
+        order = np.lexsort((columns["timestamp"], columns["product"]))
+        part_id = self.manifest["next_part"]
+        self.manifest["next_part"] += 1
+        path = os.path.join(f"month={month}", f"bucket={bucket:02d}", f"part-{part_id:06d}")
+        directory = os.path.join(self.root, path)
+        os.makedirs(directory, exist_ok=True)
+        for name, dtype in COLUMNS.items():
+            np.save(os.path.join(directory, f"{name}.npy"), np.ascontiguousarray(columns[name][order], dtype=dtype))
+        return {
+            "path": path,
+            "month": month,
+            "bucket": bucket,
+            "rows": int(len(order)),
+            "level": level,
+            "min_ts": float(columns["timestamp"].min()),
+            "max_ts": float(columns["timestamp"].max()),
+        }
+
+    def flush(self) -> int:
+        """Grava o que está em memória como novos parts e publica no manifest"""
+        if not self._pending:
+            return 0
+        written = 0
+        with self._locked():
+            self._refresh(force=True)
+            for (month, bucket), rows in self._pending.items():
+                data = np.array(rows, dtype=[(name, dtype) for name, dtype in COLUMNS.items()])
+                part = self._write_part(month, bucket, {name: data[name] for name in COLUMNS})
+                self.manifest["parts"].append(part)
+                written += part["rows"]
+            self._pending = {}
+            # O manifest é a fonte da verdade: parts só ficam visíveis depois desta troca atômica
+            self._save_manifest()
+        return written
+
+    # leitura
+    def partitions_for(self, product: Optional[str] = None, start: Optional[float] = None,
+                       end: Optional[float] = None) -> List[dict]:
+        """Parts que podem conter linhas do filtro (poda por bucket, mês e intervalo de tempo)"""
+        self._refresh()
+        bucket = bucket_of(product, self.buckets) if product is not None else None
+        first = month_of(start) if start is not None else None
+        last = month_of(end) if end is not None else None
+        selected = []
+        for part in self.manifest["parts"]:
+            if bucket is not None and part["bucket"] != bucket:
+                continue
+            if (first and part["month"] < first) or (last and part["month"] > last):
+                continue
+            if (start is not None and part["max_ts"] < start) or (end is not None and part["min_ts"] > end):
+                continue
+            selected.append(part)
+        return selected
+
+    def _read_part(self, part: dict, product_id: Optional[int], start: Optional[float], end: Optional[float]):
+        directory = os.path.join(self.root, part["path"])
+        columns = {name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r") for name in COLUMNS}
+        lo, hi = 0, part["rows"]
+        if product_id is not None:
+            products = columns["product"]
+            lo = int(np.searchsorted(products, product_id, side="left"))
+            hi = int(np.searchsorted(products, product_id, side="right"))
+        timestamps = columns["timestamp"][lo:hi]
+        mask = np.ones(hi - lo, dtype=bool)
+        if start is not None:
+            mask &= timestamps >= start
+        if end is not None:
+            mask &= timestamps <= end
+        return {name: np.asarray(column[lo:hi][mask]) for name, column in columns.items()}
+
+    def scan(self, product: Optional[str] = None, start: Optional[float] = None,
+             end: Optional[float] = None) -> Dict[str, np.ndarray]:
+        """Colunas das observações que passam no filtro, ordenadas por timestamp"""
+        empty = {name: np.zeros(0, dtype=dtype) for name, dtype in COLUMNS.items()}
+        product_id = None
+        if product is not None:
+            product_id = self.manifest["products"].get(product)
+            if product_id is None:
+                return empty
+        try:
+            chunks = [self._read_part(part, product_id, start, end) for part in self.partitions_for(product, start, end)]
+        except FileNotFoundError:
+            # Um compact em outro processo apagou parts entre a leitura do manifest e a dos arquivos
+            self._refresh(force=True)
+            chunks = [self._read_part(part, product_id, start, end) for part in self.partitions_for(product, start, end)]
+        chunks = [chunk for chunk in chunks if len(chunk["timestamp"])]
+        if not chunks:
+            return empty
+        result = {name: np.concatenate([chunk[name] for chunk in chunks]) for name in COLUMNS}
+        order = np.argsort(result["timestamp"], kind="stable")
+        return {name: column[order] for name, column in result.items()}
+
+    def history(self, product: str, start: Optional[float] = None, end: Optional[float] = None) -> List[dict]:
+        """Observações de um produto como dicionários (para relatórios e API)"""
+        data = self.scan(product, start, end)
+        return [
+            {"timestamp": float(ts), "marketplace": self.marketplace_names[int(m)], "price": float(p)}
+            for ts, m, p in zip(data["timestamp"], data["marketplace"], data["price"])
+        ]
+
+    # manutenção
+    def compact(self, min_parts: int = COMPACT_MIN_PARTS, full: bool = False) -> int:
+        """Junta min_parts ou mais parts do mesmo (mês, bucket, nível) num part do nível seguinte;
+        com full=True junta todos os parts de cada (mês, bucket). Retorna quantos parts saíram"""
+        removed: List[dict] = []
+        with self._locked():
+            # Outro processo (bot ou CLI) pode ter gravado parts desde a última leitura
+            self._refresh(force=True)
+            merged_any = True
+            # Repete até estabilizar: um merge pode completar o nível seguinte
+            while merged_any:
+                merged_any = False
+                groups: Dict[tuple, List[dict]] = {}
+                for part in self.manifest["parts"]:
+                    level = None if full else part.get("level", 0)
+                    groups.setdefault((part["month"], part["bucket"], level), []).append(part)
+
+                for (month, bucket, _), parts in groups.items():
+                    if len(parts) < max(min_parts, 2):
+                        continue
+                    chunks = [self._read_part(part, None, None, None) for part in parts]
+                    merged = {name: np.concatenate([chunk[name] for chunk in chunks]) for name in COLUMNS}
+                    level = max(part.get("level", 0) for part in parts) + 1
+                    new_part = self._write_part(month, bucket, merged, level)
+                    self.manifest["parts"] = [p for p in self.manifest["parts"] if p not in parts] + [new_part]
+                    removed.extend(parts)
+                    merged_any = not full
+
+            if removed:
+                self._save_manifest()
+                # Só apaga depois que o manifest novo já não aponta para os parts antigos
+                for part in removed:
+                    shutil.rmtree(os.path.join(self.root, part["path"]), ignore_errors=True)
+                logger.info(f"Histórico compactado: {len(removed)} parts unificados")
+        return len(removed)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Manutenção do histórico de preços")
+    parser.add_argument("command", choices=["compact"])
+    parser.add_argument("--root", default=HISTORY_DIR)
+    parser.add_argument("--min-parts", type=int, default=2)
+    args = parser.parse_args()
+    store = PriceHistoryStore(args.root)
+    print(f"{store.compact(args.min_parts, full=True)} parts compactados")
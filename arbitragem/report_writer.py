@@ -0,0 +1,155 @@
+import os
+import gzip
+import html
+import json
+import glob
+import logging
+import tempfile
+from contextlib import contextmanager
+from typing import IO, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Grava também um NDJSON gzip com as mudanças de cada ciclo
+WRITE_DELTAS = os.getenv("ARBITRAGEM_REPORT_DELTAS", "false").lower() in ("1", "true", "yes")
+# Quantos arquivos de delta manter
+DELTA_RETENTION = int(os.getenv("ARBITRAGEM_DELTA_RETENTION", "96"))
+
+HTML_HEADER = """<!DOCTYPE html>
+<html lang="pt-BR">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>Super-Bot Relatório de Arbitragem</title>
+    <style>
+        body { font-family: Arial, sans-serif; margin: 20px; }
+        .opportunity { border: 1px solid #ddd; padding: 15px; margin: 10px 0; border-radius: 5px; }
+        .margin-high { background-color: #d4edda; }
+        .margin-medium { background-color: #fff3cd; }
+        .price { font-weight: bold; color: #28a745; }
+    </style>
+</head>
+<body>
+    <h1>Super-Bot Relatório de Arbitragem</h1>
+"""
+
+HTML_FOOTER = """
+    </div>
+</body>
+</html>
+"""
+
+
+@contextmanager
+def atomic_writer(path: str, mode: str = "w", encoding: Optional[str] = "utf-8"):
+    """Escreve num temporário no mesmo diretório e troca pelo destino com os.replace.
+
+    Quem lê o arquivo vê sempre a versão anterior completa ou a nova completa.
+    """
+    directory = os.path.dirname(path) or "."
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, mode, encoding=encoding if "b" not in mode else None) as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        # mkstemp cria com 0600; o relatório precisa continuar legível por outros processos
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def write_json_report(f: IO[str], opportunities: Iterable[dict], header: dict):
+    """JSON do relatório escrito uma oportunidade por vez"""
+    f.write("{")
+    for key, value in header.items():
+        f.write(f"{json.dumps(key)}: {json.dumps(value, ensure_ascii=False)}, ")
+    f.write('"opportunities": [')
+    first = True
+    for opportunity in opportunities:
+        f.write("\n  " if first else ",\n  ")
+        f.write(json.dumps(opportunity, ensure_ascii=False))
+        first = False
+    f.write("\n]}\n")
+
+
+def write_html_report(f: IO[str], opportunities: Iterable[dict], total: int):
+    """HTML do relatório escrito em pedaços (sem concatenar uma string gigante)"""
+    f.write(HTML_HEADER)
+    f.write(f"    <p>Total de oportunidades: {total}</p>\n\n    <div class=\"opportunities\">\n")
+    for opp in opportunities:
+        margin_class = "margin-high" if opp['margin'] > 20 else "margin-medium"
+        items = "".join(
+            f"<li>{html.escape(marketplace)}: R$ {price:.2f}</li>"
+            for marketplace, price in opp['prices'].items()
+        )
+        f.write(f"""
+        <div class="opportunity {margin_class}">
+            <h3>{html.escape(opp['product'])}</h3>
+            <p><strong>Margem:</strong> {opp['margin']:.2f}%</p>
+            <p><strong>Menor preço:</strong> <span class="price">R$ {opp['min_price']:.2f}</span></p>
+            <p><strong>Maior preço:</strong> R$ {opp['max_price']:.2f}</p>
+            <h4>Preços por marketplace:</h4>
+            <ul>
+{items}
+            </ul>
+        </div>
+""")
+    f.write(HTML_FOOTER)
+
+
+class ReportWriter:
+    """Gera arbitrage_report.json/.html de forma atômica e, opcionalmente, os deltas do ciclo"""
+
+    def __init__(self, output_dir: str, write_deltas: bool = WRITE_DELTAS, delta_retention: int = DELTA_RETENTION):
+        self.output_dir = output_dir
+        self.write_deltas = write_deltas
+        self.delta_retention = delta_retention
+        self.json_path = os.path.join(output_dir, "arbitrage_report.json")
+        self.html_path = os.path.join(output_dir, "arbitrage_report.html")
+        self.delta_dir = os.path.join(output_dir, "deltas")
+
+    def write(self, opportunities: List[dict], changed: List[dict], removed: List[str],
+              timestamp: float) -> Optional[str]:
+        """Grava os relatórios; retorna o caminho do delta gravado (se houver)"""
+        header = {
+            'timestamp': timestamp,
+            'total_opportunities': len(opportunities),
+            'changed_since_last_report': len(changed),
+            'removed_since_last_report': removed,
+        }
+        with atomic_writer(self.json_path) as f:
+            write_json_report(f, opportunities, header)
+        with atomic_writer(self.html_path) as f:
+            write_html_report(f, opportunities, len(opportunities))
+
+        if self.write_deltas and (changed or removed):
+            return self._write_delta(changed, removed, timestamp)
+        return None
+
+    def _write_delta(self, changed: List[dict], removed: List[str], timestamp: float) -> str:
+        os.makedirs(self.delta_dir, exist_ok=True)
+        path = os.path.join(self.delta_dir, f"arbitrage_delta_{int(timestamp * 1000)}.ndjson.gz")
+        with atomic_writer(path, "wb") as raw:
+            with gzip.GzipFile(fileobj=raw, mode="wb", compresslevel=6) as gz:
+                for opportunity in changed:
+                    gz.write(json.dumps({"type": "changed", **opportunity}, ensure_ascii=False).encode("utf-8"))
+                    gz.write(b"\n")
+                for product in removed:
+                    gz.write(json.dumps({"type": "removed", "product": product}, ensure_ascii=False).encode("utf-8"))
+                    gz.write(b"\n")
+        self._prune_deltas()
+        return path
+
+    def _prune_deltas(self):
+        deltas = sorted(glob.glob(os.path.join(self.delta_dir, "arbitrage_delta_*.ndjson.gz")))
+        for old in deltas[:-self.delta_retention] if self.delta_retention > 0 else []:
+            try:
+                os.unlink(old)
+            except OSError as e:
+                logger.warning(f"Erro ao remover delta antigo {old}: {e}")
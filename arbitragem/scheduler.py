@@ -0,0 +1,156 @@
+import os
+import time
+import heapq
+import logging
+from typing import Dict, Iterable, List, Optional
+
+from prometheus_client import Gauge
+
+logger = logging.getLogger(__name__)
+
+MIN_INTERVAL = float(os.getenv("ARBITRAGEM_MIN_RESCAN", "120"))
+MAX_INTERVAL = float(os.getenv("ARBITRAGEM_MAX_RESCAN", "1800"))
+# Requisições por minuto permitidas em cada marketplace
+MARKETPLACE_BUDGET = float(os.getenv("ARBITRAGEM_MARKETPLACE_BUDGET", "120"))
+# Volatilidade (desvio padrão / média do menor preço) que reduz o intervalo pela metade
+VOLATILITY_REFERENCE = 0.01
+# Uma oportunidade atualizada há menos que isso é considerada recente
+RECENT_OPPORTUNITY = 3600.0
+
+SCAN_QUEUE_DEPTH = Gauge(
+    "arbitragem_scan_queue_depth",
+    "Produtos com nova varredura vencida aguardando orçamento",
+)
+SCAN_QUEUE_LAG = Gauge(
+    "arbitragem_scan_lag_seconds",
+    "Atraso da varredura vencida mais antiga",
+)
+SCAN_QUEUE_SIZE = Gauge(
+    "arbitragem_scan_queue_size",
+    "Produtos agendados",
+)
+
+
+def rescan_interval(volatility: float, opportunity: Optional[dict], now: float,
+                    min_interval: float = MIN_INTERVAL, max_interval: float = MAX_INTERVAL) -> float:
+    """Intervalo até a próxima varredura de um produto.
+
+    Preços voláteis e oportunidades recentes (quanto maior a margem, mais
+    cedo) encurtam o intervalo; produtos estáveis voltam ao máximo.
+    """
+    interval = max_interval / (1.0 + volatility / VOLATILITY_REFERENCE)
+    if opportunity is not None and now - opportunity.get("updated_at", now) < RECENT_OPPORTUNITY:
+        margin = opportunity.get("net_margin", opportunity.get("margin", 0.0))
+        interval /= 2.0 + max(margin, 0.0) / 10.0
+    return min(max(interval, min_interval), max_interval)
+
+
+class RescanScheduler:
+    """Fila de prioridade (heap) com o próximo horário de varredura de cada produto.
+
+    Cada varredura de produto custa uma requisição por marketplace; o orçamento
+    de cada um é um token bucket de `budget` requisições por minuto, e só saem
+    da fila tantos produtos vencidos quanto o marketplace mais restrito permite.
+    """
+
+    def __init__(self, marketplaces: Iterable[str], budget: float = MARKETPLACE_BUDGET,
+                 min_interval: float = MIN_INTERVAL, max_interval: float = MAX_INTERVAL):
+        self.marketplaces = list(marketplaces)
+        self.rate = budget / 60.0
+        self.capacity = budget
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self._heap: List[tuple] = []
+        self._due: Dict[str, float] = {}
+        self._seq = 0
+        self._tokens = {m: self.capacity for m in self.marketplaces}
+        self._refilled_at = time.monotonic()
+
+    def schedule(self, product: str, due: float):
+        """Agenda (ou reagenda) um produto; entradas antigas no heap são ignoradas"""
+        self._due[product] = due
+        self._seq += 1
+        heapq.heappush(self._heap, (due, self._seq, product))
+        SCAN_QUEUE_SIZE.set(len(self._due))
+
+    def add(self, products: Iterable[str], now: Optional[float] = None):
+        now = time.time() if now is None else now
+        for product in products:
+            if product not in self._due:
+                self.schedule(product, now)
+
+    def reschedule(self, product: str, now: float, volatility: float, opportunity: Optional[dict]) -> float:
+        interval = rescan_interval(volatility, opportunity, now, self.min_interval, self.max_interval)
+        self.schedule(product, now + interval)
+        return interval
+
+    def remove(self, product: str):
+        self._due.pop(product, None)
+        SCAN_QUEUE_SIZE.set(len(self._due))
+
+    def _refill(self):
+        now = time.monotonic()
+        elapsed = now - self._refilled_at
+        self._refilled_at = now
+        for m in self._tokens:
+            self._tokens[m] = min(self.capacity, self._tokens[m] + elapsed * self.rate)
+
+    def _peek(self) -> Optional[tuple]:
+        """Topo do heap, descartando entradas de produtos reagendados ou removidos"""
+        while self._heap:
+            due, _, product = self._heap[0]
+            if self._due.get(product) == due:
+                return due, product
+            heapq.heappop(self._heap)
+        return None
+
+    def budget(self) -> int:
+        """Quantos produtos cabem agora no orçamento do marketplace mais restrito"""
+        self._refill()
+        if not self._tokens:
+            return len(self._due)
+        return int(min(self._tokens.values()))
+
+    def pop_due(self, now: Optional[float] = None, limit: Optional[int] = None) -> List[str]:
+        """Retira os produtos vencidos que cabem no orçamento, mais atrasados primeiro.
+
+        Os produtos retirados saem da fila até serem reagendados.
+        """
+        now = time.time() if now is None else now
+        allowed = self.budget()
+        if limit is not None:
+            allowed = min(allowed, limit)
+        batch = []
+        while len(batch) < allowed:
+            top = self._peek()
+            if top is None or top[0] > now:
+                break
+            heapq.heappop(self._heap)
+            del self._due[top[1]]
+            batch.append(top[1])
+        for m in self._tokens:
+            self._tokens[m] -= len(batch)
+        self.update_metrics(now)
+        return batch
+
+    def update_metrics(self, now: float):
+        top = self._peek()
+        lag = max(0.0, now - top[0]) if top is not None else 0.0
+        depth = sum(1 for due in self._due.values() if due <= now) if lag else 0
+        SCAN_QUEUE_DEPTH.set(depth)
+        SCAN_QUEUE_LAG.set(lag)
+        SCAN_QUEUE_SIZE.set(len(self._due))
+
+    def seconds_until_next(self, now: Optional[float] = None) -> float:
+        """Quanto dormir até haver trabalho (próximo vencimento ou orçamento liberado)"""
+        now = time.time() if now is None else now
+        top = self._peek()
+        if top is None:
+            return self.max_interval
+        wait = top[0] - now
+        if wait <= 0 and self.budget() < 1:
+            wait = 1.0 / self.rate if self.rate > 0 else self.max_interval
+        return min(max(wait, 0.0), self.max_interval)
+
+    def __len__(self):
+        return len(self._due)
@@ -0,0 +1,24 @@
+import requests
+
+from benchmark import catalog_price, format_brl, start_fake_marketplaces
+from fetcher import parse_brl
+
+
+def test_fake_marketplace_serves_prices_with_etag_and_errors():
+    config = {"marketplaces": ["loja0"], "catalog": {"Produto 1"}, "latency": 0.0, "jitter": 0.0, "error_rate": 0.0}
+    server, port = start_fake_marketplaces(config)
+    try:
+        url = f"http://127.0.0.1:{port}/loja0/produto?q=Produto+1"
+        first = requests.get(url, timeout=5)
+        assert first.status_code == 200
+        assert format_brl(catalog_price("loja0", "Produto 1")) in first.text
+        assert requests.get(url, headers={"If-None-Match": first.headers["ETag"]}, timeout=5).status_code == 304
+        assert requests.get(f"http://127.0.0.1:{port}/loja0/produto?q=Outro", timeout=5).status_code == 404
+    finally:
+        server.terminate()
+        server.join()
+
+
+def test_brl_formatting_round_trips_through_the_scraper_parser():
+    assert format_brl(1234.5) == "R$ 1.234,50"
+    assert parse_brl(format_brl(98765.43)) == 98765.43
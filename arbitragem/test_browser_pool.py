@@ -0,0 +1,92 @@
+import threading
+
+import pytest
+
+from browser_pool import DriverPool
+
+
+class FakeDriver:
+    def __init__(self):
+        self.alive = True
+        self.quit_called = False
+
+    def execute_script(self, script):
+        if not self.alive:
+            raise RuntimeError("chrome not reachable")
+        return 1
+
+    def quit(self):
+        self.quit_called = True
+
+
+def make_pool(**kwargs):
+    created = []
+
+    def factory():
+        created.append(FakeDriver())
+        return created[-1]
+
+    return DriverPool(factory=factory, **kwargs), created
+
+
+def test_drivers_are_reused_and_pool_size_is_enforced():
+    pool, created = make_pool(size=2, checkout_timeout=0.05)
+    a = pool.checkout()
+    b = pool.checkout()
+    with pytest.raises(TimeoutError):
+        pool.checkout()
+    pool.checkin(a)
+    assert pool.checkout() is a
+    pool.checkin(a)
+    pool.checkin(b)
+    assert len(created) == 2
+
+
+def test_recycles_after_max_pages_and_memory_threshold(monkeypatch):
+    pool, created = make_pool(size=1, max_pages=2, max_rss_mb=100)
+    with pool.driver():
+        pass
+    with pool.driver():
+        pass
+    assert created[0].quit_called
+    assert pool.recycled == 1
+
+    pooled = pool.checkout()
+    assert pooled.driver is created[1]
+    monkeypatch.setattr(type(pooled), "rss_bytes", lambda self: 200 * 1024 * 1024)
+    pool.checkin(pooled)
+    assert created[1].quit_called
+    assert pool.stats()["created"] == 0
+
+
+def test_crashed_driver_is_replaced():
+    pool, created = make_pool(size=1)
+    with pytest.raises(RuntimeError):
+        with pool.driver() as driver:
+            driver.alive = False
+            driver.execute_script("return document.title")
+    assert created[0].quit_called
+
+    pooled = pool.checkout()
+    pooled.driver.alive = False
+    pool.checkin(pooled)
+    # checkout detecta o driver morto que voltou ao pool e cria outro
+    replacement = pool.checkout()
+    assert replacement.driver is created[-1] and replacement.driver.alive
+    assert pool.replaced == 2
+
+
+def test_waiting_checkout_wakes_up_when_a_driver_is_discarded():
+    pool, created = make_pool(size=1, checkout_timeout=5)
+    pooled = pool.checkout()
+    result = []
+    waiter = threading.Thread(target=lambda: result.append(pool.checkout()))
+    waiter.start()
+    waiter.join(0.1)
+    assert waiter.is_alive()
+
+    # O driver não volta ao pool: só a vaga é liberada
+    pool.checkin(pooled, broken=True)
+    waiter.join(1)
+    assert not waiter.is_alive()
+    assert result[0].driver is created[1]
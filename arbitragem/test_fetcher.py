@@ -0,0 +1,141 @@
+import time
+import asyncio
+import threading
+
+from fetcher import MarketplaceAdapter, PriceFetchEngine
+
+
+class Concurrency:
+    """Buscas em andamento somadas entre adaptadores (e threads)"""
+
+    def __init__(self):
+        self.active = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+
+    def __enter__(self):
+        with self.lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+
+    def __exit__(self, *exc):
+        with self.lock:
+            self.active -= 1
+
+
+class FakeAdapter(MarketplaceAdapter):
+    def __init__(self, name, price, delay=0.0, max_concurrency=4, timeout=1.0, error=None, tracker=None):
+        self.tracker = tracker or Concurrency()
+        self.name = name
+        self.price = price
+        self.delay = delay
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.error = error
+        self.active = 0
+        self.peak = 0
+
+    async def fetch_price(self, product):
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            with self.tracker:
+                await asyncio.sleep(self.delay)
+            if self.error:
+                raise self.error
+            return self.price
+        finally:
+            self.active -= 1
+
+
+class BlockingAdapter(MarketplaceAdapter):
+    """Scraper bloqueante que trava além do timeout"""
+
+    def __init__(self, name, tracker, delay, timeout):
+        self.name = name
+        self.tracker = tracker
+        self.delay = delay
+        self.timeout = timeout
+        self.max_concurrency = 1
+
+    def _scrape(self):
+        with self.tracker:
+            time.sleep(self.delay)
+        return 100.0
+
+    async def fetch_price(self, product):
+        return await asyncio.to_thread(self._scrape)
+
+
+def test_concurrency_is_bounded_per_marketplace_and_globally():
+    tracker = Concurrency()
+    fast = FakeAdapter("A", 100, delay=0.01, max_concurrency=3, tracker=tracker)
+    slow = FakeAdapter("B", 120, delay=0.01, max_concurrency=10, tracker=tracker)
+    engine = PriceFetchEngine([fast, slow], max_concurrency=5)
+    products = [f"p{i}" for i in range(20)]
+    results = engine.run(products)
+    assert results["p0"] == {"A": 100, "B": 120}
+    assert len(results) == 20
+    assert fast.peak <= 3
+    assert slow.peak <= 5
+    assert tracker.peak == 5
+
+
+def test_slow_or_failing_marketplace_yields_partial_result():
+    adapters = [
+        FakeAdapter("A", 100),
+        FakeAdapter("B", 150),
+        FakeAdapter("Lenta", 90, delay=5, timeout=0.05),
+        FakeAdapter("Quebrada", 80, error=RuntimeError("503")),
+    ]
+    results = PriceFetchEngine(adapters).run(["iPhone 15"])
+    assert results == {"iPhone 15": {"A": 100, "B": 150}}
+
+
+def test_bot_uses_engine_and_skips_products_with_one_price(tmp_path):
+    from main import SuperBotArbitragem
+    from opportunity_store import OpportunityStore
+
+    bot = SuperBotArbitragem(store=OpportunityStore(), output_dir=str(tmp_path), cache_dir=str(tmp_path / "pages"))
+    bot.fetch_engine = PriceFetchEngine([FakeAdapter("A", 100), FakeAdapter("B", 150)])
+    bot._analyze_arbitrage()
+    assert len(bot.opportunities) == 4
+    assert bot.opportunities[0]["min_price"] == 100
+    # o ciclo passa os anúncios pelo matching de produtos
+    assert len(bot.matcher.listings) == 8
+
+    bot._analyze_product("Novo produto", {"A": 100})
+    assert len(bot.opportunities) == 4
+
+
+def test_scraping_adapter_fetches_page_and_parses_price():
+    from fetcher import ScrapingAdapter, parse_brl
+
+    class Page:
+        html = "<span>R$ 4.299,90</span>"
+
+    class FakePageFetcher:
+        def __init__(self):
+            self.urls = []
+
+        def fetch(self, url):
+            self.urls.append(url)
+            return Page()
+
+    page_fetcher = FakePageFetcher()
+    adapter = ScrapingAdapter("Loja", "http://loja/busca?q={query}", page_fetcher,
+                              parse=lambda html: parse_brl(html[6:-7]))
+    results = PriceFetchEngine([adapter]).run(["iPhone 15"])
+    assert results == {"iPhone 15": {"Loja": 4299.90}}
+    assert page_fetcher.urls == ["http://loja/busca?q=iPhone+15"]
+    assert parse_brl("R$ 899") == 899.0
+
+
+def test_timed_out_blocking_fetch_keeps_its_slot_until_the_thread_ends():
+    tracker = Concurrency()
+    engine = PriceFetchEngine([BlockingAdapter("Travada", tracker, delay=0.2, timeout=0.05)])
+    started = time.perf_counter()
+    results = engine.run(["p1", "p2", "p3"])
+    assert results == {"p1": {}, "p2": {}, "p3": {}}
+    assert tracker.peak == 1
+    assert time.perf_counter() - started >= 0.6
@@ -1,5 +1,5 @@
 from main import SuperBotArbitragem
 
-def test_arbitragem_init():
-    bot = SuperBotArbitragem()
+def test_arbitragem_init(tmp_path):
+    bot = SuperBotArbitragem(output_dir=str(tmp_path), cache_dir=str(tmp_path / "pages"))
     assert bot is not None 
\ No newline at end of file
@@ -0,0 +1,37 @@
+import numpy as np
+
+from margin_engine import MarginEngine, PriceMatrix
+
+
+def test_matrix_masks_missing_prices():
+    matrix = PriceMatrix.from_dict({"A": {"x": 100, "y": 120}, "B": {"y": 50}}, marketplaces=["x", "y", "z"])
+    assert matrix.mask.tolist() == [[False, False, True], [True, False, True]]
+
+
+def test_gross_margin_matches_the_scalar_formula():
+    prices = {f"p{i}": {"x": 100.0 + i, "y": 150.0, "z": 130.0 - i} for i in range(50)}
+    result = MarginEngine(costs={}).compute(PriceMatrix.from_dict(prices, ["x", "y", "z"]))
+    for i, row in enumerate(prices.values()):
+        expected = (max(row.values()) - min(row.values())) / min(row.values()) * 100
+        assert np.isclose(result.margin[i], expected)
+        assert np.isclose(result.net_margin[i], expected)
+    assert result.is_opportunity.all()
+    assert result.matrix.marketplaces[result.sell[0]] == "y"
+
+
+def test_fees_and_shipping_reduce_net_margin_and_threshold():
+    matrix = PriceMatrix.from_dict({
+        "A": {"x": 100.0, "y": 125.0},
+        "B": {"x": 100.0},
+        "C": {"x": 100.0, "y": 200.0},
+    })
+    costs = {"x": {"shipping": 10.0}, "y": {"fee": 0.2}}
+    result = MarginEngine(costs=costs, threshold=10).compute(matrix)
+    # A: compra 100 + 10 de frete, vende 125 - 20% = 100 -> prejuízo
+    assert np.isclose(result.margin[0], 25.0)
+    assert np.isclose(result.net_margin[0], (100 - 110) / 110 * 100)
+    assert result.is_opportunity.tolist() == [False, False, True]
+    assert not result.valid[1] and np.isnan(result.net_margin[1])
+    opportunity = result.opportunity(2, 1.0)
+    assert opportunity["buy_from"] == "x" and opportunity["sell_to"] == "y"
+    assert opportunity["prices"] == {"x": 100.0, "y": 200.0}
@@ -0,0 +1,93 @@
+from matching import ProductMatcher, extract_attributes, normalize_title
+
+LISTINGS = [
+    ("Amazon", "Apple iPhone 15 128GB Preto"),
+    ("Mercado Livre", "iPhone 15 Apple 128 GB - Azul Lacrado"),
+    ("Americanas", "Smartphone Apple iPhone 15 (128GB) Preto"),
+    ("Amazon", "Apple iPhone 15 256GB Preto"),
+    ("Amazon", "Apple iPhone 14 128GB"),
+    ("Magazine Luiza", "Samsung Galaxy S24 256GB 8GB RAM"),
+    ("Amazon", "Samsung Galaxy S24 8 GB RAM 256 GB Cinza"),
+]
+
+
+def groups(matcher):
+    return sorted(sorted(matcher.listings[i]["title"] for i in ids) for ids in matcher.clusters().values())
+
+
+def test_normalizes_titles_and_extracts_attributes():
+    normalized = normalize_title("Smartphone Samsung Galaxy S24 8 GB RAM 256 GB - Cinza Titânio")
+    assert normalized == "samsung galaxy s24 8gb ram 256gb cinza titanio"
+    assert extract_attributes(normalized) == {"storage": "256gb", "ram": "8gb", "color": "cinza", "model": ["s24"]}
+
+
+def test_groups_same_product_and_separates_model_or_storage():
+    matcher = ProductMatcher(path=None)
+    for marketplace, title in LISTINGS:
+        matcher.add_listing(marketplace, title)
+    assert len(matcher.clusters()) == 4
+    assert ["Apple iPhone 15 128GB Preto", "Smartphone Apple iPhone 15 (128GB) Preto",
+            "iPhone 15 Apple 128 GB - Azul Lacrado"] in groups(matcher)
+
+    prices = matcher.group_prices([
+        {"marketplace": "Amazon", "title": "Apple iPhone 15 128GB Preto", "price": 5000.0},
+        {"marketplace": "Mercado Livre", "title": "iPhone 15 Apple 128 GB - Azul Lacrado", "price": 4500.0},
+    ])
+    assert prices == {"Apple iPhone 15 128GB Preto": {"Amazon": 5000.0, "Mercado Livre": 4500.0}}
+
+
+def test_clusters_persist_and_new_listings_match_incrementally(tmp_path):
+    matcher = ProductMatcher(path=str(tmp_path))
+    for marketplace, title in LISTINGS:
+        matcher.add_listing(marketplace, title)
+    matcher.save()
+
+    reloaded = ProductMatcher(path=str(tmp_path))
+    assert groups(reloaded) == groups(matcher)
+    new_id = reloaded.add_listing("Casas Bahia", "Galaxy S24 Samsung 256GB 8GB RAM Preto")
+    assert reloaded.label(new_id) == "Samsung Galaxy S24 256GB 8GB RAM"
+    assert len(reloaded.clusters()) == 4
+
+
+def test_lsh_limits_candidate_pairs():
+    matcher = ProductMatcher(path=None)
+    compared = 0
+    for i in range(400):
+        listing_id = matcher.add_listing("Loja", f"Marca{i} Linha{i % 7} X{i} {i % 3 + 1}TB")
+        compared += len(matcher.candidates(matcher._signatures[listing_id])) - 1
+    # todos diferentes: sem LSH seriam 400*399/2 comparações
+    assert compared < 400 * 10
+    assert len(matcher.clusters()) == 400
+
+
+def test_generic_title_does_not_chain_different_storage():
+    matcher = ProductMatcher(path=None)
+    for marketplace, title in [
+        ("Amazon", "Apple iPhone 15 128GB Preto"),
+        ("Americanas", "Apple iPhone 15 256GB Preto"),
+        ("Mercado Livre", "Apple iPhone 15 Preto"),
+    ]:
+        matcher.add_listing(marketplace, title)
+    assert not any(
+        {"Apple iPhone 15 128GB Preto", "Apple iPhone 15 256GB Preto"} <= set(group) for group in groups(matcher)
+    )
+
+    prices = matcher.group_prices([
+        {"marketplace": "Amazon", "title": "Apple iPhone 15 128GB Preto", "price": 4000.0},
+        {"marketplace": "Americanas", "title": "Apple iPhone 15 256GB Preto", "price": 5500.0},
+    ])
+    assert prices == {
+        "Apple iPhone 15 128GB Preto": {"Amazon": 4000.0},
+        "Apple iPhone 15 256GB Preto": {"Americanas": 5500.0},
+    }
+
+
+def test_groups_with_the_same_root_title_stay_separate():
+    # threshold acima de 1: nada se une, então dois grupos têm raízes com o mesmo título
+    matcher = ProductMatcher(path=None, threshold=1.1)
+    prices = matcher.group_prices([
+        {"marketplace": "Amazon", "title": "Apple iPhone 15 128GB", "price": 5000.0},
+        {"marketplace": "Americanas", "title": "Apple iPhone 15 128GB", "price": 4800.0},
+    ])
+    assert sorted(prices.values(), key=lambda group: list(group)) == [{"Amazon": 5000.0}, {"Americanas": 4800.0}]
+    assert all(name.startswith("Apple iPhone 15 128GB [") for name in prices)
@@ -0,0 +1,54 @@
+from fastapi.testclient import TestClient
+
+from opportunity_store import OpportunityStore, PriceHistory
+
+
+def opportunity(product, prices):
+    return {"product": product, "prices": prices, "min_price": min(prices.values()),
+            "max_price": max(prices.values()), "margin": 20.0}
+
+
+def test_keeps_latest_per_product_and_reports_deltas():
+    store = OpportunityStore(window=100)
+    assert store.update("A", 100, 130, 10.0, opportunity("A", {"x": 100, "y": 130}))
+    assert store.update("B", 200, 260, 11.0, opportunity("B", {"x": 200, "y": 260}))
+    # mesma oportunidade: não duplica nem aparece como alteração
+    assert not store.update("A", 100, 130, 20.0, opportunity("A", {"x": 100, "y": 130}))
+    assert store.update("B", 200, 300, 21.0, opportunity("B", {"x": 200, "y": 300}))
+    assert store.update("A", 100, 105, 22.0)  # margem caiu: sai do store
+
+    assert [o["product"] for o in store.all()] == ["B"]
+    changed, removed = store.changed_since(15.0)
+    assert [o["max_price"] for o in changed] == [300]
+    assert removed == ["A"]
+    assert store.changed_since(22.0) == ([], [])
+    assert [h["max_price"] for h in store.history("A")] == [130, 130, 105]
+
+
+def test_evicts_products_not_seen_within_window():
+    store = OpportunityStore(window=60)
+    store.update("A", 100, 130, 0.0, opportunity("A", {"x": 100, "y": 130}))
+    store.update("B", 100, 130, 50.0, opportunity("B", {"x": 100, "y": 130}))
+    assert store.evict(now=100.0) == 1
+    assert [o["product"] for o in store.all()] == ["B"]
+    assert store.history("A") == []
+    assert store.changed_since(60.0) == ([], ["A"])
+
+
+def test_price_history_is_a_bounded_ring():
+    history = PriceHistory(capacity=3)
+    for i in range(5):
+        history.append(float(i), 100.0 + i, 200.0 + i)
+    assert len(history) == 3
+    assert [h["timestamp"] for h in history.items()] == [2.0, 3.0, 4.0]
+
+
+def test_changes_route_returns_deltas(monkeypatch):
+    import main
+
+    store = OpportunityStore()
+    monkeypatch.setattr(main, "opportunity_store", store)
+    store.update("A", 100, 130, 10.0, opportunity("A", {"x": 100, "y": 130}))
+    client = TestClient(main.app)
+    assert [o["product"] for o in client.get("/changes?since=5").json()["opportunities"]] == ["A"]
+    assert client.get("/changes?since=10").json()["opportunities"] == []
@@ -0,0 +1,107 @@
+from page_fetcher import PageCache, PageFetcher, looks_js_rendered
+
+STATIC_HTML = "<html><body><h1>iPhone 15</h1><p>" + "Descrição do produto " * 20 + "</p><span class='price'>R$ 4.299,90</span></body></html>"
+SPA_HTML = '<html><body><div id="root"></div><script src="/app.js"></script></body></html>'
+
+
+class FakeResponse:
+    def __init__(self, status_code, text="", headers=None):
+        self.status_code = status_code
+        self.text = text
+        self.headers = headers or {}
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise RuntimeError(self.status_code)
+
+
+class FakeSession:
+    def __init__(self, pages):
+        self.pages = pages
+        self.calls = []
+
+    def get(self, url, headers=None, timeout=None):
+        self.calls.append(headers or {})
+        text, etag = self.pages[url]
+        if headers and headers.get("If-None-Match") == etag:
+            return FakeResponse(304)
+        return FakeResponse(200, text, {"ETag": etag, "Last-Modified": "Wed, 01 Jan 2025 00:00:00 GMT"})
+
+
+class FakeDriver:
+    page_source = "<html><body>renderizado</body></html>"
+
+    def __init__(self):
+        self.visited = []
+
+    def get(self, url):
+        self.visited.append(url)
+
+
+class FakePool:
+    def __init__(self):
+        self.instance = FakeDriver()
+
+    def driver(self):
+        pool = self
+
+        class Ctx:
+            def __enter__(self):
+                return pool.instance
+
+            def __exit__(self, *exc):
+                return False
+
+        return Ctx()
+
+
+def test_heuristic_detects_js_pages():
+    assert not looks_js_rendered(STATIC_HTML)
+    assert looks_js_rendered(SPA_HTML)
+    assert looks_js_rendered("<noscript>Please enable JavaScript</noscript>" + STATIC_HTML)
+
+
+def test_static_page_uses_http_and_revalidates_with_304(tmp_path):
+    session = FakeSession({"http://loja/p": (STATIC_HTML, '"v1"')})
+    pool = FakePool()
+    fetcher = PageFetcher(pool, cache=PageCache(str(tmp_path)), session=session)
+
+    first = fetcher.fetch("http://loja/p")
+    second = fetcher.fetch("http://loja/p")
+    assert first.source == "http" and second.source == "cache"
+    assert second.html == STATIC_HTML
+    assert session.calls[1]["If-None-Match"] == '"v1"'
+    assert "If-Modified-Since" in session.calls[1]
+    assert pool.instance.visited == []
+
+
+def test_js_pages_are_rendered_once_and_served_from_cache(tmp_path):
+    session = FakeSession({
+        "http://spa/p": (SPA_HTML, '"a"'),
+        "https://m.marcada.com/p": (STATIC_HTML, '"b"'),
+    })
+    pool = FakePool()
+    fetcher = PageFetcher(pool, cache=PageCache(str(tmp_path)), session=session, js_domains=["marcada.com"])
+
+    page = fetcher.fetch("http://spa/p")
+    assert page.source == "browser" and page.html == FakeDriver.page_source
+    assert fetcher.fetch("http://spa/p").html == FakeDriver.page_source
+    assert fetcher.fetch("https://m.marcada.com/p").source == "browser"
+    assert pool.instance.visited == ["http://spa/p", "https://m.marcada.com/p"]
+    assert fetcher.stats == {"http": 0, "cache": 1, "browser": 2}
+
+
+def test_rendered_pages_expire_instead_of_revalidating_the_shell(tmp_path):
+    session = FakeSession({"http://spa/p": (SPA_HTML, '"a"')})
+    pool = FakePool()
+    fetcher = PageFetcher(pool, cache=PageCache(str(tmp_path)), session=session, render_ttl=0)
+
+    fetcher.fetch("http://spa/p")
+    FakeDriver.page_source = "<html><body>preço novo</body></html>"
+    try:
+        page = fetcher.fetch("http://spa/p")
+    finally:
+        FakeDriver.page_source = "<html><body>renderizado</body></html>"
+    assert page.source == "browser" and "preço novo" in page.html
+    assert session.calls[1] == {}
+    assert pool.instance.visited == ["http://spa/p", "http://spa/p"]
@@ -0,0 +1,92 @@
+import calendar
+
+import numpy as np
+
+from price_history import PriceHistoryStore
+
+JAN = calendar.timegm((2025, 1, 10, 0, 0, 0))
+FEB = calendar.timegm((2025, 2, 10, 0, 0, 0))
+MAR = calendar.timegm((2025, 3, 10, 0, 0, 0))
+
+
+def fill(store):
+    for day, base in ((JAN, 100.0), (FEB, 110.0), (MAR, 120.0)):
+        for hour in range(3):
+            store.append_prices({
+                "iPhone 15": {"Amazon": base + hour, "Mercado Livre": base - 5},
+                "PlayStation 5": {"Amazon": 3000.0 + hour},
+            }, day + hour * 3600)
+        store.flush()
+
+
+def test_scan_prunes_partitions_and_filters_product_and_time(tmp_path):
+    store = PriceHistoryStore(str(tmp_path), buckets=8)
+    fill(store)
+    assert len(store.manifest["parts"]) >= 3
+
+    parts = store.partitions_for("iPhone 15", FEB, FEB + 86400)
+    assert {p["month"] for p in parts} == {"2025-02"}
+    assert len(parts) == 1
+
+    data = store.scan("iPhone 15", FEB, FEB + 3600)
+    assert data["timestamp"].tolist() == [FEB, FEB, FEB + 3600, FEB + 3600]
+    assert sorted(data["price"].tolist()) == [105.0, 105.0, 110.0, 111.0]
+    assert len(store.scan("PlayStation 5")["price"]) == 9
+    assert len(store.scan("Inexistente")["price"]) == 0
+
+
+def test_reopens_from_manifest_and_compacts(tmp_path):
+    store = PriceHistoryStore(str(tmp_path), buckets=1)
+    for i in range(4):
+        store.append("iPhone 15", "Amazon", 100.0 + i, JAN + i)
+        store.flush()
+    before = store.history("iPhone 15")
+
+    reopened = PriceHistoryStore(str(tmp_path), buckets=1)
+    assert reopened.history("iPhone 15") == before
+    assert reopened.compact(min_parts=2) == 4
+    assert len(reopened.manifest["parts"]) == 1
+    assert PriceHistoryStore(str(tmp_path), buckets=1).history("iPhone 15") == before
+    assert [h["price"] for h in before] == [100.0, 101.0, 102.0, 103.0]
+    part_dirs = list((tmp_path / "month=2025-01" / "bucket=00").iterdir())
+    assert len(part_dirs) == 1
+    assert np.load(part_dirs[0] / "price.npy").tolist() == [100.0, 101.0, 102.0, 103.0]
+
+
+def test_compaction_is_tiered_and_does_not_rewrite_big_parts_every_time(tmp_path):
+    store = PriceHistoryStore(str(tmp_path), buckets=1)
+    written = []
+    write_part = store._write_part
+
+    def counting_write_part(*args, **kwargs):
+        part = write_part(*args, **kwargs)
+        written.append(part["rows"])
+        return part
+
+    store._write_part = counting_write_part
+    for i in range(16):
+        store.append("iPhone 15", "Amazon", 100.0 + i, JAN + i)
+        store.flush()
+        store.compact(min_parts=4)
+    # 16 flushes de 1 linha; depois cada linha é reescrita uma vez no nível 1 e uma no nível 2
+    assert sum(written) == 16 * 3
+    assert [p["level"] for p in store.manifest["parts"]] == [2]
+    assert len(store.history("iPhone 15")) == 16
+
+
+def test_compaction_from_another_process_does_not_break_the_bot(tmp_path):
+    bot = PriceHistoryStore(str(tmp_path), buckets=1)
+    for day in range(4):
+        bot.append("iPhone 15", "Amazon", 5000.0 + day, JAN + day * 3600)
+        bot.flush()
+
+    cli = PriceHistoryStore(str(tmp_path), buckets=1)
+    assert cli.compact(min_parts=2, full=True) == 4
+
+    # o bot ainda tinha os 4 parts apagados na memória
+    assert len(bot.history("iPhone 15")) == 4
+    bot.append("iPhone 15", "Amazon", 4900.0, JAN + 5 * 3600)
+    bot.flush()
+    reloaded = PriceHistoryStore(str(tmp_path), buckets=1)
+    assert len(reloaded.manifest["parts"]) == 2
+    assert [row["price"] for row in reloaded.history("iPhone 15")] == [5000.0, 5001.0, 5002.0, 5003.0, 4900.0]
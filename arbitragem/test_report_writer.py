@@ -0,0 +1,58 @@
+import os
+import gzip
+import json
+
+import pytest
+
+from report_writer import ReportWriter, atomic_writer
+
+
+def opportunity(product, margin=25.0):
+    return {"product": product, "prices": {"Loja <A>": 100.0, "B": 125.0}, "min_price": 100.0,
+            "max_price": 125.0, "margin": margin, "timestamp": 1.0}
+
+
+def test_writes_valid_json_and_escaped_html(tmp_path):
+    writer = ReportWriter(str(tmp_path))
+    opportunities = [opportunity(f"Produto {i}") for i in range(3)] + [opportunity("<script>x</script>", 12.0)]
+    writer.write(opportunities, opportunities[:1], ["Antigo"], 10.0)
+
+    with open(writer.json_path, encoding="utf-8") as f:
+        report = json.load(f)
+    assert report["total_opportunities"] == 4
+    assert report["changed_since_last_report"] == 1
+    assert report["removed_since_last_report"] == ["Antigo"]
+    assert report["opportunities"][0] == opportunities[0]
+
+    with open(writer.html_path, encoding="utf-8") as f:
+        page = f.read()
+    assert "<script>x</script>" not in page and "&lt;script&gt;" in page
+    assert "Loja &lt;A&gt;: R$ 100.00" in page
+    assert "Total de oportunidades: 4" in page
+    assert sorted(os.listdir(tmp_path)) == ["arbitrage_report.html", "arbitrage_report.json"]
+
+
+def test_failed_write_keeps_previous_file(tmp_path):
+    path = str(tmp_path / "report.json")
+    with atomic_writer(path) as f:
+        f.write("versao 1")
+    with pytest.raises(RuntimeError):
+        with atomic_writer(path) as f:
+            f.write("pela metade")
+            raise RuntimeError("falha")
+    with open(path, encoding="utf-8") as f:
+        assert f.read() == "versao 1"
+    assert os.listdir(tmp_path) == ["report.json"]
+
+
+def test_gzip_ndjson_deltas_with_retention(tmp_path):
+    writer = ReportWriter(str(tmp_path), write_deltas=True, delta_retention=2)
+    assert writer.write([], [], [], 1.0) is None
+    for t in (2.0, 3.0, 4.0):
+        path = writer.write([opportunity("A")], [opportunity("A")], ["B"], t)
+
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        lines = [json.loads(line) for line in f]
+    assert lines[0]["type"] == "changed" and lines[0]["product"] == "A"
+    assert lines[1] == {"type": "removed", "product": "B"}
+    assert len(os.listdir(writer.delta_dir)) == 2
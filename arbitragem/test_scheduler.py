@@ -0,0 +1,47 @@
+from opportunity_store import OpportunityStore
+from scheduler import SCAN_QUEUE_DEPTH, SCAN_QUEUE_LAG, RescanScheduler, rescan_interval
+
+
+def test_volatile_products_and_recent_opportunities_are_scanned_sooner():
+    stable = rescan_interval(0.0, None, now=100.0, min_interval=60, max_interval=1800)
+    volatile = rescan_interval(0.03, None, now=100.0, min_interval=60, max_interval=1800)
+    opportunity = rescan_interval(0.0, {"updated_at": 90.0, "net_margin": 10.0}, now=100.0,
+                                  min_interval=60, max_interval=1800)
+    big_margin = rescan_interval(0.0, {"updated_at": 90.0, "net_margin": 50.0}, now=100.0,
+                                 min_interval=60, max_interval=1800)
+    assert stable == 1800
+    assert volatile == 450
+    assert big_margin < opportunity < stable
+    assert rescan_interval(10.0, None, now=100.0, min_interval=60, max_interval=1800) == 60
+
+
+def test_pops_due_products_in_order_within_budget():
+    scheduler = RescanScheduler(["A", "B"], budget=3)
+    for i, product in enumerate(["p1", "p2", "p3", "p4", "p5"]):
+        scheduler.schedule(product, 10.0 + i)
+    scheduler.schedule("p1", 500.0)  # reagendado: a entrada antiga é ignorada
+
+    assert scheduler.pop_due(now=100.0) == ["p2", "p3", "p4"]
+    assert SCAN_QUEUE_DEPTH._value.get() == 1
+    assert SCAN_QUEUE_LAG._value.get() == 86.0
+    # orçamento esgotado: p5 continua vencido na fila
+    assert scheduler.pop_due(now=100.0) == []
+    assert len(scheduler) == 2
+
+
+def test_bot_reschedules_scanned_products_by_volatility(tmp_path):
+    from fetcher import PriceFetchEngine
+    from main import SuperBotArbitragem
+    from test_fetcher import FakeAdapter
+
+    bot = SuperBotArbitragem(store=OpportunityStore(), output_dir=str(tmp_path), cache_dir=str(tmp_path / "pages"))
+    bot.fetch_engine = PriceFetchEngine([FakeAdapter("A", 100), FakeAdapter("B", 105)])
+    bot.scheduler = RescanScheduler(["A", "B"], min_interval=60, max_interval=1800)
+    bot.scheduler.add(bot.products, now=0.0)
+    batch = bot.scheduler.pop_due(now=1.0)
+    assert batch == bot.products
+
+    bot._analyze_arbitrage(batch)
+    assert len(bot.scheduler) == len(bot.products)
+    assert bot.scheduler.pop_due() == []
+    assert 1700 < bot.scheduler.seconds_until_next() <= 1800
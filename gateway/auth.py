@@ -0,0 +1,182 @@
+import os
+import time
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional, Tuple
+
+import jwt
+from fastapi import HTTPException, Request
+
+from redis_client import RedisLink
+
+logger = logging.getLogger(__name__)
+
+DENYLIST_PREFIX = "gateway:jwt:denylist"
+REVOCATION_CHANNEL = "gateway:jwt:revoked"
+
+
+class TokenVerifier:
+    """Valida assinatura, expiração e tipo do token e devolve as claims"""
+
+    def __init__(self, key, algorithms: Iterable[str]):
+        self.key = key
+        self.algorithms = list(algorithms)
+
+    def verify(self, token: str) -> dict:
+        claims = jwt.decode(token, self.key, algorithms=self.algorithms)
+        if claims.get("type", "access") != "access":
+            raise jwt.InvalidTokenError("Apenas tokens de acesso são aceitos")
+        return claims
+
+
+def load_verifier() -> Tuple[TokenVerifier, dict]:
+    """Monta o verificador a partir do ambiente, lendo as chaves uma única vez.
+
+    Com GATEWAY_JWT_PUBLIC_KEY_FILE usa chaves assimétricas (RS256 por padrão;
+    exige o pacote cryptography); sem ele usa HS256 com GATEWAY_SECRET.
+    Devolve também a configuração equivalente para o fastapi_jwt_auth.
+    """
+    public_key_file = os.getenv("GATEWAY_JWT_PUBLIC_KEY_FILE")
+    if public_key_file:
+        algorithm = os.getenv("GATEWAY_JWT_ALGORITHM", "RS256")
+        with open(public_key_file) as f:
+            public_key = f.read()
+        settings = {"authjwt_algorithm": algorithm, "authjwt_public_key": public_key}
+        private_key_file = os.getenv("GATEWAY_JWT_PRIVATE_KEY_FILE")
+        if private_key_file:
+            with open(private_key_file) as f:
+                settings["authjwt_private_key"] = f.read()
+        logger.info(f"Verificação JWT com chave pública ({algorithm})")
+        return TokenVerifier(public_key, [algorithm]), settings
+
+    secret = os.getenv("GATEWAY_SECRET", "supersecret")
+    return TokenVerifier(secret, ["HS256"]), {"authjwt_secret_key": secret}
+
+
+class VerifiedTokenCache:
+    """LRU de tokens já verificados, chaveado pelo digest do token.
+
+    Cada entrada vale até o `exp` do próprio token, então um acerto nunca
+    aceita um token expirado.
+    """
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[bytes, dict]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def digest(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, digest: bytes) -> Optional[dict]:
+        with self._lock:
+            claims = self._entries.get(digest)
+            if claims is None:
+                return None
+            if claims.get("exp", float("inf")) <= time.time():
+                del self._entries[digest]
+                return None
+            self._entries.move_to_end(digest)
+            return claims
+
+    def set(self, digest: bytes, claims: dict):
+        with self._lock:
+            self._entries[digest] = claims
+            self._entries.move_to_end(digest)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def drop_jti(self, jti: str):
+        with self._lock:
+            for digest in [d for d, c in self._entries.items() if c.get("jti") == jti]:
+                del self._entries[digest]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class JWTGuard:
+    """Autenticação das rotas protegidas com cache de verificação e denylist.
+
+    Primeira vez que um token aparece: verificação criptográfica completa e
+    consulta da denylist no Redis. Depois disso: só o cache local e o espelho
+    local da denylist, mantido pelo canal de revogação via pub/sub. Ao
+    (re)conectar no canal o cache é limpo, para não confiar em revogações
+    perdidas enquanto a assinatura esteve fora.
+    """
+
+    def __init__(self, verifier: TokenVerifier, redis_link: RedisLink, max_entries: int = 10000):
+        self.verifier = verifier
+        self.redis = redis_link
+        self.cache = VerifiedTokenCache(max_entries)
+        # Escrito pela thread do pub/sub e pelas threads de request
+        self._revoked: Dict[str, float] = {}
+        self._revoked_lock = threading.Lock()
+
+    def authenticate(self, token: str) -> dict:
+        digest = self.cache.digest(token)
+        claims = self.cache.get(digest)
+        if claims is not None:
+            if self._is_revoked_locally(claims.get("jti")):
+                raise HTTPException(status_code=401, detail="Token revogado")
+            return claims
+
+        try:
+            claims = self.verifier.verify(token)
+        except jwt.ExpiredSignatureError:
+            raise HTTPException(status_code=401, detail="Token expirado")
+        except jwt.InvalidTokenError as e:
+            raise HTTPException(status_code=401, detail=f"Token inválido: {e}")
+
+        jti = claims.get("jti")
+        if jti and (self._is_revoked_locally(jti) or self.redis.call(
+                lambda r: r.exists(f"{DENYLIST_PREFIX}:{jti}"), default=0)):
+            self._mark_revoked(jti, claims.get("exp", time.time()))
+            raise HTTPException(status_code=401, detail="Token revogado")
+
+        self.cache.set(digest, claims)
+        return claims
+
+    def required(self, request: Request) -> dict:
+        """Dependência FastAPI: exige `Authorization: Bearer <token>` e devolve as claims"""
+        header = request.headers.get("authorization", "")
+        scheme, _, token = header.partition(" ")
+        if scheme.lower() != "bearer" or not token:
+            raise HTTPException(status_code=401, detail="Cabeçalho Authorization ausente ou inválido")
+        return self.authenticate(token.strip())
+
+    def revoke(self, claims: dict):
+        """Adiciona o jti do token à denylist (local, Redis e demais instâncias)"""
+        jti = claims.get("jti")
+        if not jti:
+            return
+        exp = claims.get("exp", time.time() + 3600)
+        self._mark_revoked(jti, exp)
+        ttl = max(1, int(exp - time.time()))
+        self.redis.call(lambda r: r.setex(f"{DENYLIST_PREFIX}:{jti}", ttl, 1))
+        self.redis.call(lambda r: r.publish(REVOCATION_CHANNEL, f"{jti}:{exp}"))
+
+    def listen(self):
+        return self.redis.subscribe(REVOCATION_CHANNEL, self._on_message, on_connect=self.cache.clear)
+
+    def _on_message(self, data: bytes):
+        jti, exp = data.decode().rsplit(":", 1)
+        self._mark_revoked(jti, float(exp))
+
+    def _mark_revoked(self, jti: str, exp: float):
+        now = time.time()
+        with self._revoked_lock:
+            for old in [j for j, e in self._revoked.items() if e <= now]:
+                del self._revoked[old]
+            self._revoked[jti] = exp
+        self.cache.drop_jti(jti)
+
+    def _is_revoked_locally(self, jti: Optional[str]) -> bool:
+        if jti is None:
+            return False
+        with self._revoked_lock:
+            return jti in self._revoked
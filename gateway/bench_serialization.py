@@ -0,0 +1,107 @@
+"""Micro-benchmark das rotas de listagem do gateway: antes x depois.
+
+"antes" reproduz as rotas originais (instancia os modelos Pydantic, valida de
+novo via response_model e serializa com o encoder JSON padrão). "depois" usa
+as rotas atuais, com o cache forçado a miss (mede a serialização) e com
+cache quente (caso de dashboards fazendo polling).
+
+Uso: python bench_serialization.py [--records 1000] [--seconds 2] [--output resultado.json]
+"""
+import json
+import time
+import argparse
+from typing import List
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import main
+from index import IndexedCollection
+from main import ArbitrageOpportunity, Article, Coupon, DropshippingOrder
+
+
+def make_datasets(n):
+    return {
+        "dropshipping": [
+            {"product": f"Produto {i}", "quantity": i % 5 + 1, "price": 100.0 + i, "status": "processing"}
+            for i in range(n)
+        ],
+        "afiliados": [
+            {"code": f"CUPOM{i}", "description": "Desconto 10%", "site": "amazon.com",
+             "expiry": "2025-12-31", "category": "Eletrônicos"}
+            for i in range(n)
+        ],
+        "arbitragem": [
+            {"product": f"Produto {i}", "prices": {"Amazon": 4500.0 + i, "Mercado Livre": 4200.0, "Americanas": 4800.0},
+             "min_price": 4200.0, "max_price": 4800.0 + i, "margin": 14.29}
+            for i in range(n)
+        ],
+        "conteudo": [
+            {"topic": f"Tópico {i}", "content": "Artigo gerado..." * 10, "formats": ["markdown", "pdf", "epub"]}
+            for i in range(n)
+        ],
+    }
+
+
+ROUTES = {
+    "dropshipping": ("/dropshipping/orders", DropshippingOrder, "dropshipping_orders"),
+    "afiliados": ("/afiliados/coupons", Coupon, "coupons_data"),
+    "arbitragem": ("/arbitragem/opportunities", ArbitrageOpportunity, "arbitrage_opportunities"),
+    "conteudo": ("/conteudo/articles", Article, "articles_data"),
+}
+
+
+def legacy_app(datasets):
+    """Rotas como eram antes: modelos construídos na rota + response_model"""
+    app = FastAPI()
+    for namespace, (path, model, _) in ROUTES.items():
+        def route(model=model, data=datasets[namespace]):
+            return [model(**record) for record in data]
+        app.add_api_route(path, route, response_model=List[model])
+    return app
+
+
+def requests_per_second(client, path, seconds, before_each=None):
+    count, started = 0, time.perf_counter()
+    while time.perf_counter() - started < seconds:
+        if before_each is not None:
+            before_each()
+        assert client.get(path).status_code == 200
+        count += 1
+    return count / (time.perf_counter() - started)
+
+
+def run(records, seconds):
+    datasets = make_datasets(records)
+    for namespace, (_, _, attr) in ROUTES.items():
+        setattr(main, attr, IndexedCollection(datasets[namespace]))
+
+    legacy = TestClient(legacy_app(datasets))
+    current = TestClient(main.app)
+    results = {}
+    for namespace, (path, _, _) in ROUTES.items():
+        query = f"{path}?limit={records}"
+        results[path] = {
+            "antes": requests_per_second(legacy, path, seconds),
+            "depois_sem_cache": requests_per_second(
+                current, query, seconds, lambda ns=namespace: main.response_cache.invalidate(ns)
+            ),
+            "depois_cache_quente": requests_per_second(current, query, seconds),
+        }
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--records", type=int, default=1000)
+    parser.add_argument("--seconds", type=float, default=2.0)
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    results = run(min(args.records, main.MAX_PAGE_SIZE), args.seconds)
+    print(f"{'rota':32} {'antes':>10} {'sem cache':>10} {'cache':>10}  (req/s, {args.records} registros)")
+    for path, r in results.items():
+        print(f"{path:32} {r['antes']:10.0f} {r['depois_sem_cache']:10.0f} {r['depois_cache_quente']:10.0f}")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"records": args.records, "results": results}, f, indent=2)
@@ -0,0 +1,204 @@
+import time
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Optional
+
+from fastapi import Request, Response
+
+from redis_client import RedisLink
+from serializers import dumps
+from metrics import CACHE_REQUESTS
+
+logger = logging.getLogger(__name__)
+
+# TTL (segundos) por namespace: acompanha o ciclo de cada bot
+CACHE_TTLS = {
+    "trading": 60,
+    "dropshipping": 60,
+    "arbitragem": 1800,
+    "afiliados": 60,
+    "conteudo": 60,
+}
+DEFAULT_TTL = 60
+
+INVALIDATION_CHANNEL = "gateway:cache:invalidate"
+REDIS_PREFIX = "gateway:cache"
+
+
+class CacheEntry:
+    __slots__ = ("body", "etag", "expires_at")
+
+    def __init__(self, body: bytes, etag: str, expires_at: float):
+        self.body = body
+        self.etag = etag
+        self.expires_at = expires_at
+
+
+class LRUCache:
+    """Cache LRU em processo com expiração por entrada"""
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.expires_at <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key: str, entry: CacheEntry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def drop_prefix(self, prefix: str):
+        with self._lock:
+            for key in [k for k in self._entries if k.startswith(prefix)]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def make_etag(body: bytes) -> str:
+    return '"%s"' % hashlib.blake2b(body, digest_size=16).hexdigest()
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    # Comparação fraca (RFC 7232): ignora o prefixo W/
+    return "*" in candidates or etag in [c[2:] if c.startswith("W/") else c for c in candidates]
+
+
+def serialize(payload) -> bytes:
+    """Corpo JSON da resposta; bytes já serializados passam direto"""
+    return payload if isinstance(payload, bytes) else dumps(payload)
+
+
+def conditional_response(request: Request, body: bytes, etag: Optional[str] = None,
+                         headers: Optional[Dict[str, str]] = None) -> Response:
+    """Resposta JSON com ETag; devolve 304 se o cliente já tiver essa versão"""
+    etag = etag or make_etag(body)
+    headers = dict(headers or {}, **{"ETag": etag, "Cache-Control": "no-cache"})
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
+
+
+class ResponseCache:
+    """Cache de respostas em dois níveis: LRU local + Redis compartilhado.
+
+    As chaves incluem a geração do namespace; publicar um novo ciclo incrementa
+    a geração no Redis e avisa as demais instâncias via pub/sub, o que invalida
+    as entradas antigas sem precisar varrer o Redis.
+    """
+
+    def __init__(self, redis_link: RedisLink, ttls: Optional[Dict[str, int]] = None,
+                 max_entries: int = 1024):
+        self.redis = redis_link
+        self.ttls = dict(CACHE_TTLS if ttls is None else ttls)
+        self.local = LRUCache(max_entries)
+        self._generations: Dict[str, int] = {}
+
+    def generation(self, namespace: str) -> int:
+        gen = self._generations.get(namespace)
+        if gen is None:
+            value = self.redis.call(lambda r: r.get(f"{REDIS_PREFIX}:gen:{namespace}"))
+            gen = int(value) if value is not None else 0
+            if self.redis.available:
+                self._generations[namespace] = gen
+        return gen
+
+    def key_for(self, namespace: str, request: Request) -> str:
+        query = "&".join(f"{k}={v}" for k, v in sorted(request.query_params.multi_items()))
+        return f"{namespace}:{self.generation(namespace)}:{request.url.path}?{query}"
+
+    def get_remote(self, key: str) -> Optional[CacheEntry]:
+        """Busca no Redis e promove a entrada para o LRU local"""
+        raw = self.redis.call(lambda r: r.get(self._redis_key(key)))
+        if raw is None:
+            return None
+        header, etag, body = raw.split(b"\n", 2)
+        entry = CacheEntry(body, etag.decode(), float(header))
+        if entry.expires_at <= time.time():
+            return None
+        self.local.set(key, entry)
+        return entry
+
+    def put(self, namespace: str, key: str, body: bytes) -> CacheEntry:
+        ttl = self.ttls.get(namespace, DEFAULT_TTL)
+        entry = CacheEntry(body, make_etag(body), time.time() + ttl)
+        self.local.set(key, entry)
+        value = f"{entry.expires_at}\n{entry.etag}\n".encode() + body
+        self.redis.call(lambda r: r.setex(self._redis_key(key), ttl, value))
+        return entry
+
+    def respond(self, request: Request, namespace: str, build: Callable[[], object],
+                headers: Optional[Dict[str, str]] = None) -> Response:
+        """Devolve a resposta em cache (ou 304) e só chama build() em caso de miss.
+
+        build() pode devolver o payload ou o corpo JSON já serializado (bytes).
+        """
+        key = self.key_for(namespace, request)
+        entry, result = self.local.get(key), "local"
+        if entry is None:
+            entry, result = self.get_remote(key), "redis"
+        if entry is None:
+            entry, result = self.put(namespace, key, serialize(build())), "miss"
+        CACHE_REQUESTS.labels(namespace, result).inc()
+        status = "MISS" if result == "miss" else "HIT"
+
+        return conditional_response(request, entry.body, entry.etag, dict(headers or {}, **{"X-Cache": status}))
+
+    def invalidate(self, *namespaces: str):
+        """Descarta as entradas dos namespaces nesta e nas demais instâncias"""
+        for namespace in namespaces:
+            gen = self.redis.call(lambda r: r.incr(f"{REDIS_PREFIX}:gen:{namespace}"))
+            self._apply_generation(namespace, gen)
+            if gen is not None:
+                self.redis.call(lambda r: r.publish(INVALIDATION_CHANNEL, f"{namespace}:{gen}"))
+
+    def listen(self):
+        """Assina o canal de invalidação publicado pelas outras instâncias"""
+        return self.redis.subscribe(INVALIDATION_CHANNEL, self._on_message, on_connect=self._on_connect)
+
+    def _on_connect(self):
+        # Invalidações publicadas enquanto a assinatura esteve fora se perderam: descarta o
+        # LRU local e relê as gerações do Redis na próxima requisição
+        self._generations.clear()
+        self.local.clear()
+
+    def _on_message(self, data: bytes):
+        namespace, gen = data.decode().rsplit(":", 1)
+        self._apply_generation(namespace, int(gen))
+
+    def _apply_generation(self, namespace: str, gen: Optional[int]):
+        if gen is None:
+            # Sem Redis: avança a geração local para não servir dados antigos
+            gen = self._generations.get(namespace, 0) + 1
+        if gen >= self._generations.get(namespace, 0):
+            self._generations[namespace] = gen
+        self.local.drop_prefix(f"{namespace}:")
+        logger.info(f"Cache do namespace {namespace} invalidado (geração {gen})")
+
+    @staticmethod
+    def _redis_key(key: str) -> str:
+        namespace = key.split(":", 1)[0]
+        return f"{REDIS_PREFIX}:{namespace}:{hashlib.sha1(key.encode()).hexdigest()}"
@@ -0,0 +1,116 @@
+import threading
+from collections import defaultdict
+from typing import Dict, Iterable, Iterator, List, Optional, Set
+
+
+def normalize(text: str) -> str:
+    """Normalização usada por todos os índices (mesma regra das buscas originais)"""
+    return text.lower()
+
+
+class HashIndex:
+    """Índice exato por valor normalizado de um campo (ex.: categoria)"""
+
+    def __init__(self, field: str):
+        self.field = field
+        self._buckets: Dict[str, List[int]] = defaultdict(list)
+
+    def add(self, record_id: int, record: dict):
+        self._buckets[normalize(record[self.field])].append(record_id)
+
+    def lookup(self, value: str) -> List[int]:
+        return list(self._buckets.get(normalize(value), ()))
+
+
+class NGramIndex:
+    """Índice invertido de n-gramas para busca por substring.
+
+    Guarda os gramas de tamanho 1..n de cada valor. Consultas menores que n
+    são respondidas direto pela lista do grama; as demais cruzam as listas dos
+    n-gramas da consulta e confirmam a substring só nos candidatos.
+    """
+
+    def __init__(self, field: str, n: int = 3):
+        self.field = field
+        self.n = n
+        self._postings: Dict[str, Set[int]] = defaultdict(set)
+        self._values: Dict[int, str] = {}
+
+    def _grams(self, text: str, size: int) -> Set[str]:
+        return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+    def add(self, record_id: int, record: dict):
+        value = normalize(record[self.field])
+        self._values[record_id] = value
+        for size in range(1, self.n + 1):
+            for gram in self._grams(value, size):
+                self._postings[gram].add(record_id)
+
+    def search(self, query: str) -> List[int]:
+        query = normalize(query)
+        if not query:
+            return sorted(self._values)
+        if len(query) <= self.n:
+            return sorted(self._postings.get(query, ()))
+
+        postings = sorted((self._postings.get(gram, set()) for gram in self._grams(query, self.n)), key=len)
+        candidates = set(postings[0])
+        for posting in postings[1:]:
+            if not candidates:
+                break
+            candidates &= posting
+        return sorted(i for i in candidates if query in self._values[i])
+
+
+class IndexedCollection:
+    """Lista de registros com índices atualizados a cada inserção"""
+
+    def __init__(self, records: Iterable[dict] = (), hash_fields: Iterable[str] = (),
+                 text_fields: Iterable[str] = ()):
+        self._records: List[dict] = []
+        self._lock = threading.RLock()
+        self.hash_indexes = {field: HashIndex(field) for field in hash_fields}
+        self.text_indexes = {field: NGramIndex(field) for field in text_fields}
+        self.extend(records)
+
+    def append(self, record: dict):
+        with self._lock:
+            record_id = len(self._records)
+            self._records.append(record)
+            for index in self.hash_indexes.values():
+                index.add(record_id, record)
+            for index in self.text_indexes.values():
+                index.add(record_id, record)
+
+    def extend(self, records: Iterable[dict]):
+        for record in records:
+            self.append(record)
+
+    def find(self, field: str, value: str) -> List[dict]:
+        """Registros cujo campo é igual ao valor (sem diferenciar maiúsculas)"""
+        with self._lock:
+            return [self._records[i] for i in self.hash_indexes[field].lookup(value)]
+
+    def search(self, field: str, query: str) -> List[dict]:
+        """Registros cujo campo contém a consulta (sem diferenciar maiúsculas)"""
+        with self._lock:
+            return [self._records[i] for i in self.text_indexes[field].search(query)]
+
+    def slice(self, start: int, end: int) -> List[dict]:
+        """Registros com id em [start, end)"""
+        return self._records[start:end]
+
+    def iter_from(self, start: int = 0, stop: Optional[int] = None) -> Iterator[dict]:
+        """Percorre os registros a partir de um id sem copiar a lista"""
+        end = len(self._records) if stop is None else min(stop, len(self._records))
+        for record_id in range(start, end):
+            yield self._records[record_id]
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def __iter__(self) -> Iterator[dict]:
+        return iter(self._records)
+
+    def __getitem__(self, item):
+        return self._records[item]
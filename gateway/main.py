@@ -1,17 +1,26 @@
 import os
-from fastapi import FastAPI, HTTPException, Depends, Request
+from fastapi import FastAPI, HTTPException, Depends, Request, Query
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse, Response
 from pydantic import BaseModel
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 import time
 import logging
 from dotenv import load_dotenv
 from fastapi_jwt_auth import AuthJWT
 from fastapi_jwt_auth.exceptions import AuthJWTException
-from slowapi import Limiter, _rate_limit_exceeded_handler
-from slowapi.util import get_remote_address
-from slowapi.errors import RateLimitExceeded
 import redis
+from proxy import UpstreamPool, UPSTREAMS
+from redis_client import RedisLink
+from cache import ResponseCache, CACHE_TTLS, conditional_response, serialize
+from ratelimit import HybridLimiter
+from auth import JWTGuard, load_verifier
+from metrics import instrument
+from status import StatusAggregator
+from orders import OrderQueueFull, create_order_writer, validate_bulk
+from serializers import serializer_for
+from index import IndexedCollection
+from pagination import paginated_response, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
 
 # Carregar variáveis do .env
 load_dotenv()
@@ -20,13 +29,51 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="Super-Bot API Gateway", version="1.0.0")
+app = FastAPI(title="Super-Bot API Gateway", version="1.0.0", default_response_class=ORJSONResponse)
 
-# Configurar Redis para rate limiting
+# Instrumentação Prometheus (latência por rota, em andamento, cache, rate limit, upstream)
+instrument(app)
+
+# Configurar Redis para rate limiting e cache
 redis_url = os.getenv("REDIS_URL", "redis://localhost:6379/0")
-limiter = Limiter(key_func=get_remote_address, storage_uri=redis_url)
+redis_link = RedisLink(redis_url)
+
+# Rate limiting com baldes locais sincronizados em lote com o Redis
+limiter = HybridLimiter(redis_link)
 app.state.limiter = limiter
-app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
+
+# Cache de respostas das rotas de leitura (LRU local + Redis)
+response_cache = ResponseCache(redis_link)
+
+# Verificador JWT (chaves carregadas uma vez) com cache de tokens verificados
+jwt_verifier, jwt_settings = load_verifier()
+jwt_guard = JWTGuard(jwt_verifier, redis_link)
+
+# Persistência dos pedidos de dropshipping em lotes (write-behind no Postgres)
+order_writer = create_order_writer()
+
+@app.on_event("startup")
+def start_background_sync():
+    limiter.start()
+    response_cache.listen()
+    jwt_guard.listen()
+    if order_writer is not None:
+        order_writer.start()
+
+@app.on_event("shutdown")
+def stop_order_writer():
+    if order_writer is not None:
+        order_writer.stop()
+
+# Clientes HTTP compartilhados (um por serviço) para o proxy reverso
+upstreams = UpstreamPool(UPSTREAMS)
+
+# Status agregado: /health de todos os serviços em paralelo, com snapshot compartilhado
+status_aggregator = StatusAggregator(upstreams)
+
+@app.on_event("shutdown")
+async def close_upstreams():
+    await upstreams.aclose()
 
 # Configurar CORS
 # Em produção, troque allow_origins para os domínios confiáveis
@@ -40,11 +87,14 @@ app.add_middleware(
 
 # Configuração do JWT
 class Settings(BaseModel):
-    authjwt_secret_key: str = os.getenv("GATEWAY_SECRET", "supersecret")
+    authjwt_secret_key: Optional[str] = None
+    authjwt_algorithm: str = "HS256"
+    authjwt_public_key: Optional[str] = None
+    authjwt_private_key: Optional[str] = None
 
 @AuthJWT.load_config
 def get_config():
-    return Settings()
+    return Settings(**jwt_settings)
 
 # Tratamento de erro JWT
 @app.exception_handler(AuthJWTException)
@@ -83,6 +133,12 @@ class Article(BaseModel):
     content: str
     formats: List[str]
 
+# Serializadores pré-compilados das rotas de leitura (dados internos já validados)
+SERIALIZERS = {
+    model: serializer_for(model)
+    for model in (TradingStatus, DropshippingOrder, Coupon, ArbitrageOpportunity, Article)
+}
+
 class UserLogin(BaseModel):
     username: str
     password: str
@@ -99,17 +155,18 @@ trading_data = {
     "last_update": time.strftime("%Y-%m-%d %H:%M:%S")
 }
 
-dropshipping_orders = [
+dropshipping_orders = IndexedCollection([
     {"product": "iPhone 15", "quantity": 2, "price": 4500.00, "status": "processing"},
     {"product": "Samsung Galaxy", "quantity": 1, "price": 3200.00, "status": "shipped"}
-]
+])
 
-coupons_data = [
+# Coleções indexadas: categoria por hash, produto/tópico por n-gramas
+coupons_data = IndexedCollection([
     {"code": "SUPER10", "description": "Desconto 10%", "site": "amazon.com", "expiry": "2024-12-31", "category": "Eletrônicos"},
     {"code": "BOT20", "description": "Desconto 20%", "site": "mercadolivre.com", "expiry": "2024-11-30", "category": "Informática"}
-]
+], hash_fields=["category"])
 
-arbitrage_opportunities = [
+arbitrage_opportunities = IndexedCollection([
     {
         "product": "iPhone 15",
         "prices": {"Amazon": 4500, "Mercado Livre": 4200, "Americanas": 4800},
@@ -117,15 +174,15 @@ arbitrage_opportunities = [
         "max_price": 4800,
         "margin": 14.29
     }
-]
+], text_fields=["product"])
 
-articles_data = [
+articles_data = IndexedCollection([
     {
         "topic": "Como investir em criptomoedas",
         "content": "Artigo sobre criptomoedas...",
         "formats": ["markdown", "pdf", "epub"]
     }
-]
+], text_fields=["topic"])
 
 @app.get("/")
 def root():
@@ -139,7 +196,7 @@ def health_check():
 @app.get("/trading/status", response_model=TradingStatus)
 def get_trading_status():
     """Retorna status do bot de trading"""
-    return TradingStatus(**trading_data)
+    return Response(SERIALIZERS[TradingStatus].dump_one(trading_data), media_type="application/json")
 
 @app.get("/trading/trades")
 def get_trading_trades():
@@ -148,63 +205,122 @@ def get_trading_trades():
 
 # Dropshipping endpoints
 @app.get("/dropshipping/orders", response_model=List[DropshippingOrder])
-def get_dropshipping_orders():
+def get_dropshipping_orders(request: Request, limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+                            after: Optional[int] = Query(None, ge=0)):
     """Retorna pedidos de dropshipping"""
-    return [DropshippingOrder(**order) for order in dropshipping_orders]
+    return paginated_response(
+        request, dropshipping_orders, DropshippingOrder, response_cache, "dropshipping", limit, after
+    )
+
+def submit_orders(orders):
+    try:
+        order_writer.submit(orders)
+    except OrderQueueFull as e:
+        logger.warning(f"Fila de gravação de pedidos cheia: {e}")
+        raise HTTPException(status_code=503, detail="Fila de gravação de pedidos cheia, tente novamente")
 
 @app.post("/dropshipping/orders")
 def create_dropshipping_order(order: DropshippingOrder):
     """Cria novo pedido de dropshipping"""
+    if order_writer is not None:
+        submit_orders([order.dict()])
     dropshipping_orders.append(order.dict())
+    response_cache.invalidate("dropshipping")
     return {"message": "Pedido criado com sucesso", "order": order}
 
+@app.post("/dropshipping/orders/bulk")
+async def create_dropshipping_orders_bulk(request: Request):
+    """Importa pedidos em lote (array JSON ou NDJSON); inválidos são devolvidos com o índice"""
+    accepted, rejected = await validate_bulk(request, DropshippingOrder)
+    if not accepted and rejected:
+        raise HTTPException(status_code=422, detail={"accepted": 0, "rejected": rejected})
+    if order_writer is not None:
+        submit_orders(accepted)
+    dropshipping_orders.extend(accepted)
+    response_cache.invalidate("dropshipping")
+    return {"accepted": len(accepted), "rejected": rejected}
+
 # Afiliados endpoints
 @app.get("/afiliados/coupons", response_model=List[Coupon])
-def get_coupons():
+def get_coupons(request: Request, limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+                after: Optional[int] = Query(None, ge=0)):
     """Retorna cupons de afiliados"""
-    return [Coupon(**coupon) for coupon in coupons_data]
+    return paginated_response(request, coupons_data, Coupon, response_cache, "afiliados", limit, after)
+
+@app.post("/afiliados/coupons")
+def add_coupons(coupons: List[Coupon]):
+    """Recebe novos cupons do bot de afiliados"""
+    coupons_data.extend(coupon.dict() for coupon in coupons)
+    response_cache.invalidate("afiliados")
+    return {"message": "Cupons adicionados", "count": len(coupons)}
 
 @app.get("/afiliados/coupons/{category}")
 def get_coupons_by_category(category: str):
     """Retorna cupons por categoria"""
-    filtered_coupons = [c for c in coupons_data if c["category"].lower() == category.lower()]
+    filtered_coupons = coupons_data.find("category", category)
     return {"coupons": filtered_coupons, "category": category}
 
 # Arbitragem endpoints
 @app.get("/arbitragem/opportunities", response_model=List[ArbitrageOpportunity])
-def get_arbitrage_opportunities():
+def get_arbitrage_opportunities(request: Request, limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+                                after: Optional[int] = Query(None, ge=0)):
     """Retorna oportunidades de arbitragem"""
-    return [ArbitrageOpportunity(**opp) for opp in arbitrage_opportunities]
+    return paginated_response(
+        request, arbitrage_opportunities, ArbitrageOpportunity, response_cache, "arbitragem", limit, after
+    )
+
+@app.post("/arbitragem/opportunities")
+def add_arbitrage_opportunities(opportunities: List[ArbitrageOpportunity]):
+    """Recebe novas oportunidades do bot de arbitragem"""
+    arbitrage_opportunities.extend(opp.dict() for opp in opportunities)
+    response_cache.invalidate("arbitragem")
+    return {"message": "Oportunidades adicionadas", "count": len(opportunities)}
 
 @app.get("/arbitragem/opportunities/{product}")
 def get_arbitrage_by_product(product: str):
     """Retorna oportunidades para um produto específico"""
-    filtered_opps = [o for o in arbitrage_opportunities if product.lower() in o["product"].lower()]
+    filtered_opps = arbitrage_opportunities.search("product", product)
     return {"opportunities": filtered_opps, "product": product}
 
 # Conteúdo endpoints
 @app.get("/conteudo/articles", response_model=List[Article])
-def get_articles():
+def get_articles(request: Request, limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+                 after: Optional[int] = Query(None, ge=0)):
     """Retorna artigos gerados"""
-    return [Article(**article) for article in articles_data]
+    return paginated_response(request, articles_data, Article, response_cache, "conteudo", limit, after)
+
+@app.post("/conteudo/articles")
+def add_articles(articles: List[Article]):
+    """Recebe novos artigos do bot de conteúdo"""
+    articles_data.extend(article.dict() for article in articles)
+    response_cache.invalidate("conteudo")
+    return {"message": "Artigos adicionados", "count": len(articles)}
 
 @app.get("/conteudo/articles/{topic}")
 def get_article_by_topic(topic: str):
     """Retorna artigo por tópico"""
-    filtered_articles = [a for a in articles_data if topic.lower() in a["topic"].lower()]
+    filtered_articles = articles_data.search("topic", topic)
     return {"articles": filtered_articles, "topic": topic}
 
 # Sistema endpoints
 @app.get("/system/status")
-def get_system_status():
+async def get_system_status(request: Request):
     """Retorna status geral do sistema"""
-    return {
-        "trading": {"status": "active", "last_check": time.strftime("%Y-%m-%d %H:%M:%S")},
-        "dropshipping": {"status": "active", "orders_count": len(dropshipping_orders)},
-        "afiliados": {"status": "active", "coupons_count": len(coupons_data)},
-        "arbitragem": {"status": "active", "opportunities_count": len(arbitrage_opportunities)},
-        "conteudo": {"status": "active", "articles_count": len(articles_data)}
-    }
+    status = await status_aggregator.status({
+        "dropshipping": lambda: {"orders_count": len(dropshipping_orders)},
+        "afiliados": lambda: {"coupons_count": len(coupons_data)},
+        "arbitragem": lambda: {"opportunities_count": len(arbitrage_opportunities)},
+        "conteudo": lambda: {"articles_count": len(articles_data)},
+    })
+    return conditional_response(request, serialize(status))
+
+@app.post("/system/cycle/{namespace}")
+def publish_cycle(namespace: str):
+    """Chamado pelos bots ao publicar um novo ciclo: invalida o cache do módulo"""
+    if namespace not in CACHE_TTLS:
+        raise HTTPException(status_code=404, detail=f"Namespace desconhecido: {namespace}")
+    response_cache.invalidate(namespace)
+    return {"message": "Cache invalidado", "namespace": namespace}
 
 @app.get("/system/logs")
 def get_system_logs():
@@ -224,15 +340,26 @@ def login(user: UserLogin, Authorize: AuthJWT = Depends()):
         return {"access_token": access_token}
     raise HTTPException(status_code=401, detail="Usuário ou senha inválidos")
 
+@app.post("/logout")
+def logout(claims: dict = Depends(jwt_guard.required)):
+    """Revoga o token atual"""
+    jwt_guard.revoke(claims)
+    return {"message": "Token revogado"}
+
 # Exemplo de rota protegida
-from slowapi.decorator import limiter
 @app.get("/usuario/me", response_model=UserOut)
 @limiter.limit("10/minute")
-def get_me(Authorize: AuthJWT = Depends()):
-    Authorize.jwt_required()
-    current_user = Authorize.get_jwt_subject()
+def get_me(request: Request, claims: dict = Depends(jwt_guard.required)):
+    current_user = claims["sub"]
     return {"username": current_user, "email": f"{current_user}@superbot.com"}
 
+# Proxy reverso: rotas não tratadas acima são encaminhadas ao serviço correspondente.
+# Deve permanecer como última rota registrada.
+@app.api_route("/{service}/{path:path}", methods=["GET", "POST", "PUT", "PATCH", "DELETE", "HEAD", "OPTIONS"])
+async def proxy_to_service(service: str, path: str, request: Request):
+    """Encaminha a requisição ao microsserviço em streaming"""
+    return await upstreams.forward(service, request, path)
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=80) 
\ No newline at end of file
@@ -0,0 +1,48 @@
+from fastapi import FastAPI
+from prometheus_client import Counter, Histogram
+from prometheus_fastapi_instrumentator import Instrumentator, metrics
+
+# Buckets densos entre 1ms e 1s, onde fica o p99 das rotas do gateway
+LATENCY_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.0075, 0.01, 0.015, 0.02, 0.03, 0.05, 0.075,
+    0.1, 0.15, 0.2, 0.3, 0.5, 0.75, 1.0, 1.5, 2.5, 5.0, 10.0, float("inf"),
+)
+
+# Chamadas aos serviços podem chegar aos timeouts do proxy (até 10s por padrão)
+UPSTREAM_BUCKETS = (
+    0.0025, 0.005, 0.01, 0.02, 0.03, 0.05, 0.075, 0.1, 0.15, 0.2, 0.3,
+    0.5, 0.75, 1.0, 1.5, 2.0, 3.0, 5.0, 7.5, 10.0, 15.0, 30.0, float("inf"),
+)
+
+RATE_LIMIT_REJECTIONS = Counter(
+    "gateway_rate_limit_rejections_total",
+    "Requisições rejeitadas pelo rate limiter",
+    ["rule"],
+)
+
+CACHE_REQUESTS = Counter(
+    "gateway_cache_requests_total",
+    "Consultas ao cache de respostas por resultado (local, redis ou miss)",
+    ["namespace", "result"],
+)
+
+UPSTREAM_LATENCY = Histogram(
+    "gateway_upstream_request_duration_seconds",
+    "Tempo até os cabeçalhos da resposta do serviço de destino",
+    ["service", "outcome"],
+    buckets=UPSTREAM_BUCKETS,
+)
+
+
+def instrument(app: FastAPI):
+    """Histogramas por template de rota, requisições em andamento e /metrics"""
+    Instrumentator(
+        should_group_status_codes=False,
+        should_instrument_requests_inprogress=True,
+        inprogress_labels=True,
+        excluded_handlers=["/metrics"],
+    ).add(
+        metrics.latency(buckets=LATENCY_BUCKETS)
+    ).add(
+        metrics.requests()
+    ).instrument(app).expose(app, include_in_schema=False, should_gzip=True)
@@ -0,0 +1,174 @@
+import io
+import os
+import csv
+import json
+import logging
+import threading
+import time
+from typing import AsyncIterator, Callable, Iterable, List, Optional, Tuple, Type
+
+import psycopg2
+from fastapi import HTTPException, Request
+from pydantic import BaseModel, ValidationError
+
+from pagination import NDJSON_MEDIA_TYPE
+
+logger = logging.getLogger(__name__)
+
+MAX_BULK_ORDERS = int(os.getenv("GATEWAY_MAX_BULK_ORDERS", "50000"))
+
+ORDER_COLUMNS = ("product", "quantity", "price", "status")
+
+
+class OrderQueueFull(Exception):
+    """Buffer do write-behind cheio: o Postgres não está dando conta (ou está fora)"""
+
+
+async def iter_bulk_records(request: Request) -> AsyncIterator[object]:
+    """Lê um array JSON ou um stream NDJSON (um objeto por linha) do corpo"""
+    if NDJSON_MEDIA_TYPE in request.headers.get("content-type", ""):
+        pending = b""
+        async for chunk in request.stream():
+            pending += chunk
+            *lines, pending = pending.split(b"\n")
+            for line in lines:
+                if line.strip():
+                    yield json.loads(line)
+        if pending.strip():
+            yield json.loads(pending)
+        return
+
+    data = json.loads(await request.body())
+    if not isinstance(data, list):
+        raise HTTPException(status_code=422, detail="Esperado um array JSON ou NDJSON")
+    for item in data:
+        yield item
+
+
+async def validate_bulk(request: Request, model: Type[BaseModel]) -> Tuple[List[dict], List[dict]]:
+    """Valida todos os registros e separa aceitos e rejeitados (com o índice)"""
+    accepted, rejected = [], []
+    index = 0
+    try:
+        async for item in iter_bulk_records(request):
+            if index >= MAX_BULK_ORDERS:
+                raise HTTPException(status_code=413, detail=f"Máximo de {MAX_BULK_ORDERS} registros por lote")
+            try:
+                if not isinstance(item, dict):
+                    raise TypeError("registro deve ser um objeto")
+                accepted.append(model(**item).dict())
+            except (ValidationError, TypeError) as e:
+                errors = e.errors() if isinstance(e, ValidationError) else [{"msg": str(e)}]
+                rejected.append({"index": index, "errors": errors})
+            index += 1
+    except json.JSONDecodeError as e:
+        raise HTTPException(status_code=422, detail=f"JSON inválido no registro {index}: {e}")
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail=f"Corpo não é UTF-8 válido (registro {index})")
+    return accepted, rejected
+
+
+class OrderWriteBehind:
+    """Buffer write-behind para a tabela dropshipping_orders.
+
+    Os pedidos aceitos entram num buffer em memória e uma thread os grava em
+    lotes via COPY, uma transação por lote (a cada batch_size pedidos ou
+    flush_interval segundos). Se o Postgres falhar o lote volta ao buffer.
+    """
+
+    def __init__(self, connect: Callable[[], object], batch_size: int = 5000,
+                 flush_interval: float = 1.0, max_buffer: int = 500000):
+        self.connect = connect
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_buffer = max_buffer
+        self._buffer: List[tuple] = []
+        self._cond = threading.Condition()
+        self._conn = None
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+
+    def submit(self, orders: Iterable[dict]):
+        rows = [tuple(order[column] for column in ORDER_COLUMNS) for order in orders]
+        with self._cond:
+            if len(self._buffer) + len(rows) > self.max_buffer:
+                raise OrderQueueFull(f"{len(self._buffer)} pedidos aguardando gravação")
+            self._buffer.extend(rows)
+            if len(self._buffer) >= self.batch_size:
+                self._cond.notify()
+
+    def pending(self) -> int:
+        return len(self._buffer)
+
+    def flush(self) -> bool:
+        """Grava tudo o que está no buffer, em lotes de batch_size; False se o Postgres falhar"""
+        while True:
+            with self._cond:
+                batch = self._buffer[:self.batch_size]
+                del self._buffer[:self.batch_size]
+            if not batch:
+                return True
+            try:
+                self._copy(batch)
+            except Exception as e:
+                logger.error(f"Erro ao gravar {len(batch)} pedidos no Postgres: {e}")
+                self._reset_connection()
+                with self._cond:
+                    self._buffer[:0] = batch
+                return False
+
+    def _copy(self, rows: List[tuple]):
+        buf = io.StringIO()
+        csv.writer(buf).writerows(rows)
+        buf.seek(0)
+        if self._conn is None:
+            self._conn = self.connect()
+        with self._conn.cursor() as cur:
+            cur.copy_expert(
+                f"COPY dropshipping_orders ({', '.join(ORDER_COLUMNS)}) FROM STDIN WITH (FORMAT csv)", buf
+            )
+        self._conn.commit()
+
+    def _reset_connection(self):
+        try:
+            if self._conn is not None:
+                self._conn.close()
+        except Exception:
+            pass
+        self._conn = None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._running = True
+
+        def run():
+            while self._running:
+                with self._cond:
+                    if len(self._buffer) < self.batch_size:
+                        self._cond.wait(self.flush_interval)
+                if not self.flush():
+                    time.sleep(self.flush_interval)
+
+        self._thread = threading.Thread(target=run, name="orders-write-behind", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Para a thread e grava o que restou no buffer"""
+        self._running = False
+        with self._cond:
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        self.flush()
+        self._reset_connection()
+
+
+def create_order_writer() -> Optional[OrderWriteBehind]:
+    """Writer ligado ao DB_URL; sem DB_URL os pedidos ficam só em memória"""
+    db_url = os.getenv("DB_URL")
+    if not db_url:
+        logger.warning("DB_URL não configurada: pedidos de dropshipping não serão persistidos")
+        return None
+    return OrderWriteBehind(lambda: psycopg2.connect(db_url))
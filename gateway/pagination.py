@@ -0,0 +1,53 @@
+from typing import Iterable, Optional, Type
+
+from fastapi import Request, Response
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+
+from cache import ResponseCache
+from index import IndexedCollection
+from serializers import serializer_for
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+def wants_ndjson(request: Request) -> bool:
+    return NDJSON_MEDIA_TYPE in request.headers.get("accept", "")
+
+
+def page_headers(request: Request, end: int, limit: int, total: int) -> dict:
+    """Cabeçalhos com o cursor da próxima página (ausentes na última página)"""
+    if end >= total:
+        return {}
+    cursor = end - 1
+    next_url = request.url.include_query_params(after=cursor, limit=limit)
+    return {"X-Next-Cursor": str(cursor), "Link": f'<{next_url}>; rel="next"'}
+
+
+def stream_ndjson(records: Iterable[dict], model: Type[BaseModel]) -> StreamingResponse:
+    """Serializa um registro por linha conforme é lido, sem montar a lista inteira"""
+    return StreamingResponse(serializer_for(model).dump_lines(records), media_type=NDJSON_MEDIA_TYPE)
+
+
+def paginated_response(request: Request, collection: IndexedCollection, model: Type[BaseModel],
+                       cache: ResponseCache, namespace: str, limit: int,
+                       after: Optional[int]) -> Response:
+    """Lista paginada por cursor (id do último registro visto).
+
+    Com `Accept: application/x-ndjson` os registros a partir do cursor são
+    enviados em streaming; o limite só é aplicado se vier na query.
+    """
+    start = 0 if after is None else after + 1
+    if wants_ndjson(request):
+        stop = start + limit if "limit" in request.query_params else None
+        return stream_ndjson(collection.iter_from(start, stop), model)
+
+    total = len(collection)
+    end = min(start + limit, total)
+    return cache.respond(
+        request, namespace,
+        lambda: serializer_for(model).dump_many(collection.slice(start, end)),
+        headers=page_headers(request, end, limit, total),
+    )
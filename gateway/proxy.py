@@ -0,0 +1,135 @@
+import os
+import time
+import logging
+from typing import Dict, Optional
+
+import httpx
+from fastapi import HTTPException, Request
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+
+from metrics import UPSTREAM_LATENCY
+
+logger = logging.getLogger(__name__)
+
+# Endereços internos dos serviços na rede superbot-net (docker-compose)
+UPSTREAMS = {
+    "trading": os.getenv("TRADING_URL", "http://trading:8000"),
+    "dropshipping": os.getenv("DROPSHIPPING_URL", "http://dropshipping:8000"),
+    "afiliados": os.getenv("AFILIADOS_URL", "http://afiliados:8000"),
+    "arbitragem": os.getenv("ARBITRAGEM_URL", "http://arbitragem:8000"),
+    "conteudo": os.getenv("CONTEUDO_URL", "http://conteudo:8000"),
+}
+
+# Timeout padrão (segundos) e timeouts por prefixo de rota no serviço de destino
+DEFAULT_TIMEOUT = float(os.getenv("GATEWAY_UPSTREAM_TIMEOUT", "10"))
+ROUTE_TIMEOUTS = {
+    "/health": 2.0,
+    "/metrics": 5.0,
+}
+
+# Cabeçalhos hop-by-hop não devem ser repassados entre conexões (RFC 7230)
+HOP_BY_HOP_HEADERS = {
+    "connection",
+    "keep-alive",
+    "proxy-authenticate",
+    "proxy-authorization",
+    "te",
+    "trailers",
+    "transfer-encoding",
+    "upgrade",
+    "host",
+}
+
+METHODS_WITHOUT_BODY = {"GET", "HEAD", "OPTIONS"}
+
+
+class UpstreamPool:
+    """Mantém um httpx.AsyncClient por serviço, com pool de conexões keep-alive"""
+
+    def __init__(self, upstreams: Dict[str, str], limits: Optional[httpx.Limits] = None,
+                 route_timeouts: Optional[Dict[str, float]] = None,
+                 default_timeout: float = DEFAULT_TIMEOUT, transport=None):
+        self.upstreams = dict(upstreams)
+        self.limits = limits or httpx.Limits(
+            max_connections=100,
+            max_keepalive_connections=20,
+            keepalive_expiry=30,
+        )
+        self.route_timeouts = dict(ROUTE_TIMEOUTS if route_timeouts is None else route_timeouts)
+        self.default_timeout = default_timeout
+        self.transport = transport
+        self.clients: Dict[str, httpx.AsyncClient] = {}
+
+    def client(self, service: str) -> httpx.AsyncClient:
+        """Retorna o cliente compartilhado do serviço, criando-o no primeiro uso"""
+        client = self.clients.get(service)
+        if client is None:
+            client = httpx.AsyncClient(
+                base_url=self.upstreams[service],
+                limits=self.limits,
+                timeout=self.default_timeout,
+                transport=self.transport,
+            )
+            self.clients[service] = client
+        return client
+
+    def timeout_for(self, path: str) -> float:
+        """Timeout do prefixo de rota mais específico que casa com o caminho"""
+        best = None
+        for prefix in self.route_timeouts:
+            if path.startswith(prefix) and (best is None or len(prefix) > len(best)):
+                best = prefix
+        return self.route_timeouts[best] if best is not None else self.default_timeout
+
+    async def forward(self, service: str, request: Request, path: str) -> StreamingResponse:
+        """Encaminha a requisição ao serviço e devolve o corpo em streaming"""
+        if service not in self.upstreams:
+            raise HTTPException(status_code=404, detail=f"Serviço desconhecido: {service}")
+
+        client = self.client(service)
+        upstream_path = "/" + path
+        headers = [
+            (name, value) for name, value in request.headers.raw
+            if name.decode("latin-1").lower() not in HOP_BY_HOP_HEADERS
+        ]
+        content = None if request.method in METHODS_WITHOUT_BODY else request.stream()
+        upstream_request = client.build_request(
+            request.method,
+            httpx.URL(path=upstream_path, query=request.url.query.encode("utf-8")),
+            headers=headers,
+            content=content,
+            timeout=self.timeout_for(upstream_path),
+        )
+
+        started = time.perf_counter()
+        try:
+            upstream_response = await client.send(upstream_request, stream=True)
+        except httpx.TimeoutException:
+            UPSTREAM_LATENCY.labels(service, "timeout").observe(time.perf_counter() - started)
+            logger.warning(f"Timeout ao encaminhar {request.method} {upstream_path} para {service}")
+            raise HTTPException(status_code=504, detail=f"Timeout no serviço {service}")
+        except httpx.HTTPError as e:
+            UPSTREAM_LATENCY.labels(service, "error").observe(time.perf_counter() - started)
+            logger.error(f"Erro ao encaminhar {request.method} {upstream_path} para {service}: {e}")
+            raise HTTPException(status_code=502, detail=f"Serviço {service} indisponível")
+        UPSTREAM_LATENCY.labels(service, f"{upstream_response.status_code // 100}xx").observe(
+            time.perf_counter() - started
+        )
+
+        response = StreamingResponse(
+            upstream_response.aiter_raw(),
+            status_code=upstream_response.status_code,
+            background=BackgroundTask(upstream_response.aclose),
+        )
+        response.raw_headers.extend(
+            (name, value) for name, value in upstream_response.headers.raw
+            if name.decode("latin-1").lower() not in HOP_BY_HOP_HEADERS
+        )
+        return response
+
+    async def aclose(self):
+        """Fecha todos os clientes e suas conexões keep-alive"""
+        for client in self.clients.values():
+            await client.aclose()
+        self.clients.clear()
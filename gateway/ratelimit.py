@@ -0,0 +1,197 @@
+import os
+import time
+import asyncio
+import logging
+import functools
+import threading
+from typing import Callable, Dict, Optional, Tuple
+
+from fastapi import HTTPException, Request
+
+from redis_client import RedisLink
+from metrics import RATE_LIMIT_REJECTIONS
+
+logger = logging.getLogger(__name__)
+
+PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+# Intervalo entre sincronizações com o Redis: maior = menos round trips, menos precisão
+DEFAULT_SYNC_INTERVAL = float(os.getenv("GATEWAY_RATELIMIT_SYNC_INTERVAL", "1.0"))
+
+
+def parse_rate(rate: str) -> Tuple[int, int]:
+    """Converte "10/minute" em (10, 60)"""
+    amount, period = rate.split("/")
+    return int(amount), PERIODS[period.strip().rstrip("s")]
+
+
+def get_remote_address(request: Request) -> str:
+    return request.client.host if request.client else "127.0.0.1"
+
+
+class RateLimitExceeded(HTTPException):
+    def __init__(self, rate: str, retry_after: float):
+        super().__init__(
+            status_code=429,
+            detail=f"Limite de requisições excedido: {rate}",
+            headers={"Retry-After": str(max(1, int(retry_after + 0.999)))},
+        )
+
+
+class TokenBucket:
+    """Balde de tokens local: capacidade = limite, reposição contínua no período"""
+
+    __slots__ = ("capacity", "period", "rate", "tokens", "updated", "pending", "window", "last_used")
+
+    def __init__(self, capacity: int, period: int):
+        self.capacity = capacity
+        self.period = period
+        self.rate = capacity / period
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.pending = 0  # consumos ainda não enviados ao Redis
+        self.window = int(time.time() // period)  # janela global a que pending pertence
+        self.last_used = self.updated
+
+    def roll(self, window: int):
+        """Descarta consumos de uma janela já fechada (ex.: acumulados com o Redis fora)"""
+        if window != self.window:
+            self.pending = 0
+            self.window = window
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def consume(self) -> bool:
+        now = time.monotonic()
+        self._refill(now)
+        self.last_used = now
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        self.roll(int(time.time() // self.period))
+        self.pending += 1
+        return True
+
+    def retry_after(self) -> float:
+        return (1 - self.tokens) / self.rate
+
+    def clamp(self, remaining: int):
+        """Limita os tokens locais ao que ainda resta na janela global"""
+        self._refill(time.monotonic())
+        self.tokens = min(self.tokens, max(0, remaining))
+
+
+class HybridLimiter:
+    """Rate limiter com baldes em processo reconciliados em lote com o Redis.
+
+    As requisições consomem apenas o balde local. Uma thread envia os consumos
+    acumulados de todos os baldes num único pipeline (INCRBY por janela) e
+    ajusta cada balde ao saldo global. Entre duas sincronizações cada réplica
+    pode exceder o limite em no máximo o que consumiu no intervalo; sem Redis
+    os baldes seguem valendo localmente (modo degradado).
+    """
+
+    def __init__(self, redis_link: RedisLink, key_func: Callable[[Request], str] = get_remote_address,
+                 sync_interval: float = DEFAULT_SYNC_INTERVAL, prefix: str = "gateway:ratelimit"):
+        self.redis = redis_link
+        self.key_func = key_func
+        self.sync_interval = sync_interval
+        self.prefix = prefix
+        self._buckets: Dict[Tuple[str, str], TokenBucket] = {}
+        self._rules: Dict[str, Tuple[int, int]] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def hit(self, rule: str, key: str) -> Tuple[bool, float]:
+        limit, period = self._rules[rule]
+        with self._lock:
+            bucket = self._buckets.get((rule, key))
+            if bucket is None:
+                bucket = self._buckets[(rule, key)] = TokenBucket(limit, period)
+            if bucket.consume():
+                return True, 0.0
+            return False, bucket.retry_after()
+
+    def limit(self, rate: str):
+        """Decorador no estilo do slowapi; a rota precisa receber `request: Request`"""
+        def decorator(func):
+            rule = f"{func.__module__}.{func.__name__}:{rate}"
+            self._rules[rule] = parse_rate(rate)
+
+            def check(args, kwargs):
+                request = kwargs.get("request") or next((a for a in args if isinstance(a, Request)), None)
+                if request is None:
+                    raise RuntimeError(f'A rota {func.__name__} precisa de um argumento "request"')
+                allowed, retry_after = self.hit(rule, self.key_func(request))
+                if not allowed:
+                    RATE_LIMIT_REJECTIONS.labels(rule).inc()
+                    raise RateLimitExceeded(rate, retry_after)
+
+            if asyncio.iscoroutinefunction(func):
+                @functools.wraps(func)
+                async def async_wrapper(*args, **kwargs):
+                    check(args, kwargs)
+                    return await func(*args, **kwargs)
+                return async_wrapper
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                check(args, kwargs)
+                return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def sync(self):
+        """Envia os consumos pendentes ao Redis e ajusta os baldes ao saldo global"""
+        now = time.time()
+        with self._lock:
+            batch = []
+            for (rule, key), bucket in list(self._buckets.items()):
+                limit, period = self._rules[rule]
+                if time.monotonic() - bucket.last_used > period:
+                    # balde ocioso: o que ainda estiver pendente é de uma janela já fechada
+                    del self._buckets[(rule, key)]
+                    continue
+                window = int(now // period)
+                bucket.roll(window)
+                # Só um snapshot: pending é descontado depois que o Redis confirmar
+                pending = min(bucket.pending, limit)
+                batch.append((rule, bucket, f"{self.prefix}:{rule}:{key}:{window}", pending, period, window))
+
+        if not batch:
+            return
+
+        def send(r):
+            pipe = r.pipeline(transaction=False)
+            for _, _, redis_key, pending, period, _ in batch:
+                pipe.incrby(redis_key, pending)
+                pipe.expire(redis_key, period)
+            return pipe.execute()[::2]
+
+        totals = self.redis.call(send)
+        if totals is None:
+            return  # modo degradado: só os baldes locais; pending vai no próximo sync se a janela não fechar
+
+        with self._lock:
+            for (rule, bucket, _, sent, _, window), total in zip(batch, totals):
+                if bucket.window == window:
+                    bucket.pending = max(bucket.pending - sent, 0)
+                bucket.clamp(self._rules[rule][0] - total - bucket.pending)
+
+    def start(self):
+        """Inicia a thread de sincronização periódica"""
+        if self._thread is not None:
+            return
+
+        def run():
+            while True:
+                time.sleep(self.sync_interval)
+                try:
+                    self.sync()
+                except Exception as e:
+                    logger.error(f"Erro ao sincronizar rate limiter: {e}")
+
+        self._thread = threading.Thread(target=run, name="ratelimit-sync", daemon=True)
+        self._thread.start()
@@ -0,0 +1,76 @@
+import os
+import time
+import logging
+import threading
+from typing import Callable, Optional
+
+import redis
+
+logger = logging.getLogger(__name__)
+
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+
+
+class RedisLink:
+    """Cliente Redis com timeouts curtos que deixa de ser usado por um tempo após falhar.
+
+    O gateway continua respondendo (em modo degradado, só com estado local)
+    enquanto o Redis estiver lento ou fora do ar.
+    """
+
+    def __init__(self, url: str = REDIS_URL, socket_timeout: float = 0.1,
+                 cooldown: float = 5.0, client: Optional[redis.Redis] = None):
+        self.url = url
+        self.client = client or redis.Redis.from_url(
+            url,
+            socket_timeout=socket_timeout,
+            socket_connect_timeout=socket_timeout,
+        )
+        self.cooldown = cooldown
+        self._down_until = 0.0
+
+    @property
+    def available(self) -> bool:
+        return time.monotonic() >= self._down_until
+
+    def call(self, fn: Callable[[redis.Redis], object], default=None):
+        """Executa fn(client); em erro marca o Redis como indisponível e devolve default"""
+        if not self.available:
+            return default
+        try:
+            return fn(self.client)
+        except redis.RedisError as e:
+            logger.warning(f"Redis indisponível, usando apenas estado local por {self.cooldown}s: {e}")
+            self._down_until = time.monotonic() + self.cooldown
+            return default
+
+    def subscribe(self, channel: str, callback: Callable[[bytes], None],
+                  on_connect: Optional[Callable[[], None]] = None) -> threading.Thread:
+        """Escuta um canal pub/sub numa thread daemon, reconectando após falhas.
+
+        on_connect é chamado a cada (re)assinatura, já que mensagens publicadas
+        enquanto a conexão esteve fora são perdidas.
+        """
+        def run():
+            while True:
+                try:
+                    subscriber = redis.Redis.from_url(self.url, socket_connect_timeout=1.0)
+                    pubsub = subscriber.pubsub(ignore_subscribe_messages=True)
+                    pubsub.subscribe(channel)
+                    if on_connect is not None:
+                        on_connect()
+                    while True:
+                        message = pubsub.get_message(timeout=1.0)
+                        if message is None:
+                            continue
+                        try:
+                            callback(message["data"])
+                        except Exception as e:
+                            logger.error(f"Erro ao processar mensagem do canal {channel}: {e}")
+                except redis.RedisError as e:
+                    logger.warning(f"Falha na assinatura do canal {channel}: {e}")
+                    time.sleep(self.cooldown)
+
+        thread = threading.Thread(target=run, name=f"redis-sub-{channel}", daemon=True)
+        thread.start()
+        return thread
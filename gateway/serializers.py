@@ -0,0 +1,52 @@
+import operator
+from typing import Callable, Iterable, Type
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel
+
+
+def dumps(payload) -> bytes:
+    """JSON compacto via orjson; modelos Pydantic e tipos exóticos caem no jsonable_encoder"""
+    return orjson.dumps(payload, default=jsonable_encoder)
+
+
+class ModelSerializer:
+    """Serializador pré-compilado para registros internos com o formato de um modelo.
+
+    Os dados publicados pelos bots já passaram pela validação do modelo na
+    entrada, então aqui só projetamos os campos do modelo (como faria o
+    response_model) e entregamos direto ao orjson, sem instanciar o modelo.
+    """
+
+    def __init__(self, model: Type[BaseModel]):
+        self.model = model
+        self.fields = tuple(model.__fields__)
+        getter = operator.itemgetter(*self.fields)
+        fields = self.fields
+        if len(fields) == 1:
+            self._project: Callable[[dict], dict] = lambda record: {fields[0]: getter(record)}
+        else:
+            self._project = lambda record: dict(zip(fields, getter(record)))
+
+    def dump_one(self, record: dict) -> bytes:
+        return orjson.dumps(self._project(record))
+
+    def dump_many(self, records: Iterable[dict]) -> bytes:
+        return orjson.dumps([self._project(record) for record in records])
+
+    def dump_lines(self, records: Iterable[dict]) -> Iterable[bytes]:
+        """Um documento JSON por linha (NDJSON)"""
+        project = self._project
+        for record in records:
+            yield orjson.dumps(project(record), option=orjson.OPT_APPEND_NEWLINE)
+
+
+_serializers = {}
+
+
+def serializer_for(model: Type[BaseModel]) -> ModelSerializer:
+    serializer = _serializers.get(model)
+    if serializer is None:
+        serializer = _serializers[model] = ModelSerializer(model)
+    return serializer
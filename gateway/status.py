@@ -0,0 +1,97 @@
+import os
+import time
+import asyncio
+import logging
+from typing import Callable, Dict, Optional
+
+import httpx
+
+from proxy import UpstreamPool
+from metrics import UPSTREAM_LATENCY
+
+logger = logging.getLogger(__name__)
+
+# Prazo total da consulta aos serviços e validade do snapshot compartilhado
+STATUS_DEADLINE = float(os.getenv("GATEWAY_STATUS_DEADLINE", "1.0"))
+STATUS_TTL = float(os.getenv("GATEWAY_STATUS_TTL", "5.0"))
+
+
+class StatusAggregator:
+    """Consulta o /health de todos os serviços em paralelo, com prazo global.
+
+    Serviços que não respondem dentro do prazo aparecem com o último resultado
+    conhecido marcado como `stale`. O snapshot é reaproveitado por STATUS_TTL
+    segundos e requisições simultâneas aguardam a mesma consulta em andamento,
+    então N dashboards geram no máximo 5 chamadas por período.
+    """
+
+    def __init__(self, pool: UpstreamPool, deadline: float = STATUS_DEADLINE, ttl: float = STATUS_TTL):
+        self.pool = pool
+        self.deadline = deadline
+        self.ttl = ttl
+        self._last_good: Dict[str, dict] = {}
+        self._snapshot: Optional[Dict[str, dict]] = None
+        self._snapshot_at = 0.0
+        self._inflight: Optional[asyncio.Task] = None
+
+    async def snapshot(self) -> Dict[str, dict]:
+        if self._snapshot is not None and time.monotonic() - self._snapshot_at < self.ttl:
+            return self._snapshot
+        loop = asyncio.get_running_loop()
+        if self._inflight is None or self._inflight.done() or self._inflight.get_loop() is not loop:
+            self._inflight = loop.create_task(self._refresh())
+        return await asyncio.shield(self._inflight)
+
+    async def _probe(self, service: str) -> dict:
+        started = time.perf_counter()
+        try:
+            response = await self.pool.client(service).get("/health", timeout=self.pool.timeout_for("/health"))
+        except asyncio.CancelledError:
+            # Cancelado por estourar o prazo global
+            UPSTREAM_LATENCY.labels(service, "timeout").observe(time.perf_counter() - started)
+            raise
+        except httpx.HTTPError:
+            UPSTREAM_LATENCY.labels(service, "error").observe(time.perf_counter() - started)
+            raise
+        elapsed = time.perf_counter() - started
+        UPSTREAM_LATENCY.labels(service, f"{response.status_code // 100}xx").observe(elapsed)
+        return {
+            "status": "active" if response.is_success else "unhealthy",
+            "latency_ms": round(elapsed * 1000, 1),
+            "last_check": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "stale": False,
+        }
+
+    async def _refresh(self) -> Dict[str, dict]:
+        tasks = {service: asyncio.ensure_future(self._probe(service)) for service in self.pool.upstreams}
+        done, pending = await asyncio.wait(tasks.values(), timeout=self.deadline)
+        for task in pending:
+            task.cancel()
+
+        snapshot = {}
+        for service, task in tasks.items():
+            error = None
+            if task not in done:
+                error = "timeout"
+            elif task.exception() is not None:
+                error = "error"
+                logger.warning(f"Falha ao consultar /health de {service}: {task.exception()!r}")
+
+            if error is None:
+                snapshot[service] = self._last_good[service] = task.result()
+            elif service in self._last_good:
+                snapshot[service] = dict(self._last_good[service], stale=True, error=error)
+            else:
+                snapshot[service] = {"status": "unavailable", "stale": True, "error": error}
+
+        self._snapshot = snapshot
+        self._snapshot_at = time.monotonic()
+        return snapshot
+
+    async def status(self, counts: Dict[str, Callable[[], dict]]) -> Dict[str, dict]:
+        """Snapshot de saúde combinado com as contagens locais (sempre atuais)"""
+        snapshot = await self.snapshot()
+        return {
+            service: dict(entry, **counts[service]()) if service in counts else dict(entry)
+            for service, entry in snapshot.items()
+        }
@@ -0,0 +1,82 @@
+import time
+
+import jwt
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+import main
+from auth import JWTGuard, TokenVerifier
+from redis_client import RedisLink
+
+
+class CountingVerifier(TokenVerifier):
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.calls = 0
+
+    def verify(self, token):
+        self.calls += 1
+        return super().verify(token)
+
+
+class FakeRedis:
+    def __init__(self):
+        self.data = {}
+
+    def exists(self, key):
+        return int(key in self.data)
+
+    def setex(self, key, ttl, value):
+        self.data[key] = value
+
+    def publish(self, channel, message):
+        pass
+
+
+def make_token(secret="segredo", **claims):
+    payload = {"sub": "admin", "jti": "abc", "type": "access", "exp": int(time.time()) + 60}
+    payload.update(claims)
+    token = jwt.encode(payload, secret, algorithm="HS256")
+    return token.decode() if isinstance(token, bytes) else token
+
+
+def test_repeat_calls_skip_signature_verification():
+    verifier = CountingVerifier("segredo", ["HS256"])
+    guard = JWTGuard(verifier, RedisLink(client=FakeRedis()))
+    token = make_token()
+    for _ in range(5):
+        assert guard.authenticate(token)["sub"] == "admin"
+    assert verifier.calls == 1
+
+
+def test_revocation_is_seen_by_other_instances():
+    shared = FakeRedis()
+    first = JWTGuard(TokenVerifier("segredo", ["HS256"]), RedisLink(client=shared))
+    second = JWTGuard(TokenVerifier("segredo", ["HS256"]), RedisLink(client=shared))
+    token = make_token()
+
+    first.revoke(first.authenticate(token))
+    with pytest.raises(HTTPException):
+        first.authenticate(token)
+    with pytest.raises(HTTPException):
+        second.authenticate(token)
+
+
+def test_cached_token_expires_with_token():
+    guard = JWTGuard(TokenVerifier("segredo", ["HS256"]), RedisLink(client=FakeRedis()))
+    token = make_token(exp=int(time.time()) - 10)
+    guard.cache.set(guard.cache.digest(token), {"sub": "admin", "exp": time.time() - 10})
+    with pytest.raises(HTTPException):
+        guard.authenticate(token)
+
+
+def test_login_me_and_logout():
+    client = TestClient(main.app)
+    token = client.post("/login", json={"username": "admin", "password": "admin"}).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+
+    assert client.get("/usuario/me", headers=headers).json()["username"] == "admin"
+    assert client.post("/logout", headers=headers).status_code == 200
+    assert client.get("/usuario/me", headers=headers).status_code == 401
+    assert client.get("/usuario/me").status_code == 401
@@ -0,0 +1,97 @@
+import time
+
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from cache import CacheEntry, LRUCache, ResponseCache
+from redis_client import RedisLink
+
+
+class FakeRedis:
+    """Subconjunto do cliente Redis usado pelo cache"""
+
+    def __init__(self):
+        self.data = {}
+        self.published = []
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def setex(self, key, ttl, value):
+        self.data[key] = value
+
+    def incr(self, key):
+        self.data[key] = int(self.data.get(key, 0)) + 1
+        return self.data[key]
+
+    def publish(self, channel, message):
+        self.published.append((channel, message))
+
+
+def make_app(cache, source):
+    app = FastAPI()
+
+    @app.get("/items")
+    def items(request: Request):
+        return cache.respond(request, "afiliados", lambda: list(source))
+
+    return app
+
+
+def test_lru_evicts_oldest_and_expired():
+    lru = LRUCache(max_entries=2)
+    lru.set("a", CacheEntry(b"a", '"a"', time.time() + 60))
+    lru.set("b", CacheEntry(b"b", '"b"', time.time() - 1))
+    lru.set("c", CacheEntry(b"c", '"c"', time.time() + 60))
+    assert lru.get("a") is None
+    assert lru.get("b") is None
+    assert lru.get("c").body == b"c"
+
+
+def test_etag_and_invalidation():
+    source = [{"code": "SUPER10"}]
+    cache = ResponseCache(RedisLink(client=FakeRedis()))
+    client = TestClient(make_app(cache, source))
+
+    first = client.get("/items")
+    assert first.headers["X-Cache"] == "MISS"
+    etag = first.headers["ETag"]
+    assert client.get("/items", headers={"If-None-Match": etag}).status_code == 304
+
+    source.append({"code": "BOT20"})
+    assert len(client.get("/items").json()) == 1
+
+    cache.invalidate("afiliados")
+    second = client.get("/items")
+    assert len(second.json()) == 2
+    assert second.headers["ETag"] != etag
+
+
+def test_redis_tier_is_shared_between_instances():
+    redis_client = FakeRedis()
+    source = [{"code": "SUPER10"}]
+    first = TestClient(make_app(ResponseCache(RedisLink(client=redis_client)), source))
+    second = TestClient(make_app(ResponseCache(RedisLink(client=redis_client)), []))
+
+    assert first.get("/items").headers["X-Cache"] == "MISS"
+    response = second.get("/items")
+    assert response.headers["X-Cache"] == "HIT"
+    assert response.json() == source
+
+
+def test_resubscribe_drops_entries_invalidated_while_disconnected():
+    redis_client = FakeRedis()
+    source = [{"code": "SUPER10"}]
+    cache = ResponseCache(RedisLink(client=redis_client))
+    client = TestClient(make_app(cache, source))
+    assert client.get("/items").headers["X-Cache"] == "MISS"
+
+    # Outra instância invalidou enquanto o pub/sub desta estava fora: a mensagem não chegou
+    source.append({"code": "BOT20"})
+    ResponseCache(RedisLink(client=redis_client)).invalidate("afiliados")
+    assert len(client.get("/items").json()) == 1
+
+    cache._on_connect()
+    response = client.get("/items")
+    assert response.headers["X-Cache"] == "MISS"
+    assert len(response.json()) == 2
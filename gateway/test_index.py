@@ -0,0 +1,34 @@
+import random
+
+from fastapi.testclient import TestClient
+
+import main
+from index import IndexedCollection
+
+
+def test_substring_search_matches_linear_scan():
+    rng = random.Random(42)
+    words = ["iPhone", "Galaxy", "MacBook", "PlayStation", "Pro", "Max", "15", "S24", "Ultra"]
+    records = [{"product": " ".join(rng.sample(words, 3))} for _ in range(500)]
+    collection = IndexedCollection(records, text_fields=["product"])
+
+    for query in ["iphone", "PRO M", "x", "15", "ultra s", "station pro", "inexistente", ""]:
+        expected = [r for r in records if query.lower() in r["product"].lower()]
+        assert collection.search("product", query) == expected
+
+
+def test_hash_index_updates_incrementally():
+    collection = IndexedCollection([{"category": "Eletrônicos"}], hash_fields=["category"])
+    collection.append({"category": "ELETRÔNICOS"})
+    collection.append({"category": "Informática"})
+    assert len(collection.find("category", "eletrônicos")) == 2
+    assert collection.find("category", "Moda") == []
+
+
+def test_new_coupons_are_visible_by_category(monkeypatch):
+    monkeypatch.setattr(main, "coupons_data", IndexedCollection(hash_fields=["category"]))
+    client = TestClient(main.app)
+    coupon = {"code": "GAME5", "description": "Desconto 5%", "site": "amazon.com",
+              "expiry": "2025-01-31", "category": "Games"}
+    assert client.post("/afiliados/coupons", json=[coupon]).json()["count"] == 1
+    assert client.get("/afiliados/coupons/games").json()["coupons"] == [coupon]
@@ -0,0 +1,17 @@
+from fastapi.testclient import TestClient
+
+import main
+
+
+def test_metrics_endpoint_exposes_gateway_series():
+    client = TestClient(main.app)
+    client.get("/afiliados/coupons")
+    client.get("/afiliados/coupons")
+
+    body = client.get("/metrics").text
+    assert 'http_request_duration_seconds_bucket{handler="/afiliados/coupons"' in body
+    assert 'le="0.0075"' in body
+    assert "http_requests_inprogress" in body
+    assert 'gateway_cache_requests_total{namespace="afiliados"' in body
+    assert "gateway_rate_limit_rejections_total" in body
+    assert "gateway_upstream_request_duration_seconds" in body
@@ -0,0 +1,106 @@
+import json
+
+import pytest
+
+from fastapi.testclient import TestClient
+
+import main
+from index import IndexedCollection
+from orders import OrderQueueFull, OrderWriteBehind
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def copy_expert(self, sql, buf):
+        if self.conn.fail:
+            raise RuntimeError("conexão perdida")
+        self.conn.copies.append((sql, buf.read()))
+
+
+class FakeConnection:
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.copies = []
+        self.commits = 0
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def commit(self):
+        self.commits += 1
+
+    def close(self):
+        pass
+
+
+ORDER = {"product": "iPhone 15", "quantity": 1, "price": 4500.0, "status": "processing"}
+
+
+def test_bulk_json_accepts_valid_and_reports_invalid(monkeypatch):
+    conn = FakeConnection()
+    writer = OrderWriteBehind(lambda: conn, batch_size=2)
+    monkeypatch.setattr(main, "order_writer", writer)
+    monkeypatch.setattr(main, "dropshipping_orders", IndexedCollection())
+    client = TestClient(main.app)
+
+    response = client.post("/dropshipping/orders/bulk", json=[ORDER, {"product": "x"}, ORDER, ORDER])
+    assert response.json()["accepted"] == 3
+    assert [r["index"] for r in response.json()["rejected"]] == [1]
+    assert len(main.dropshipping_orders) == 3
+
+    writer.flush()
+    assert conn.commits == 2
+    assert conn.copies[0][0].startswith("COPY dropshipping_orders (product, quantity, price, status)")
+    assert conn.copies[0][1].splitlines()[0] == "iPhone 15,1,4500.0,processing"
+
+
+def test_bulk_ndjson_stream(monkeypatch):
+    monkeypatch.setattr(main, "order_writer", None)
+    monkeypatch.setattr(main, "dropshipping_orders", IndexedCollection())
+    client = TestClient(main.app)
+    body = "\n".join(json.dumps(dict(ORDER, quantity=i + 1)) for i in range(100)) + "\n"
+    response = client.post("/dropshipping/orders/bulk", content=body,
+                           headers={"Content-Type": "application/x-ndjson"})
+    assert response.json() == {"accepted": 100, "rejected": []}
+    assert main.dropshipping_orders[99]["quantity"] == 100
+
+
+def test_failed_batch_goes_back_to_buffer():
+    conn = FakeConnection(fail=True)
+    writer = OrderWriteBehind(lambda: conn)
+    writer.submit([ORDER, ORDER])
+    writer.flush()
+    assert writer.pending() == 2
+
+    conn.fail = False
+    writer.flush()
+    assert writer.pending() == 0
+    assert conn.commits == 1
+
+
+def test_invalid_utf8_body_is_rejected(monkeypatch):
+    monkeypatch.setattr(main, "order_writer", None)
+    client = TestClient(main.app)
+    for content_type in ("application/json", "application/x-ndjson"):
+        response = client.post("/dropshipping/orders/bulk", content=b'[{"product": "\xff\xfe"}]',
+                               headers={"Content-Type": content_type})
+        assert response.status_code == 400
+
+
+def test_full_write_queue_maps_to_503(monkeypatch):
+    writer = OrderWriteBehind(lambda: FakeConnection(), max_buffer=1)
+    with pytest.raises(OrderQueueFull):
+        writer.submit([ORDER, ORDER])
+    monkeypatch.setattr(main, "order_writer", writer)
+    monkeypatch.setattr(main, "dropshipping_orders", IndexedCollection())
+    response = TestClient(main.app).post("/dropshipping/orders/bulk", json=[ORDER, ORDER])
+    assert response.status_code == 503
+    assert len(main.dropshipping_orders) == 0
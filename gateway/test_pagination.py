@@ -0,0 +1,39 @@
+import json
+
+from fastapi.testclient import TestClient
+
+import main
+from index import IndexedCollection
+
+
+def make_coupons(count):
+    return IndexedCollection(
+        ({"code": f"C{i}", "description": "Desconto", "site": "amazon.com",
+          "expiry": "2025-12-31", "category": "Eletrônicos"} for i in range(count)),
+        hash_fields=["category"],
+    )
+
+
+def test_cursor_pagination_walks_all_records(monkeypatch):
+    monkeypatch.setattr(main, "coupons_data", make_coupons(5))
+    client = TestClient(main.app)
+
+    codes, params = [], {"limit": 2}
+    while True:
+        response = client.get("/afiliados/coupons", params=params)
+        codes += [c["code"] for c in response.json()]
+        if "X-Next-Cursor" not in response.headers:
+            break
+        assert 'rel="next"' in response.headers["Link"]
+        params = {"limit": 2, "after": response.headers["X-Next-Cursor"]}
+    assert codes == ["C0", "C1", "C2", "C3", "C4"]
+
+
+def test_ndjson_streams_from_cursor(monkeypatch):
+    monkeypatch.setattr(main, "coupons_data", make_coupons(4))
+    client = TestClient(main.app)
+    response = client.get("/afiliados/coupons", params={"after": 1},
+                          headers={"Accept": "application/x-ndjson"})
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [c["code"] for c in lines] == ["C2", "C3"]
@@ -0,0 +1,56 @@
+import json
+
+import httpx
+from fastapi.testclient import TestClient
+
+import main
+from proxy import UpstreamPool
+
+
+class ChunkedBody(httpx.AsyncByteStream):
+    """Corpo em pedaços, como uma resposta real lida da rede"""
+
+    def __init__(self, *chunks):
+        self.chunks = chunks
+
+    async def __aiter__(self):
+        for chunk in self.chunks:
+            yield chunk
+
+
+def make_pool(handler):
+    return UpstreamPool({"trading": "http://trading:8000"}, transport=httpx.MockTransport(handler))
+
+
+def test_proxy_forwards_path_and_query(monkeypatch):
+    def handler(request):
+        body = json.dumps({"path": request.url.path, "query": request.url.query.decode()}).encode()
+        return httpx.Response(200, headers={"content-type": "application/json"},
+                              stream=ChunkedBody(body[:5], body[5:]))
+
+    monkeypatch.setattr(main, "upstreams", make_pool(handler))
+    client = TestClient(main.app)
+    response = client.get("/trading/health?verbose=1")
+    assert response.status_code == 200
+    assert response.json() == {"path": "/health", "query": "verbose=1"}
+
+
+def test_proxy_timeout_returns_504(monkeypatch):
+    def handler(request):
+        raise httpx.ReadTimeout("lento", request=request)
+
+    monkeypatch.setattr(main, "upstreams", make_pool(handler))
+    client = TestClient(main.app)
+    assert client.get("/trading/health").status_code == 504
+
+
+def test_proxy_unknown_service():
+    client = TestClient(main.app)
+    assert client.get("/desconhecido/health").status_code == 404
+
+
+def test_route_timeouts_use_longest_prefix():
+    pool = UpstreamPool({}, route_timeouts={"/health": 2.0, "/health/deep": 8.0}, default_timeout=10.0)
+    assert pool.timeout_for("/health") == 2.0
+    assert pool.timeout_for("/health/deep/db") == 8.0
+    assert pool.timeout_for("/opportunities") == 10.0
@@ -0,0 +1,20 @@
+import json
+
+from main import ArbitrageOpportunity, Coupon
+from serializers import serializer_for
+
+
+def test_serializer_matches_model_output_and_drops_extra_fields():
+    record = {"code": "SUPER10", "description": "Desconto 10%", "site": "amazon.com",
+              "expiry": "2024-12-31", "category": "Eletrônicos", "interno": "não expor"}
+    body = serializer_for(Coupon).dump_many([record])
+    assert json.loads(body) == [json.loads(Coupon(**record).json())]
+    assert "Eletrônicos".encode() in body
+
+
+def test_dump_lines_emits_one_document_per_line():
+    records = [{"product": f"P{i}", "prices": {"Amazon": 10.0}, "min_price": 10.0,
+                "max_price": 12.0, "margin": 20.0} for i in range(3)]
+    lines = list(serializer_for(ArbitrageOpportunity).dump_lines(records))
+    assert all(line.endswith(b"\n") for line in lines)
+    assert [json.loads(line)["product"] for line in lines] == ["P0", "P1", "P2"]
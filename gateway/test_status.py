@@ -0,0 +1,73 @@
+import asyncio
+import time
+
+import httpx
+from fastapi.testclient import TestClient
+
+import main
+from proxy import UpstreamPool
+from status import StatusAggregator
+
+SERVICES = {name: f"http://{name}:8000" for name in ["trading", "arbitragem", "conteudo"]}
+
+
+def make_aggregator(handler, **kwargs):
+    pool = UpstreamPool(SERVICES, transport=httpx.MockTransport(handler))
+    return StatusAggregator(pool, **kwargs)
+
+
+def test_fan_out_is_parallel_and_bounded_by_deadline():
+    async def handler(request):
+        if request.url.host == "conteudo":
+            await asyncio.sleep(5)
+        await asyncio.sleep(0.2)
+        return httpx.Response(200, json={"status": "healthy"})
+
+    aggregator = make_aggregator(handler, deadline=0.5)
+    started = time.perf_counter()
+    snapshot = asyncio.run(aggregator.snapshot())
+    assert time.perf_counter() - started < 1.0
+    assert snapshot["trading"]["status"] == "active"
+    assert snapshot["conteudo"] == {"status": "unavailable", "stale": True, "error": "timeout"}
+
+
+def test_failed_service_reports_last_good_result_as_stale():
+    healthy = {"value": True}
+
+    def handler(request):
+        if request.url.host == "arbitragem" and not healthy["value"]:
+            raise httpx.ConnectError("recusado", request=request)
+        return httpx.Response(200, json={"status": "healthy"})
+
+    aggregator = make_aggregator(handler, ttl=0)
+    asyncio.run(aggregator.snapshot())
+    healthy["value"] = False
+    snapshot = asyncio.run(aggregator.snapshot())
+    assert snapshot["arbitragem"]["status"] == "active"
+    assert snapshot["arbitragem"]["stale"] is True
+    assert snapshot["trading"]["stale"] is False
+
+
+def test_concurrent_callers_share_one_fan_out():
+    calls = []
+
+    async def handler(request):
+        calls.append(request.url.host)
+        await asyncio.sleep(0.05)
+        return httpx.Response(200)
+
+    aggregator = make_aggregator(handler)
+
+    async def poll():
+        await asyncio.gather(*(aggregator.snapshot() for _ in range(20)))
+        await aggregator.snapshot()
+
+    asyncio.run(poll())
+    assert sorted(calls) == sorted(SERVICES)
+
+
+def test_system_status_route_merges_local_counts(monkeypatch):
+    monkeypatch.setattr(main, "status_aggregator", make_aggregator(lambda request: httpx.Response(200)))
+    body = TestClient(main.app).get("/system/status").json()
+    assert body["arbitragem"]["opportunities_count"] == len(main.arbitrage_opportunities)
+    assert body["trading"]["status"] == "active"
@@ -0,0 +1,27 @@
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table(
+        'dropshipping_orders',
+        sa.Column('id', sa.BigInteger, primary_key=True),
+        sa.Column('product', sa.String(255), nullable=False),
+        sa.Column('quantity', sa.Integer, nullable=False),
+        sa.Column('price', sa.Numeric(12, 2), nullable=False),
+        sa.Column('status', sa.String(50), nullable=False),
+        sa.Column('criado_em', sa.DateTime, server_default=sa.func.now(), nullable=False),
+    )
+    op.create_index('ix_dropshipping_orders_status', 'dropshipping_orders', ['status'])
+    op.create_index('ix_dropshipping_orders_product', 'dropshipping_orders', ['product'])
+    op.create_index('ix_dropshipping_orders_criado_em', 'dropshipping_orders', ['criado_em'])
+
+def downgrade():
+    op.drop_index('ix_dropshipping_orders_criado_em', table_name='dropshipping_orders')
+    op.drop_index('ix_dropshipping_orders_product', table_name='dropshipping_orders')
+    op.drop_index('ix_dropshipping_orders_status', table_name='dropshipping_orders')
+    op.drop_table('dropshipping_orders')
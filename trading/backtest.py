@@ -0,0 +1,231 @@
+"""Backtest de plugins de estratégia sobre candles OHLCV do CandleStore (mmap).
+
+Dois modos:
+
+- vetorizado: a estratégia implementa backtest_positions(ohlcv) e devolve a
+  posição alvo (0 a 1) de cada candle × par de uma vez, com NumPy;
+- por eventos: cada candle vira um MarketBatch e passa por analyze_batch()/
+  analyze(), o mesmo caminho do bot ao vivo; os sinais ("alta"/"baixa")
+  viram a posição alvo.
+
+Nos dois casos a contabilidade é a mesma: a posição decidida no fechamento
+do candle t rende o retorno de t para t+1, e cada mudança de posição paga
+taxa + slippage sobre o volume negociado. O capital é dividido igualmente
+entre os pares.
+
+Uso: python backtest.py --strategy strategy:ExampleBatchStrategy [--mode vectorized|event]
+                        [--datadir DIR] [--timeframe 1m] [--sweep fast=8,12 slow=26,50]
+                        [--synthetic-years 3]
+"""
+import os
+import json
+import time
+import logging
+import argparse
+import itertools
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from candle_store import DATADIR, OHLCV_DTYPE, CandleStore, align, timeframe_seconds
+from strategy import MarketBatch
+from strategy_runner import load_strategy_class
+
+logger = logging.getLogger(__name__)
+
+FEE = float(os.getenv("TRADING_BACKTEST_FEE", "0.001"))
+SLIPPAGE = float(os.getenv("TRADING_BACKTEST_SLIPPAGE", "0.0005"))
+
+# Sinal da estratégia -> posição alvo (spot, só comprado)
+SIGNAL_POSITIONS = {"alta": 1.0, "compra": 1.0, "buy": 1.0, "baixa": 0.0, "venda": 0.0, "sell": 0.0}
+
+
+def load_pairs(datadir: str, pairs: Iterable[str], timeframe: str,
+               start: Optional[int] = None, end: Optional[int] = None) -> Dict[str, np.ndarray]:
+    """Lê do CandleStore só a janela [start, end] (ms) de cada par"""
+    store = CandleStore(datadir)
+    return {pair: store.read(pair, timeframe, start, end) for pair in pairs}
+
+
+def evaluate(positions: np.ndarray, close: np.ndarray, fee: float = FEE, slippage: float = SLIPPAGE,
+             periods_per_year: float = 525600) -> dict:
+    """Contabilidade comum aos dois modos: posições (candles × pares) -> métricas"""
+    positions = np.nan_to_num(np.asarray(positions, dtype=np.float64))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        returns = np.nan_to_num(close[1:] / close[:-1] - 1.0)
+    gross = positions[:-1] * returns
+    turnover = np.abs(np.diff(positions, axis=0, prepend=0.0))
+    costs = turnover * (fee + slippage)
+    # custo da entrada/saída no candle t é pago junto com o retorno de t para t+1
+    pair_returns = gross - costs[:-1]
+    portfolio = pair_returns.mean(axis=1) if pair_returns.size else np.zeros(0)
+    equity = np.cumprod(1.0 + portfolio)
+    peak = np.maximum.accumulate(equity) if equity.size else equity
+    drawdown = float((1.0 - equity / peak).max()) if equity.size else 0.0
+    std = portfolio.std() if portfolio.size else 0.0
+    return {
+        "total_return": float(equity[-1] - 1.0) if equity.size else 0.0,
+        "sharpe": float(portfolio.mean() / std * np.sqrt(periods_per_year)) if std > 0 else 0.0,
+        "max_drawdown": drawdown,
+        "trades": int(np.count_nonzero(turnover[:-1])),
+        "costs": float(costs[:-1].mean(axis=1).sum()) if costs.shape[0] > 1 else 0.0,
+        "exposure": float(positions[:-1].mean()) if positions.shape[0] > 1 else 0.0,
+        "pair_returns": np.prod(1.0 + pair_returns, axis=0) - 1.0,
+    }
+
+
+def event_positions(strategy, ohlcv: Dict[str, np.ndarray]) -> np.ndarray:
+    """Modo por eventos: um MarketBatch por candle, pelo caminho ao vivo da estratégia"""
+    pairs = ohlcv["pairs"]
+    close = ohlcv["close"]
+    positions = np.zeros(close.shape)
+    current = np.zeros(len(pairs))
+    column = {pair: i for i, pair in enumerate(pairs)}
+    batch = MarketBatch(pairs)
+    last, bid, ask = batch["last"], batch["bid"], batch["ask"]
+    volume, timestamp = batch["volume"], batch["timestamp"]
+    is_batch = hasattr(strategy, "analyze_batch")
+    for t in range(close.shape[0]):
+        last[:] = bid[:] = ask[:] = close[t]
+        volume[:] = ohlcv["volume"][t]
+        timestamp[:] = ohlcv["timestamp"][t]
+        signals = strategy.analyze_batch(batch) if is_batch else strategy.analyze(batch.to_tickers())
+        for pair, signal in (signals or {}).items():
+            target = SIGNAL_POSITIONS.get(signal)
+            if target is not None and pair in column:
+                current[column[pair]] = target
+        positions[t] = current
+    return positions
+
+
+def vectorized_positions(strategy, ohlcv: Dict[str, np.ndarray]) -> np.ndarray:
+    if not hasattr(strategy, "backtest_positions"):
+        raise TypeError(f"{type(strategy).__name__} não implementa backtest_positions(); use mode='event'")
+    return np.asarray(strategy.backtest_positions(ohlcv), dtype=np.float64)
+
+
+class Backtester:
+    """Roda uma estratégia sobre candles já alinhados (ver align/load_pairs)"""
+
+    def __init__(self, candles_by_pair: Dict[str, np.ndarray], timeframe: str = "1m",
+                 fee: float = FEE, slippage: float = SLIPPAGE):
+        self.ohlcv = align(candles_by_pair)
+        self.timeframe = timeframe
+        self.fee = fee
+        self.slippage = slippage
+
+    def run(self, strategy, mode: str = "vectorized") -> dict:
+        started = time.perf_counter()
+        if mode == "vectorized":
+            positions = vectorized_positions(strategy, self.ohlcv)
+        elif mode == "event":
+            positions = event_positions(strategy, self.ohlcv)
+        else:
+            raise ValueError(f"Modo de backtest desconhecido: {mode}")
+        metrics = evaluate(positions, self.ohlcv["close"], self.fee, self.slippage,
+                           365 * 86400 / timeframe_seconds(self.timeframe))
+        metrics["pair_returns"] = dict(zip(self.ohlcv["pairs"], map(float, metrics["pair_returns"])))
+        metrics.update({
+            "strategy": type(strategy).__name__,
+            "mode": mode,
+            "candles": int(len(self.ohlcv["timestamp"])),
+            "pairs": len(self.ohlcv["pairs"]),
+            "elapsed_s": round(time.perf_counter() - started, 3),
+        })
+        return metrics
+
+
+def _sweep_one(strategy_path: str, params: dict, datadir: str, pairs: List[str], timeframe: str,
+               mode: str, fee: float, slippage: float, start: Optional[int], end: Optional[int]) -> dict:
+    # Cada processo abre os arquivos por mmap: nada de candles trafegando em pickle
+    backtester = Backtester(load_pairs(datadir, pairs, timeframe, start, end), timeframe, fee, slippage)
+    result = backtester.run(load_strategy_class(strategy_path)(**params), mode)
+    result["params"] = params
+    return result
+
+
+def parameter_grid(grid: Dict[str, Iterable]) -> List[dict]:
+    names = list(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[n] for n in names))]
+
+
+def sweep(strategy_path: str, grid: Dict[str, Iterable], datadir: str, pairs: Iterable[str],
+          timeframe: str = "1m", mode: str = "vectorized", fee: float = FEE, slippage: float = SLIPPAGE,
+          workers: Optional[int] = None, start: Optional[int] = None, end: Optional[int] = None) -> List[dict]:
+    """Roda a grade de parâmetros em paralelo (um processo por núcleo); melhor Sharpe primeiro"""
+    pairs = list(pairs)
+    combos = parameter_grid(grid)
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        futures = [
+            pool.submit(_sweep_one, strategy_path, params, datadir, pairs, timeframe, mode, fee, slippage, start, end)
+            for params in combos
+        ]
+        results = [future.result() for future in futures]
+    return sorted(results, key=lambda r: r["sharpe"], reverse=True)
+
+
+def synthetic_ohlcv(candles: int, timeframe: str = "1m", price: float = 100.0, seed: int = 0,
+                    start: int = 1_599_955_200_000) -> np.ndarray:
+    """Passeio aleatório geométrico no formato OHLCV (para benchmark e testes)"""
+    rng = np.random.default_rng(seed)
+    step = timeframe_seconds(timeframe) * 1000
+    close = price * np.exp(np.cumsum(rng.normal(0, 0.001, candles)))
+    open_ = np.concatenate([[price], close[:-1]])
+    spread = np.abs(rng.normal(0, 0.0005, candles)) * close
+    data = np.empty(candles, dtype=OHLCV_DTYPE)
+    data["timestamp"] = start + np.arange(candles, dtype=np.int64) * step
+    data["open"] = open_
+    data["close"] = close
+    data["high"] = np.maximum(open_, close) + spread
+    data["low"] = np.minimum(open_, close) - spread
+    data["volume"] = rng.uniform(1, 100, candles)
+    return data
+
+
+def _parse_sweep(items: List[str]) -> Dict[str, list]:
+    grid = {}
+    for item in items:
+        name, _, values = item.partition("=")
+        grid[name] = [int(v) if v.lstrip("-").isdigit() else float(v) for v in values.split(",")]
+    return grid
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--strategy", default="strategy:ExampleBatchStrategy")
+    parser.add_argument("--mode", choices=["vectorized", "event"], default="vectorized")
+    parser.add_argument("--datadir", default=DATADIR)
+    parser.add_argument("--pairs", default="BTC/USDT,ETH/USDT,ADA/USDT")
+    parser.add_argument("--timeframe", default="1m")
+    parser.add_argument("--fee", type=float, default=FEE)
+    parser.add_argument("--slippage", type=float, default=SLIPPAGE)
+    parser.add_argument("--sweep", nargs="*", default=[], help="parametro=v1,v2 ...")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--synthetic-years", type=float, default=0,
+                        help="gera candles sintéticos num diretório temporário em vez de ler o datadir")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    pairs = [p.strip() for p in args.pairs.split(",") if p.strip()]
+    datadir = args.datadir
+    tmp = None
+    if args.synthetic_years:
+        tmp = tempfile.TemporaryDirectory(prefix="backtest-")
+        datadir = tmp.name
+        count = int(args.synthetic_years * 365 * 86400 / timeframe_seconds(args.timeframe))
+        store = CandleStore(datadir)
+        for i, pair in enumerate(pairs):
+            store.write(pair, args.timeframe, synthetic_ohlcv(count, args.timeframe, seed=i))
+        logger.info(f"{count} candles sintéticos por par em {datadir}")
+
+    if args.sweep:
+        results = sweep(args.strategy, _parse_sweep(args.sweep), datadir, pairs, args.timeframe,
+                        args.mode, args.fee, args.slippage, args.workers)
+    else:
+        backtester = Backtester(load_pairs(datadir, pairs, args.timeframe), args.timeframe, args.fee, args.slippage)
+        results = [backtester.run(load_strategy_class(args.strategy)(), args.mode)]
+    print(json.dumps(results, indent=2, ensure_ascii=False))
+    if tmp is not None:
+        tmp.cleanup()
@@ -0,0 +1,321 @@
+"""Cache local de candles OHLCV do datadir, um arquivo mmap por par e timeframe.
+
+Cada arquivo é uma sequência de registros fixos (OHLCV_DTYPE), um slot por
+candle: o slot i é o candle que abre em start + i * timeframe. O índice
+(candles.index.json) guarda o start e a quantidade de slots de cada
+arquivo, então ler um intervalo é só calcular o offset e mapear aqueles
+bytes, sem ler o arquivo inteiro.
+
+Slot com timestamp 0 é buraco (nunca baixado). Slot baixado em que a
+exchange não tinha candle fica com o timestamp preenchido e close NaN, para
+não ser pedido de novo. Isso só vale para buracos entre candles que a
+exchange devolveu: o que vem depois do último candle recebido (página que
+falhou, candle ainda não publicado) continua buraco e é pedido de novo. A
+exceção é um buraco que já tem slot baixado logo depois: se a exchange não
+devolve nada para ele (manutenção, par ainda não listado), ele é marcado.
+
+Uso: python candle_store.py status [--datadir DIR]
+"""
+import os
+import json
+import time
+import logging
+import argparse
+import tempfile
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DATADIR = os.getenv("TRADING_DATADIR", "/app/user_data/data")
+# Janela baixada/mantida no start do bot
+HISTORY_DAYS = float(os.getenv("TRADING_CANDLE_HISTORY_DAYS", "30"))
+
+OHLCV_DTYPE = np.dtype([
+    ("timestamp", np.int64),  # ms, abertura do candle
+    ("open", np.float64),
+    ("high", np.float64),
+    ("low", np.float64),
+    ("close", np.float64),
+    ("volume", np.float64),
+])
+OHLCV_FIELDS = OHLCV_DTYPE.names
+
+TIMEFRAME_SECONDS = {"m": 60, "h": 3600, "d": 86400}
+
+# fetch(pair, timeframe, since_ms, until_ms) -> candles [[ts, o, h, l, c, v], ...] ou array OHLCV_DTYPE
+Fetcher = Callable[[str, str, int, int], Iterable]
+
+
+def timeframe_seconds(timeframe: str) -> int:
+    return int(timeframe[:-1]) * TIMEFRAME_SECONDS[timeframe[-1]]
+
+
+def as_candles(rows) -> np.ndarray:
+    """Lista [[ts, o, h, l, c, v], ...] (formato do ccxt) -> array OHLCV_DTYPE"""
+    if isinstance(rows, np.ndarray) and rows.dtype == OHLCV_DTYPE:
+        return rows
+    rows = np.asarray(rows, dtype=np.float64).reshape(-1, len(OHLCV_FIELDS))
+    candles = np.empty(len(rows), dtype=OHLCV_DTYPE)
+    for column, field in enumerate(OHLCV_FIELDS):
+        candles[field] = rows[:, column]
+    return candles
+
+
+def align(candles_by_pair: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """Junta os pares numa grade de tempo comum: campos viram matrizes (candles × pares).
+
+    Preços são repetidos nos buracos de um par (forward-fill) e ficam NaN
+    antes do primeiro candle dele; volume é 0 onde o par não teve candle.
+    """
+    pairs = list(candles_by_pair)
+    stamps = [np.asarray(candles_by_pair[p]["timestamp"]) for p in pairs]
+    timestamps = stamps[0] if len(stamps) == 1 else np.unique(np.concatenate(stamps))
+    ohlcv = {"timestamp": timestamps}
+    for field in OHLCV_FIELDS[1:]:
+        ohlcv[field] = np.full((len(timestamps), len(pairs)), 0.0 if field == "volume" else np.nan)
+    for column, (pair, ts) in enumerate(zip(pairs, stamps)):
+        if not len(ts):
+            continue
+        candles = candles_by_pair[pair]
+        index = np.searchsorted(ts, timestamps, side="right") - 1
+        exists = index >= 0
+        exact = exists & (ts[np.maximum(index, 0)] == timestamps)
+        for field in OHLCV_FIELDS[1:]:
+            values = np.asarray(candles[field])[np.maximum(index, 0)]
+            if field == "volume":
+                ohlcv[field][:, column] = np.where(exact, values, 0.0)
+            else:
+                ohlcv[field][:, column] = np.where(exists, values, np.nan)
+    ohlcv["pairs"] = pairs
+    return ohlcv
+
+
+def exchange_fetcher(exchange) -> Fetcher:
+    """Fetcher sobre a exchange do Freqtrade (paginação e rate limit ficam com ela)"""
+    from freqtrade.enums import CandleType
+
+    def fetch(pair: str, timeframe: str, since_ms: int, until_ms: int):
+        return exchange.get_historic_ohlcv(
+            pair=pair, timeframe=timeframe, since_ms=since_ms, until_ms=until_ms, candle_type=CandleType.SPOT,
+        )
+    return fetch
+
+
+class CandleStore:
+    def __init__(self, root: str = DATADIR):
+        self.root = root
+        self.index_path = os.path.join(root, "candles.index.json")
+        try:
+            with open(self.index_path, encoding="utf-8") as f:
+                self.index: Dict[str, dict] = json.load(f)
+        except FileNotFoundError:
+            self.index = {}
+
+    @staticmethod
+    def key(pair: str, timeframe: str) -> str:
+        return f"{pair.replace('/', '_')}-{timeframe}"
+
+    def path(self, pair: str, timeframe: str) -> str:
+        return os.path.join(self.root, f"{self.key(pair, timeframe)}.candles")
+
+    def _save_index(self):
+        os.makedirs(self.root, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.root, prefix=".index-")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(self.index, f, indent=2)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self.index_path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    def info(self, pair: str, timeframe: str) -> Optional[dict]:
+        return self.index.get(self.key(pair, timeframe))
+
+    # escrita
+    def write(self, pair: str, timeframe: str, candles) -> int:
+        """Grava candles nos seus slots (sobrescreve os existentes); retorna quantos foram gravados"""
+        candles = as_candles(candles)
+        if not len(candles):
+            return 0
+        step = timeframe_seconds(timeframe) * 1000
+        stamps = candles["timestamp"] - candles["timestamp"] % step
+        info = self._ensure_slots(pair, timeframe, int(stamps.min()), int(stamps.max()), step)
+        data = np.memmap(self.path(pair, timeframe), dtype=OHLCV_DTYPE, mode="r+", shape=(info["slots"],))
+        slots = (stamps - info["start"]) // step
+        data[slots] = candles
+        data["timestamp"][slots] = stamps
+        data.flush()
+        del data
+        return len(candles)
+
+    def mark_fetched(self, pair: str, timeframe: str, start: int, end: int):
+        """Slots ainda vazios em [start, end] viram 'sem candle na exchange' (timestamp, close NaN)"""
+        step = timeframe_seconds(timeframe) * 1000
+        start, end = start - start % step, end - end % step
+        info = self._ensure_slots(pair, timeframe, start, end, step)
+        data = np.memmap(self.path(pair, timeframe), dtype=OHLCV_DTYPE, mode="r+", shape=(info["slots"],))
+        lo, hi = (start - info["start"]) // step, (end - info["start"]) // step + 1
+        window = data[lo:hi]
+        empty = np.flatnonzero(window["timestamp"] == 0)
+        if len(empty):
+            filler = np.zeros(len(empty), dtype=OHLCV_DTYPE)
+            filler["timestamp"] = start + empty * step
+            for field in ("open", "high", "low", "close"):
+                filler[field] = np.nan
+            window[empty] = filler
+            data.flush()
+        del window, data
+
+    def _ensure_slots(self, pair: str, timeframe: str, first: int, last: int, step: int) -> dict:
+        """Garante slots para [first, last]: cresce o arquivo no fim ou reescreve com start anterior"""
+        key = self.key(pair, timeframe)
+        path = self.path(pair, timeframe)
+        info = self.index.get(key)
+        os.makedirs(self.root, exist_ok=True)
+        if info is None:
+            info = {"start": first, "slots": 0, "timeframe": timeframe}
+            open(path, "wb").close()
+        if first < info["start"]:
+            # Raro (histórico mais antigo que o início do arquivo): reescreve deslocando os slots
+            shift = (info["start"] - first) // step
+            old = np.fromfile(path, dtype=OHLCV_DTYPE, count=info["slots"])
+            fd, tmp = tempfile.mkstemp(dir=self.root, prefix=".candles-")
+            with os.fdopen(fd, "wb") as f:
+                f.truncate((shift + info["slots"]) * OHLCV_DTYPE.itemsize)
+                f.seek(shift * OHLCV_DTYPE.itemsize)
+                old.tofile(f)
+            os.replace(tmp, path)
+            info = {**info, "start": first, "slots": shift + info["slots"]}
+        needed = (last - info["start"]) // step + 1
+        if needed > info["slots"]:
+            # truncate estende com zeros (esparso): slots novos nascem como buraco
+            os.truncate(path, needed * OHLCV_DTYPE.itemsize)
+            info = {**info, "slots": needed}
+        if self.index.get(key) != info:
+            self.index[key] = info
+            self._save_index()
+        return info
+
+    # leitura
+    def _window(self, pair: str, timeframe: str, start: Optional[int], end: Optional[int]):
+        """memmap só dos slots do intervalo (None se o par não tem arquivo)"""
+        info = self.info(pair, timeframe)
+        if info is None or not info["slots"]:
+            return None, 0
+        step = timeframe_seconds(timeframe) * 1000
+        lo = 0 if start is None else max(0, -(-(start - info["start"]) // step))
+        hi = info["slots"] if end is None else min(info["slots"], (end - info["start"]) // step + 1)
+        if hi <= lo:
+            return np.zeros(0, dtype=OHLCV_DTYPE), info["start"] + lo * step
+        data = np.memmap(self.path(pair, timeframe), dtype=OHLCV_DTYPE, mode="r",
+                         offset=lo * OHLCV_DTYPE.itemsize, shape=(hi - lo,))
+        return data, info["start"] + lo * step
+
+    def read(self, pair: str, timeframe: str, start: Optional[int] = None, end: Optional[int] = None) -> np.ndarray:
+        """Candles existentes em [start, end] (ms), em ordem; buracos e slots vazios ficam de fora"""
+        window, _ = self._window(pair, timeframe, start, end)
+        if window is None:
+            return np.zeros(0, dtype=OHLCV_DTYPE)
+        keep = (window["timestamp"] != 0) & ~np.isnan(window["close"])
+        return np.array(window[keep])
+
+    def tail(self, pair: str, timeframe: str, count: int, end: Optional[int] = None) -> np.ndarray:
+        """Últimos `count` slots até `end` (warm-up de indicadores)"""
+        info = self.info(pair, timeframe)
+        if info is None:
+            return np.zeros(0, dtype=OHLCV_DTYPE)
+        step = timeframe_seconds(timeframe) * 1000
+        last = info["start"] + (info["slots"] - 1) * step if end is None else end
+        return self.read(pair, timeframe, last - (count - 1) * step, last)
+
+    def window(self, pairs: Iterable[str], timeframe: str, count: int, end: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """Últimos `count` candles de cada par, alinhados (ver align)"""
+        return align({pair: self.tail(pair, timeframe, count, end) for pair in pairs})
+
+    def _has_slot(self, pair: str, timeframe: str, timestamp: int) -> bool:
+        window, _ = self._window(pair, timeframe, timestamp, timestamp)
+        return window is not None and len(window) > 0 and window["timestamp"][0] != 0
+
+    def missing_ranges(self, pair: str, timeframe: str, start: int, end: int) -> List[Tuple[int, int]]:
+        """Intervalos [ini, fim] (ms, inclusivos) de slots nunca baixados dentro de [start, end]"""
+        step = timeframe_seconds(timeframe) * 1000
+        start, end = start - start % step, end - end % step
+        if end < start:
+            return []
+        expected = (end - start) // step + 1
+        missing = np.ones(expected, dtype=bool)
+        window, window_start = self._window(pair, timeframe, start, end)
+        if window is not None and len(window):
+            offset = (window_start - start) // step
+            missing[offset:offset + len(window)] = window["timestamp"] == 0
+        # bordas dos trechos contíguos de True
+        edges = np.flatnonzero(np.diff(np.concatenate([[False], missing, [False]]).astype(np.int8)))
+        return [(start + int(a) * step, start + (int(b) - 1) * step) for a, b in zip(edges[::2], edges[1::2])]
+
+    def update(self, pair: str, timeframe: str, fetch: Fetcher, start: int, end: Optional[int] = None) -> int:
+        """Baixa só o que falta em [start, end] (fim do arquivo e buracos no meio); retorna candles gravados"""
+        step = timeframe_seconds(timeframe) * 1000
+        if end is None:
+            # o candle em formação ainda muda: só até o último fechado
+            end = int(time.time() * 1000) // step * step - step
+        written = 0
+        for since, until in self.missing_ranges(pair, timeframe, start, end):
+            candles = as_candles(fetch(pair, timeframe, since, until + step))
+            candles = candles[(candles["timestamp"] >= since) & (candles["timestamp"] <= until)]
+            if not len(candles):
+                # Com candle já baixado depois do buraco a exchange publicou além dele: o vazio é definitivo
+                if self._has_slot(pair, timeframe, until + step):
+                    self.mark_fetched(pair, timeframe, since, until)
+                continue
+            written += self.write(pair, timeframe, candles)
+            # Só até o último candle recebido: depois dele pode ser página que falhou
+            # ou candle ainda não publicado, não "exchange sem candle"
+            self.mark_fetched(pair, timeframe, since, int(candles["timestamp"].max()))
+        if written:
+            logger.info(f"Candles {pair} {timeframe}: {written} novos")
+        return written
+
+    def sync(self, pairs: Iterable[str], timeframe: str, fetch: Fetcher, days: float = HISTORY_DAYS,
+             end: Optional[int] = None) -> Dict[str, int]:
+        """Mantém os últimos `days` dias de todos os pares"""
+        now = int(time.time() * 1000) if end is None else end
+        start = now - int(days * 86400 * 1000)
+        result = {}
+        for pair in pairs:
+            try:
+                result[pair] = self.update(pair, timeframe, fetch, start, end)
+            except Exception as e:
+                logger.error(f"Erro ao atualizar candles de {pair}: {e}")
+                result[pair] = 0
+        return result
+
+
+def warm_up(strategy, store: CandleStore, pairs: Iterable[str], timeframe: str) -> int:
+    """Aquece os indicadores da estratégia com os últimos candles do cache; retorna quantos usou"""
+    count = getattr(strategy, "warmup_candles", 0)
+    if not count or not hasattr(strategy, "warmup"):
+        return 0
+    ohlcv = store.window(pairs, timeframe, count)
+    if not len(ohlcv["timestamp"]):
+        return 0
+    strategy.warmup(ohlcv)
+    return len(ohlcv["timestamp"])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cache local de candles")
+    parser.add_argument("command", choices=["status"])
+    parser.add_argument("--datadir", default=DATADIR)
+    args = parser.parse_args()
+    store = CandleStore(args.datadir)
+    for key, info in sorted(store.index.items()):
+        step = timeframe_seconds(info["timeframe"]) * 1000
+        last = info["start"] + (info["slots"] - 1) * step
+        print(f"{key}: {info['slots']} slots, "
+              f"{time.strftime('%Y-%m-%d %H:%M', time.gmtime(info['start'] / 1000))} -> "
+              f"{time.strftime('%Y-%m-%d %H:%M', time.gmtime(last / 1000))}")
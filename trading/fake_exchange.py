@@ -0,0 +1,95 @@
+"""Exchange falsa para testes: stream websocket no formato bookTicker da Binance.
+
+Aceita /stream?streams=btcusdt@bookTicker/ethusdt@bookTicker (stream combinado)
+e publica, para cada símbolo pedido, um passeio aleatório de bid/ask.
+
+Uso: python fake_exchange.py [--port 9443] [--rate 20]
+"""
+import json
+import random
+import asyncio
+import argparse
+import threading
+from typing import Dict, Iterable, Optional
+from urllib.parse import parse_qs, urlparse
+
+from websockets.asyncio.server import serve
+
+DEFAULT_PRICES = {"btcusdt": 60000.0, "ethusdt": 3000.0, "adausdt": 0.45}
+
+
+class FakeExchange:
+    """Servidor websocket que envia `rate` atualizações por segundo por símbolo"""
+
+    def __init__(self, prices: Optional[Dict[str, float]] = None, rate: float = 20.0, seed: int = 42):
+        self.prices = dict(prices or DEFAULT_PRICES)
+        self.rate = rate
+        self.random = random.Random(seed)
+        self.update_id = 0
+        self.port: Optional[int] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._stop: Optional[asyncio.Event] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def book_ticker(self, symbol: str) -> dict:
+        price = self.prices.setdefault(symbol, 100.0)
+        price *= 1 + self.random.gauss(0, 0.0005)
+        self.prices[symbol] = price
+        spread = price * 0.0001
+        self.update_id += 1
+        return {
+            "u": self.update_id,
+            "s": symbol.upper(),
+            "b": f"{price - spread:.8f}",
+            "B": f"{self.random.uniform(0.1, 5):.8f}",
+            "a": f"{price + spread:.8f}",
+            "A": f"{self.random.uniform(0.1, 5):.8f}",
+        }
+
+    @staticmethod
+    def requested_symbols(path: str) -> Iterable[str]:
+        streams = parse_qs(urlparse(path).query).get("streams", [""])[0]
+        return [s.split("@")[0] for s in streams.split("/") if s.endswith("@bookTicker")]
+
+    async def handler(self, websocket):
+        symbols = self.requested_symbols(websocket.request.path)
+        interval = 1.0 / self.rate
+        while True:
+            for symbol in symbols:
+                message = {"stream": f"{symbol}@bookTicker", "data": self.book_ticker(symbol)}
+                await websocket.send(json.dumps(message))
+            await asyncio.sleep(interval)
+
+    async def serve(self, host: str = "127.0.0.1", port: int = 0, ready: Optional[threading.Event] = None):
+        self._loop = asyncio.get_running_loop()
+        self._stop = asyncio.Event()
+        async with serve(self.handler, host, port) as server:
+            self.port = next(iter(server.sockets)).getsockname()[1]
+            if ready is not None:
+                ready.set()
+            await self._stop.wait()
+
+    def start(self) -> int:
+        """Sobe o servidor numa thread (para testes) e retorna a porta"""
+        ready = threading.Event()
+        self._thread = threading.Thread(target=lambda: asyncio.run(self.serve(ready=ready)), daemon=True)
+        self._thread.start()
+        ready.wait(timeout=5)
+        return self.port
+
+    def stop(self):
+        if self._loop is not None and self._stop is not None:
+            self._loop.call_soon_threadsafe(self._stop.set)
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=9443)
+    parser.add_argument("--rate", type=float, default=20.0)
+    args = parser.parse_args()
+    print(f"Exchange falsa em ws://{args.host}:{args.port}/stream")
+    asyncio.run(FakeExchange(rate=args.rate).serve(args.host, args.port))
@@ -0,0 +1,216 @@
+"""Indicadores incrementais: cada tick atualiza o estado em O(1), sem recalcular a janela.
+
+Todos aceitam um escalar (um par) ou um array com um valor por par, e então
+atualizam todos os pares de uma vez com NumPy. NaN num par significa "sem
+tick novo": o estado daquele par fica como estava.
+
+    ema = EMA(20)
+    for batch in batches:
+        valores = ema.update(batch["last"])   # array (n_pares,)
+"""
+import numpy as np
+
+
+def _as_array(value):
+    return np.asarray(value, dtype=np.float64)
+
+
+def _result(values, scalar: bool):
+    return float(values) if scalar else values
+
+
+def ema_series(values, period: int) -> np.ndarray:
+    """EMA de uma série inteira (eixo 0 = tempo), igual a alimentar EMA(period) tick a tick.
+
+    Vetorizada em blocos: dentro de cada bloco a recorrência vira uma soma
+    cumulativa ponderada por d^-k (d = 1 - alpha); o tamanho do bloco mantém
+    d^-k longe do overflow. NaN só é aceito no começo da série (par que ainda
+    não existia): esses pontos repetem o primeiro valor válido.
+    """
+    x = np.array(values, dtype=np.float64)
+    if x.size == 0:
+        return x
+    flat = x.reshape(x.shape[0], -1)
+    first = np.argmax(~np.isnan(flat), axis=0)
+    columns = np.arange(flat.shape[1])
+    leading = np.arange(flat.shape[0])[:, None] < first
+    flat[leading] = np.broadcast_to(flat[first, columns], flat.shape)[leading]
+
+    alpha = 2.0 / (period + 1)
+    decay = 1.0 - alpha
+    block = int(min(4096, max(1, 500 // max(-np.log(decay), 1e-12)))) if decay > 0 else 1
+    k = np.arange(block, dtype=np.float64)[:, None]
+    inverse = decay ** -k
+    forward = decay ** k
+    out = np.empty_like(flat)
+    previous = flat[0].copy()
+    for start in range(0, flat.shape[0], block):
+        chunk = flat[start:start + block]
+        n = chunk.shape[0]
+        acc = np.cumsum(chunk * inverse[:n], axis=0)
+        out[start:start + n] = forward[:n] * decay * previous + alpha * forward[:n] * acc
+        previous = out[start + n - 1]
+    return out.reshape(x.shape)
+
+
+class Indicator:
+    """Base: estado por par criado no primeiro update, com contagem de ticks"""
+
+    def __init__(self, period: int):
+        if period < 1:
+            raise ValueError("period deve ser >= 1")
+        self.period = period
+        self.count = None
+        self.value = None
+
+    def _init_state(self, shape):
+        self.count = np.zeros(shape, dtype=np.int64)
+        self.value = np.full(shape, np.nan)
+
+    def _prepare(self, x):
+        x = _as_array(x)
+        if self.count is None:
+            self._init_state(x.shape)
+        elif x.shape != self.count.shape:
+            raise ValueError(f"esperado shape {self.count.shape}, recebido {x.shape}")
+        return x, ~np.isnan(x)
+
+    @property
+    def ready(self):
+        """True para os pares que já viram `period` ticks"""
+        if self.count is None:
+            return False
+        return self.count >= self.period
+
+    def reset(self):
+        self.count = None
+        self.value = None
+
+
+class EMA(Indicator):
+    """Média móvel exponencial (alpha = 2 / (period + 1)), semeada com o primeiro valor"""
+
+    def __init__(self, period: int):
+        super().__init__(period)
+        self.alpha = 2.0 / (period + 1)
+
+    def update(self, x):
+        x, mask = self._prepare(x)
+        first = mask & (self.count == 0)
+        self.value = np.where(first, x, self.value)
+        rest = mask & ~first
+        self.value = np.where(rest, self.value + self.alpha * (x - self.value), self.value)
+        self.count = self.count + mask
+        return _result(self.value, x.ndim == 0)
+
+
+class RSI(Indicator):
+    """RSI de Wilder. Nos primeiros `period` ticks a suavização vira média simples
+    (alpha = 1/n), o que reproduz a semente clássica sem guardar a janela."""
+
+    def _init_state(self, shape):
+        super()._init_state(shape)
+        self.previous = np.full(shape, np.nan)
+        self.avg_gain = np.zeros(shape)
+        self.avg_loss = np.zeros(shape)
+
+    def update(self, x):
+        x, mask = self._prepare(x)
+        has_previous = mask & ~np.isnan(self.previous)
+        change = np.where(has_previous, x - self.previous, 0.0)
+        # count conta variações (não preços)
+        count = self.count + has_previous
+        alpha = np.where(has_previous, 1.0 / np.minimum(np.maximum(count, 1), self.period), 0.0)
+        self.avg_gain += alpha * (np.maximum(change, 0.0) - self.avg_gain)
+        self.avg_loss += alpha * (np.maximum(-change, 0.0) - self.avg_loss)
+        self.count = count
+        self.previous = np.where(mask, x, self.previous)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rs = self.avg_gain / self.avg_loss
+            rsi = np.where(self.avg_loss == 0, np.where(self.avg_gain == 0, 50.0, 100.0), 100.0 - 100.0 / (1.0 + rs))
+        self.value = np.where(count > 0, rsi, np.nan)
+        return _result(self.value, x.ndim == 0)
+
+
+class _Window(Indicator):
+    """Janela circular de `period` ticks por par (cada par anda no seu ritmo)"""
+
+    def _init_state(self, shape):
+        super()._init_state(shape)
+        self.buffer = np.zeros((self.period,) + tuple(shape))
+        self.position = np.zeros(shape, dtype=np.int64)
+
+    def _push(self, x, mask):
+        """Grava x no slot de cada par e devolve o valor que saiu (0 enquanto a janela enche
+        e para pares sem tick, cuja janela não anda)"""
+        slot = self.position
+        full = self.count >= self.period
+        if x.ndim == 0:
+            old = self.buffer[slot] if full and mask else 0.0
+            if mask:
+                self.buffer[slot] = x
+            old = np.float64(old)
+        else:
+            columns = np.arange(x.shape[0])
+            old = np.where(mask & full, self.buffer[slot, columns], 0.0)
+            self.buffer[slot[mask], columns[mask]] = x[mask]
+        self.position = np.where(mask, (self.position + 1) % self.period, self.position)
+        return old, full
+
+
+class RollingStd(_Window):
+    """Desvio padrão populacional dos últimos `period` valores (Welford com remoção)"""
+
+    def _init_state(self, shape):
+        super()._init_state(shape)
+        self.mean = np.zeros(shape)
+        self.m2 = np.zeros(shape)
+
+    def update(self, x):
+        x, mask = self._prepare(x)
+        x0 = np.where(mask, x, 0.0)
+        old, full = self._push(x0, mask)
+        replace = mask & full
+        grow = mask & ~full
+
+        n = np.where(grow, self.count + 1, np.minimum(self.count, self.period))
+        delta = x0 - self.mean
+        mean_grow = self.mean + np.where(grow, delta / np.maximum(n, 1), 0.0)
+        mean_replace = self.mean + np.where(replace, (x0 - old) / self.period, 0.0)
+        new_mean = np.where(grow, mean_grow, np.where(replace, mean_replace, self.mean))
+        self.m2 = self.m2 + np.where(grow, delta * (x0 - new_mean), 0.0) \
+            + np.where(replace, (x0 - old) * (x0 - new_mean + old - self.mean), 0.0)
+        self.m2 = np.maximum(self.m2, 0.0)
+        self.mean = new_mean
+        self.count = self.count + mask
+        n = np.minimum(self.count, self.period)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            self.value = np.where(n > 0, np.sqrt(self.m2 / n), np.nan)
+        return _result(self.value, x.ndim == 0)
+
+
+class VWAP(_Window):
+    """Preço médio ponderado por volume dos últimos `period` ticks"""
+
+    def _init_state(self, shape):
+        super()._init_state(shape)
+        self.volumes = _Window(self.period)
+        self.volumes._init_state(shape)
+        self.pv = np.zeros(shape)
+        self.volume = np.zeros(shape)
+
+    def update(self, price, volume):
+        price, mask = self._prepare(price)
+        volume = _as_array(volume)
+        mask = mask & ~np.isnan(volume)
+        pv = np.where(mask, price * volume, 0.0)
+        v = np.where(mask, volume, 0.0)
+        old_pv, _ = self._push(pv, mask)
+        self.volumes.count = self.count
+        old_v, _ = self.volumes._push(v, mask)
+        self.pv = self.pv + pv - old_pv
+        self.volume = self.volume + v - old_v
+        self.count = self.count + mask
+        with np.errstate(divide="ignore", invalid="ignore"):
+            self.value = np.where(self.volume > 0, self.pv / self.volume, np.nan)
+        return _result(self.value, price.ndim == 0)
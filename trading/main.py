@@ -6,6 +6,11 @@ from freqtrade.configuration import Configuration
 from fastapi import FastAPI
 import threading
 
+from candle_store import HISTORY_DAYS, CandleStore, exchange_fetcher, warm_up
+from market_stream import STREAM_URL, MarketStream, StrategyDispatcher, TickerSnapshot
+from strategy import BaseStrategy, BatchStrategy, ExampleStrategy, MarketBatch  # noqa: F401 - API de plugins
+from strategy_runner import STRATEGIES, StrategyRunner, load_strategy_class, parse_strategies
+
 # Configurar logging para arquivo e stdout
 log_dir = '/app/logs'
 os.makedirs(log_dir, exist_ok=True)
@@ -27,23 +32,16 @@ app = FastAPI(title="Trading Service", version="1.0.0")
 def health():
     return {"status": "healthy", "timestamp": time.strftime("%Y-%m-%d %H:%M:%S")}
 
-# Estrutura de plugin de estratégia
-class BaseStrategy:
-    def analyze(self, ticker_data):
-        raise NotImplementedError
-
-class ExampleStrategy(BaseStrategy):
-    def analyze(self, ticker_data):
-        # Exemplo: logar o preço do primeiro par
-        if ticker_data:
-            pair, data = next(iter(ticker_data.items()))
-            logger.info(f"[Plugin] Par: {pair}, Preço: {data.get('last', 'N/A')}")
-
 class SuperBotTrading:
     def __init__(self):
         self.config = self._load_config()
         self.freqtrade = None
-        self.strategy = ExampleStrategy()  # Carregar plugin de estratégia
+        self.strategies = []  # Carregadas no start() (ver _load_strategies)
+        self.strategy_runner = None
+        self.signals = {}
+        self.candle_store = None
+        self.market_stream = None
+        self.dispatcher = None
     
     def _load_config(self):
         """Carrega configuração básica do Freqtrade"""
@@ -67,7 +65,22 @@ class SuperBotTrading:
                 'ADA/USDT',
             ],
             'pair_blacklist': [],
+            # 'stream' (websocket bookTicker) ou 'poll' (get_tickers a cada 60s)
+            'market_data': {
+                'mode': os.getenv('TRADING_MARKET_DATA', 'stream'),
+                'stream_url': STREAM_URL,
+            },
+            # Plugins "modulo:Classe"; 'process' roda cada um num worker, 'inline' na thread do bot
+            'strategies': {
+                'plugins': parse_strategies(STRATEGIES),
+                'isolation': os.getenv('TRADING_STRATEGY_ISOLATION', 'process'),
+            },
             'datadir': '/app/user_data/data',
+            # Cache local de candles da whitelist (ver candle_store.py)
+            'candles': {
+                'timeframe': os.getenv('TRADING_TIMEFRAME', '1m'),
+                'history_days': HISTORY_DAYS,
+            },
             'user_data_dir': '/app/user_data',
             'strategy': 'SuperBotStrategy',
             'strategy_path': '/app/user_data/strategies',
@@ -87,7 +100,14 @@ class SuperBotTrading:
             
             logger.info("Bot de trading inicializado com sucesso!")
             
-            # Loop principal
+            self._sync_candles()
+            self.strategies = self._load_strategies()
+            
+            if self.config['market_data']['mode'] == 'stream':
+                self._run_stream()
+                return
+            
+            # Loop principal (modo polling)
             while True:
                 try:
                     # Executar análise de mercado
@@ -98,6 +118,7 @@ class SuperBotTrading:
                     
                 except KeyboardInterrupt:
                     logger.info("Parando bot de trading...")
+                    self.stop_strategies()
                     break
                 except Exception as e:
                     logger.error(f"Erro no loop principal: {e}")
@@ -106,17 +127,104 @@ class SuperBotTrading:
         except Exception as e:
             logger.error(f"Erro ao inicializar bot: {e}")
     
+    def _sync_candles(self):
+        """Completa o cache de candles do datadir: só baixa os intervalos que faltam"""
+        self.candle_store = CandleStore(self.config['datadir'])
+        candles = self.config['candles']
+        try:
+            written = self.candle_store.sync(
+                self.config['pair_whitelist'], candles['timeframe'],
+                exchange_fetcher(self.freqtrade.exchange), candles['history_days'],
+            )
+            logger.info(f"Cache de candles atualizado: {sum(written.values())} candles novos")
+        except Exception as e:
+            logger.error(f"Erro ao atualizar cache de candles: {e}")
+    
+    def _load_strategies(self):
+        """Carrega os plugins configurados (num StrategyRunner no modo 'process'), já aquecidos
+        com os últimos candles do cache local"""
+        plugins = self.config['strategies']['plugins']
+        pairs = self.config['pair_whitelist']
+        timeframe = self.config['candles']['timeframe']
+        if self.config['strategies']['isolation'] == 'process':
+            self.strategy_runner = StrategyRunner(
+                pairs, plugins, on_signals=self._on_signals, warmup=(self.config['datadir'], timeframe)
+            )
+            self.strategy_runner.start()
+            return [self.strategy_runner]
+        strategies = [load_strategy_class(plugin)() for plugin in plugins]
+        store = self.candle_store or CandleStore(self.config['datadir'])
+        for strategy in strategies:
+            try:
+                used = warm_up(strategy, store, pairs, timeframe)
+                if used:
+                    logger.info(f"{type(strategy).__name__} aquecida com {used} candles")
+            except Exception as e:
+                logger.error(f"Erro no warm-up de {type(strategy).__name__}: {e}")
+        return strategies
+    
+    def _on_signals(self, result):
+        """Sinais agregados dos workers de estratégia a cada tick"""
+        self.signals = result['consensus']
+        if result['timeouts']:
+            logger.warning(f"Estratégias fora do orçamento de tempo: {', '.join(result['timeouts'])}")
+        if self.signals:
+            logger.info(f"Sinais (consenso): {self.signals}")
+    
+    def stop_strategies(self):
+        if self.strategy_runner:
+            self.strategy_runner.stop()
+            self.strategy_runner = None
+    
+    def start_stream(self):
+        """Liga o stream de mercado e o despacho para as estratégias"""
+        pairs = self.config['pair_whitelist']
+        snapshot = TickerSnapshot(pairs)
+        self.dispatcher = StrategyDispatcher(self.strategies, snapshot)
+        self.market_stream = MarketStream(
+            pairs, snapshot, on_change=self.dispatcher.notify, url=self.config['market_data']['stream_url']
+        )
+        self.dispatcher.start()
+        self.market_stream.start()
+    
+    def stop_stream(self):
+        if self.market_stream:
+            self.market_stream.stop()
+        if self.dispatcher:
+            self.dispatcher.stop()
+    
+    def _run_stream(self):
+        """Modo stream: as estratégias são avaliadas a cada mudança de bid/ask"""
+        self.start_stream()
+        try:
+            while True:
+                time.sleep(60)
+                logger.info(
+                    f"Stream: {self.market_stream.messages} mensagens, "
+                    f"{self.dispatcher.evaluations} avaliações de estratégia"
+                )
+        except KeyboardInterrupt:
+            logger.info("Parando bot de trading...")
+        finally:
+            self.stop_stream()
+            self.stop_strategies()
+    
     def _analyze_market(self):
         """Analisa mercado e executa trades"""
         try:
             # Obter dados de mercado
             ticker_data = self.freqtrade.exchange.get_tickers()
             
+            # Só os pares que operamos
+            whitelist = set(self.config['pair_whitelist'])
+            ticker_data = {pair: data for pair, data in ticker_data.items() if pair in whitelist}
+            
             # Log básico
             logger.info(f"Analisando {len(ticker_data)} pares de trading")
             
-            # Chamar plugin de estratégia
-            self.strategy.analyze(ticker_data)
+            # Chamar plugins de estratégia
+            for strategy in self.strategies:
+                strategy.analyze(ticker_data)
             
         except Exception as e:
             logger.error(f"Erro na análise de mercado: {e}")
@@ -0,0 +1,252 @@
+import os
+import json
+import time
+import asyncio
+import logging
+import threading
+from typing import Callable, Dict, Iterable, List, Optional
+
+import numpy as np
+from websockets.asyncio.client import connect
+
+from strategy import FIELDS, MarketBatch
+
+logger = logging.getLogger(__name__)
+
+STREAM_URL = os.getenv("TRADING_STREAM_URL", "wss://stream.binance.com:9443")
+
+
+def stream_symbol(pair: str) -> str:
+    """'BTC/USDT' -> 'btcusdt' (nome do símbolo nos streams da Binance)"""
+    return pair.replace("/", "").lower()
+
+
+class TickerSnapshot:
+    """Último bid/ask de cada par da whitelist, no formato de get_tickers()
+    e também em colunas (MarketBatch) para estratégias vetorizadas"""
+
+    def __init__(self, pairs: Iterable[str]):
+        self.pairs = list(pairs)
+        self._index = {pair: i for i, pair in enumerate(self.pairs)}
+        self._columns = np.full((len(self.pairs), len(FIELDS)), np.nan)
+        self._tickers: Dict[str, dict] = {}
+        self._update_ids: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def update(self, pair: str, bid: float, ask: float, bid_volume: float, ask_volume: float,
+               update_id: Optional[int] = None, timestamp: Optional[float] = None) -> bool:
+        """Aplica uma atualização; retorna False se for antiga ou não mudar o topo do livro"""
+        with self._lock:
+            if update_id is not None:
+                if update_id <= self._update_ids.get(pair, -1):
+                    return False
+                self._update_ids[pair] = update_id
+            current = self._tickers.get(pair)
+            if current is not None and current["bid"] == bid and current["ask"] == ask \
+                    and current["bidVolume"] == bid_volume and current["askVolume"] == ask_volume:
+                return False
+            ticker = self._tickers[pair] = {
+                "symbol": pair,
+                "bid": bid,
+                "ask": ask,
+                "bidVolume": bid_volume,
+                "askVolume": ask_volume,
+                # bookTicker não traz o último negócio: usamos o preço médio
+                "last": (bid + ask) / 2,
+                "timestamp": int((timestamp if timestamp is not None else time.time()) * 1000),
+            }
+            row = self._index.get(pair)
+            if row is not None:
+                self._columns[row] = (bid, ask, ticker["last"], bid_volume, ask_volume, np.nan, ticker["timestamp"])
+            return True
+
+    def reset_sequence(self):
+        """Esquece os update ids (chamado a cada reconexão do stream)"""
+        with self._lock:
+            self._update_ids.clear()
+
+    def tickers(self) -> Dict[str, dict]:
+        """Cópia do snapshot (seguro para a estratégia ler enquanto o stream atualiza)"""
+        with self._lock:
+            return {pair: dict(ticker) for pair, ticker in self._tickers.items()}
+
+    def batch(self) -> MarketBatch:
+        """Cópia colunar do snapshot, na ordem da whitelist"""
+        with self._lock:
+            return MarketBatch(self.pairs, self._columns.copy())
+
+    def get(self, pair: str) -> Optional[dict]:
+        with self._lock:
+            ticker = self._tickers.get(pair)
+            return dict(ticker) if ticker is not None else None
+
+
+class StrategyDispatcher:
+    """Avalia as estratégias a cada mudança do snapshot, respeitando o debounce de cada uma.
+
+    As estratégias rodam numa thread própria, fora do loop do websocket.
+    Atualizações que chegam durante o debounce são agrupadas numa única
+    avaliação ao fim do intervalo (a última mudança nunca é perdida).
+    """
+
+    def __init__(self, strategies: Iterable, snapshot: TickerSnapshot):
+        self.strategies = list(strategies)
+        self.snapshot = snapshot
+        self._pending = [False] * len(self.strategies)
+        self._last_run = [0.0] * len(self.strategies)
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+        self.evaluations = 0
+
+    def notify(self, pair: str = None):
+        with self._cond:
+            for i in range(len(self.strategies)):
+                self._pending[i] = True
+            self._cond.notify()
+
+    def _next_batch(self) -> List[int]:
+        """Espera até alguma estratégia pendente sair do debounce e devolve quais rodar"""
+        with self._cond:
+            while self._running:
+                now = time.monotonic()
+                due, wait = [], None
+                for i, strategy in enumerate(self.strategies):
+                    if not self._pending[i]:
+                        continue
+                    ready_at = self._last_run[i] + getattr(strategy, "debounce_interval", 0.0)
+                    if ready_at <= now:
+                        due.append(i)
+                    else:
+                        wait = ready_at - now if wait is None else min(wait, ready_at - now)
+                if due:
+                    for i in due:
+                        self._pending[i] = False
+                        self._last_run[i] = now
+                    return due
+                self._cond.wait(wait)
+            return []
+
+    def run(self):
+        while self._running:
+            due = self._next_batch()
+            if not due:
+                continue
+            tickers = batch = None
+            for i in due:
+                strategy = self.strategies[i]
+                try:
+                    # Estratégias vetorizadas recebem as colunas direto, sem montar dicts
+                    if hasattr(strategy, "analyze_batch"):
+                        batch = batch if batch is not None else self.snapshot.batch()
+                        strategy.analyze_batch(batch)
+                    else:
+                        tickers = tickers if tickers is not None else self.snapshot.tickers()
+                        strategy.analyze(tickers)
+                except Exception as e:
+                    logger.error(f"Erro na estratégia {type(strategy).__name__}: {e}")
+                self.evaluations += 1
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self.run, name="strategy-dispatcher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        with self._cond:
+            self._running = False
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+
+class MarketStream:
+    """Feed websocket de bookTicker dos pares da whitelist, com reconexão.
+
+    Cada mensagem atualiza o TickerSnapshot e, se o topo do livro mudou,
+    chama on_change(par).
+    """
+
+    def __init__(self, pairs: Iterable[str], snapshot: TickerSnapshot,
+                 on_change: Optional[Callable[[str], None]] = None, url: str = STREAM_URL,
+                 reconnect_delay: float = 1.0, max_reconnect_delay: float = 30.0):
+        self.pairs = list(pairs)
+        self.snapshot = snapshot
+        self.on_change = on_change
+        self.url = url.rstrip("/")
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self._symbols = {stream_symbol(pair).upper(): pair for pair in self.pairs}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional[asyncio.Task] = None
+        self._thread: Optional[threading.Thread] = None
+        self.connected = threading.Event()
+        self.messages = 0
+
+    def stream_url(self) -> str:
+        streams = "/".join(f"{stream_symbol(pair)}@bookTicker" for pair in self.pairs)
+        return f"{self.url}/stream?streams={streams}"
+
+    def handle_message(self, raw) -> bool:
+        message = json.loads(raw)
+        data = message.get("data", message)
+        pair = self._symbols.get(data.get("s", ""))
+        if pair is None:
+            return False
+        self.messages += 1
+        changed = self.snapshot.update(
+            pair,
+            float(data["b"]), float(data["a"]), float(data["B"]), float(data["A"]),
+            update_id=data.get("u"),
+        )
+        if changed and self.on_change is not None:
+            self.on_change(pair)
+        return changed
+
+    async def run(self):
+        delay = self.reconnect_delay
+        while True:
+            try:
+                async with connect(self.stream_url(), ping_interval=20, max_queue=1024) as websocket:
+                    logger.info(f"Stream de mercado conectado: {len(self.pairs)} pares")
+                    self.snapshot.reset_sequence()
+                    self.connected.set()
+                    delay = self.reconnect_delay
+                    async for raw in websocket:
+                        self.handle_message(raw)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Stream de mercado desconectado: {e}; reconectando em {delay:.0f}s")
+            self.connected.clear()
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.max_reconnect_delay)
+
+    def start(self):
+        """Roda o stream num event loop em thread própria"""
+        if self._thread is not None:
+            return
+        self._loop = asyncio.new_event_loop()
+        self._task = self._loop.create_task(self.run())
+
+        def run_loop():
+            asyncio.set_event_loop(self._loop)
+            try:
+                self._loop.run_until_complete(self._task)
+            except asyncio.CancelledError:
+                pass
+            finally:
+                self._loop.close()
+
+        self._thread = threading.Thread(target=run_loop, name="market-stream", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._loop is not None and self._task is not None:
+            self._loop.call_soon_threadsafe(self._task.cancel)
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
@@ -0,0 +1,155 @@
+import logging
+from typing import Dict, Iterable, Mapping, Optional
+
+import numpy as np
+
+from indicators import EMA, ema_series
+
+logger = logging.getLogger(__name__)
+
+# Colunas do MarketBatch e a chave correspondente no ticker do ccxt/get_tickers()
+FIELDS = ("bid", "ask", "last", "bid_volume", "ask_volume", "volume", "timestamp")
+TICKER_KEYS = {
+    "bid": "bid",
+    "ask": "ask",
+    "last": "last",
+    "bid_volume": "bidVolume",
+    "ask_volume": "askVolume",
+    "volume": "baseVolume",
+    "timestamp": "timestamp",
+}
+
+
+class MarketBatch:
+    """Snapshot colunar: matriz (pares × campos) float64, NaN onde não há dado.
+
+    A ordem dos pares é fixa (a da whitelist), então uma estratégia pode manter
+    estado por par em arrays alinhados com batch.pairs.
+    """
+
+    def __init__(self, pairs: Iterable[str], data: Optional[np.ndarray] = None):
+        self.pairs = list(pairs)
+        if data is None:
+            data = np.full((len(self.pairs), len(FIELDS)), np.nan)
+        self.data = data
+
+    @classmethod
+    def from_tickers(cls, tickers: Mapping[str, dict], pairs: Optional[Iterable[str]] = None) -> "MarketBatch":
+        batch = cls(pairs if pairs is not None else tickers.keys())
+        for row, pair in enumerate(batch.pairs):
+            ticker = tickers.get(pair)
+            if not ticker:
+                continue
+            for column, field in enumerate(FIELDS):
+                value = ticker.get(TICKER_KEYS[field])
+                if value is not None:
+                    batch.data[row, column] = value
+        return batch
+
+    def to_tickers(self) -> Dict[str, dict]:
+        """Volta ao formato dict de get_tickers() (pares sem nenhum dado ficam de fora)"""
+        tickers = {}
+        for row, pair in enumerate(self.pairs):
+            values = self.data[row]
+            if np.isnan(values).all():
+                continue
+            ticker = {"symbol": pair}
+            for column, field in enumerate(FIELDS):
+                ticker[TICKER_KEYS[field]] = None if np.isnan(values[column]) else float(values[column])
+            tickers[pair] = ticker
+        return tickers
+
+    def __getitem__(self, field: str) -> np.ndarray:
+        """Coluna de um campo (view, sem cópia)"""
+        return self.data[:, FIELDS.index(field)]
+
+    def __len__(self):
+        return len(self.pairs)
+
+    @property
+    def mid(self) -> np.ndarray:
+        return (self["bid"] + self["ask"]) / 2
+
+
+# Estrutura de plugin de estratégia
+class BaseStrategy:
+    # Intervalo mínimo (s) entre duas avaliações no modo stream; 0 avalia a cada mudança
+    debounce_interval = 0.0
+    # Candles do cache local (CandleStore) usados para aquecer indicadores no start; 0 = sem warm-up
+    warmup_candles = 0
+
+    def analyze(self, ticker_data):
+        raise NotImplementedError
+
+    def warmup(self, ohlcv: Dict[str, np.ndarray]):
+        """Recebe os últimos warmup_candles candles (matrizes candles × pares, na ordem da whitelist)"""
+
+
+class BatchStrategy(BaseStrategy):
+    """Plugin que recebe todos os pares de uma vez como MarketBatch.
+
+    Implemente analyze_batch(); no modo stream o dispatcher entrega o batch
+    direto do snapshot, e no modo polling analyze() converte o dict do
+    get_tickers() para o mesmo formato.
+    """
+
+    def analyze(self, ticker_data):
+        return self.analyze_batch(MarketBatch.from_tickers(ticker_data))
+
+    def analyze_batch(self, batch: MarketBatch):
+        raise NotImplementedError
+
+
+class ExampleStrategy(BaseStrategy):
+    debounce_interval = 1.0
+
+    def analyze(self, ticker_data):
+        # Exemplo: logar o preço do primeiro par
+        if ticker_data:
+            pair, data = next(iter(ticker_data.items()))
+            logger.info(f"[Plugin] Par: {pair}, Preço: {data.get('last', 'N/A')}")
+
+
+class ExampleBatchStrategy(BatchStrategy):
+    """Exemplo vetorizado: cruzamento de EMAs rápida/lenta em todos os pares por tick"""
+
+    debounce_interval = 1.0
+
+    def __init__(self, fast: int = 12, slow: int = 26):
+        self.fast = EMA(fast)
+        self.slow = EMA(slow)
+        self.trend: Optional[np.ndarray] = None
+        self.warmup_candles = slow * 3
+
+    def warmup(self, ohlcv: Dict[str, np.ndarray]):
+        for close in ohlcv["close"]:
+            self.fast.update(close)
+            self.slow.update(close)
+        self.trend = np.where(self.slow.ready, np.sign(self.fast.value - self.slow.value), 0.0)
+
+    def analyze_batch(self, batch: MarketBatch) -> Dict[str, str]:
+        price = batch["last"]
+        fast = self.fast.update(price)
+        slow = self.slow.update(price)
+        trend = np.where(self.slow.ready, np.sign(fast - slow), 0.0)
+        previous = self.trend if self.trend is not None else trend
+        crossed = np.flatnonzero((trend != previous) & (trend != 0))
+        self.trend = trend
+        signals = {batch.pairs[i]: ("alta" if trend[i] > 0 else "baixa") for i in crossed}
+        for pair, direction in signals.items():
+            logger.info(f"[Plugin] {pair}: cruzamento de EMA para {direction}")
+        return signals
+
+    def backtest_positions(self, ohlcv: Dict[str, np.ndarray]) -> np.ndarray:
+        """Mesma regra de analyze_batch sobre a série inteira (candles × pares): comprado após
+        cruzamento para alta, fora após cruzamento para baixa"""
+        close = ohlcv["close"]
+        fast = ema_series(close, self.fast.period)
+        slow = ema_series(close, self.slow.period)
+        ready = np.cumsum(~np.isnan(close), axis=0) >= self.slow.period
+        trend = np.where(ready, np.sign(fast - slow), 0.0)
+        previous = np.concatenate([trend[:1], trend[:-1]])
+        crossed = (trend != previous) & (trend != 0)
+        # índice do último cruzamento até cada candle (0 = nenhum ainda; o candle 0 nunca cruza)
+        last = np.maximum.accumulate(np.where(crossed, np.arange(len(close))[:, None], 0), axis=0)
+        return np.where(last > 0, np.take_along_axis(trend, last, axis=0) > 0, False).astype(np.float64)
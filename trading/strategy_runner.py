@@ -0,0 +1,344 @@
+import os
+import time
+import logging
+import importlib
+import multiprocessing
+from collections import Counter
+from multiprocessing import shared_memory
+from multiprocessing.connection import wait
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from candle_store import CandleStore, warm_up
+from strategy import FIELDS, BatchStrategy, MarketBatch
+
+logger = logging.getLogger(__name__)
+
+# Plugins carregados pelo runner: "modulo:Classe" separados por vírgula
+STRATEGIES = os.getenv("TRADING_STRATEGIES", "strategy:ExampleStrategy")
+# Tempo máximo (s) de uma avaliação; a classe pode sobrescrever com `time_budget`
+TIME_BUDGET = float(os.getenv("TRADING_STRATEGY_TIME_BUDGET", "0.5"))
+STARTUP_TIMEOUT = float(os.getenv("TRADING_STRATEGY_STARTUP_TIMEOUT", "60"))
+# spawn evita herdar as threads do stream/API num fork
+START_METHOD = os.getenv("TRADING_STRATEGY_START_METHOD", "spawn")
+
+
+def load_strategy_class(path: str):
+    """'strategy:ExampleStrategy' -> classe"""
+    module, _, name = path.partition(":")
+    if not name:
+        raise ValueError(f"Plugin inválido '{path}' (use modulo:Classe)")
+    return getattr(importlib.import_module(module), name)
+
+
+def parse_strategies(value: str = STRATEGIES) -> List[str]:
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+class SharedSnapshot:
+    """Matriz (pares × campos) do MarketBatch num bloco de shared memory.
+
+    O cabeçalho é um contador de sequência (seqlock): ímpar enquanto o
+    processo principal escreve, par quando o snapshot está consistente.
+    Os workers copiam a matriz e conferem o contador, sem pickle por tick.
+    """
+
+    HEADER = 8
+
+    def __init__(self, pairs: Iterable[str], name: Optional[str] = None):
+        self.pairs = list(pairs)
+        shape = (len(self.pairs), len(FIELDS))
+        size = self.HEADER + max(int(np.prod(shape)), 1) * 8
+        self.owner = name is None
+        self.shm = shared_memory.SharedMemory(name=name, create=self.owner, size=size if self.owner else 0)
+        self.sequence = np.ndarray((1,), dtype=np.int64, buffer=self.shm.buf)
+        self.data = np.ndarray(shape, dtype=np.float64, buffer=self.shm.buf, offset=self.HEADER)
+        if self.owner:
+            self.sequence[0] = 0
+            self.data.fill(np.nan)
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    def publish(self, batch: MarketBatch) -> int:
+        """Copia o batch para a memória compartilhada; retorna o número do tick"""
+        if batch.pairs != self.pairs:
+            batch = MarketBatch.from_tickers(batch.to_tickers(), self.pairs)
+        self.sequence[0] += 1
+        self.data[:] = batch.data
+        self.sequence[0] += 1
+        return int(self.sequence[0]) // 2
+
+    def read(self, retries: int = 1000) -> MarketBatch:
+        for _ in range(retries):
+            before = int(self.sequence[0])
+            if before % 2 == 0:
+                data = self.data.copy()
+                if int(self.sequence[0]) == before:
+                    return MarketBatch(self.pairs, data)
+            time.sleep(0)
+        raise RuntimeError("Snapshot compartilhado não estabilizou")
+
+    def close(self):
+        # As views numpy seguram o buffer; precisam sair antes do close()
+        self.sequence = self.data = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+def _run_strategy(strategy, batch: MarketBatch):
+    if hasattr(strategy, "analyze_batch"):
+        return strategy.analyze_batch(batch)
+    return strategy.analyze(batch.to_tickers())
+
+
+def _worker_main(path: str, kwargs: dict, shm_name: str, pairs: List[str], conn,
+                 warmup: Optional[Tuple[str, str]] = None):
+    """Loop do processo worker: espera o número do tick, lê o snapshot e devolve os sinais"""
+    # Processo novo (spawn) não herda a configuração de logging do bot
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s [%(processName)s] %(message)s")
+    snapshot = SharedSnapshot(pairs, name=shm_name)
+    try:
+        strategy = load_strategy_class(path)(**kwargs)
+        if warmup is not None:
+            # O próprio worker lê a janela do cache de candles (mmap), nada vem por pickle
+            datadir, timeframe = warmup
+            try:
+                warm_up(strategy, CandleStore(datadir), pairs, timeframe)
+            except Exception as e:
+                logger.error(f"Erro no warm-up da estratégia {path}: {e}")
+        conn.send(("ready",))
+        while True:
+            message = conn.recv()
+            if message[0] == "stop":
+                break
+            seq = message[1]
+            started = time.perf_counter()
+            try:
+                signals = _run_strategy(strategy, snapshot.read())
+                conn.send(("result", seq, dict(signals) if isinstance(signals, dict) else {},
+                           time.perf_counter() - started))
+            except Exception as e:
+                conn.send(("error", seq, f"{type(e).__name__}: {e}", time.perf_counter() - started))
+    except (EOFError, KeyboardInterrupt):
+        pass
+    finally:
+        snapshot.close()
+
+
+class StrategyWorker:
+    """Um plugin num processo próprio, com orçamento de tempo por avaliação"""
+
+    def __init__(self, path: str, kwargs: Optional[dict] = None, time_budget: Optional[float] = None):
+        self.path = path
+        self.kwargs = kwargs or {}
+        self.name = path.partition(":")[2] or path
+        cls = load_strategy_class(path)
+        self.time_budget = time_budget if time_budget is not None else getattr(cls, "time_budget", TIME_BUDGET)
+        self.debounce_interval = getattr(cls, "debounce_interval", 0.0)
+        self.last_dispatch = float("-inf")
+        self.process = None
+        self.conn = None
+        self.ready = False
+        self.busy_seq: Optional[int] = None
+        self.deadline = 0.0
+        self.timeouts = 0
+        self.errors = 0
+        self.restarts = 0
+
+    def start(self, context, shm_name: str, pairs: List[str], warmup: Optional[Tuple[str, str]] = None):
+        parent, child = context.Pipe()
+        self.process = context.Process(
+            target=_worker_main, args=(self.path, self.kwargs, shm_name, pairs, child, warmup),
+            name=f"strategy-{self.name}", daemon=True,
+        )
+        self.process.start()
+        child.close()
+        self.conn = parent
+        self.ready = False
+        self.busy_seq = None
+
+    def kill(self):
+        if self.process is not None and self.process.is_alive():
+            self.process.kill()
+        if self.process is not None:
+            self.process.join(timeout=5)
+        if self.conn is not None:
+            self.conn.close()
+        self.process = self.conn = None
+        self.ready = False
+        self.busy_seq = None
+
+    def stop(self):
+        if self.conn is not None and self.process is not None and self.process.is_alive():
+            try:
+                self.conn.send(("stop",))
+                self.process.join(timeout=2)
+            except (BrokenPipeError, OSError):
+                pass
+        self.kill()
+
+
+def aggregate_signals(signals: Dict[str, Dict[str, str]]) -> Dict[str, str]:
+    """Consenso por par: o sinal da maioria das estratégias que opinaram (empate = sem sinal)"""
+    votes: Dict[str, Counter] = {}
+    for strategy_signals in signals.values():
+        for pair, signal in strategy_signals.items():
+            votes.setdefault(pair, Counter())[signal] += 1
+    consensus = {}
+    for pair, counter in votes.items():
+        ranked = counter.most_common(2)
+        if len(ranked) == 1 or ranked[0][1] > ranked[1][1]:
+            consensus[pair] = ranked[0][0]
+    return consensus
+
+
+class StrategyRunner(BatchStrategy):
+    """Roda vários plugins em processos separados, alimentados por shared memory.
+
+    A cada tick o snapshot é publicado uma vez e os workers prontos recebem só
+    o número do tick. Quem estoura o time_budget é morto e reiniciado (o estado
+    interno da estratégia se perde). Os sinais voltam agregados em
+    `last_result` e para o callback on_signals.
+
+    Como é um BatchStrategy, entra no lugar das estratégias no StrategyDispatcher
+    ou no loop de polling.
+    """
+
+    def __init__(self, pairs: Iterable[str], strategies: Iterable[str] = None,
+                 on_signals: Optional[Callable[[dict], None]] = None, start_method: str = START_METHOD,
+                 startup_timeout: float = STARTUP_TIMEOUT, warmup: Optional[Tuple[str, str]] = None):
+        self.pairs = list(pairs)
+        # (datadir, timeframe) do CandleStore para o warm-up de cada worker (também nos restarts)
+        self.warmup = warmup
+        paths = parse_strategies() if strategies is None else list(strategies)
+        self.workers = [StrategyWorker(path) for path in paths]
+        seen = Counter()
+        for worker in self.workers:
+            seen[worker.name] += 1
+            if seen[worker.name] > 1:
+                worker.name = f"{worker.name}#{seen[worker.name]}"
+        # O dispatcher chama no ritmo do worker mais rápido; cada worker respeita o próprio
+        # debounce_interval em analyze_batch
+        self.debounce_interval = min((w.debounce_interval for w in self.workers), default=0.0)
+        self.on_signals = on_signals
+        self.context = multiprocessing.get_context(start_method)
+        self.startup_timeout = startup_timeout
+        self.snapshot: Optional[SharedSnapshot] = None
+        self.last_result: Optional[dict] = None
+        self.ticks = 0
+
+    def start(self):
+        if self.snapshot is not None:
+            return
+        self.snapshot = SharedSnapshot(self.pairs)
+        for worker in self.workers:
+            worker.start(self.context, self.snapshot.name, self.pairs, self.warmup)
+        self._wait_ready(time.monotonic() + self.startup_timeout)
+        logger.info(f"Runner de estratégias: {sum(w.ready for w in self.workers)}/{len(self.workers)} workers prontos")
+
+    def _wait_ready(self, deadline: float):
+        pending = {w.conn: w for w in self.workers if w.conn is not None and not w.ready}
+        while pending and time.monotonic() < deadline:
+            for conn in wait(list(pending), timeout=max(deadline - time.monotonic(), 0)):
+                self._receive(pending.pop(conn), {})
+
+    def stop(self):
+        for worker in self.workers:
+            worker.stop()
+        if self.snapshot is not None:
+            self.snapshot.close()
+            self.snapshot = None
+
+    def _restart(self, worker: StrategyWorker):
+        worker.kill()
+        worker.restarts += 1
+        worker.start(self.context, self.snapshot.name, self.pairs, self.warmup)
+
+    def _receive(self, worker: StrategyWorker, result: dict):
+        try:
+            message = worker.conn.recv()
+        except (EOFError, OSError):
+            logger.error(f"Worker da estratégia {worker.name} morreu; reiniciando")
+            self._restart(worker)
+            return
+        kind = message[0]
+        if kind == "ready":
+            worker.ready = True
+            return
+        seq, payload, elapsed = message[1:]
+        if seq != worker.busy_seq:
+            return
+        worker.busy_seq = None
+        result["timings"][worker.name] = elapsed
+        if kind == "result":
+            result["signals"][worker.name] = payload
+        else:
+            worker.errors += 1
+            result["errors"][worker.name] = payload
+            logger.error(f"Erro na estratégia {worker.name}: {payload}")
+
+    def analyze_batch(self, batch: MarketBatch) -> dict:
+        """Publica o batch, roda todos os workers prontos e espera até o orçamento de cada um"""
+        if self.snapshot is None:
+            self.start()
+        seq = self.snapshot.publish(batch)
+        result = {"tick": seq, "signals": {}, "timings": {}, "errors": {}, "timeouts": [], "skipped": [],
+                  "debounced": []}
+
+        started = time.monotonic()
+        running: Dict = {}
+        for worker in self.workers:
+            if not worker.ready:
+                result["skipped"].append(worker.name)
+                continue
+            if started - worker.last_dispatch < worker.debounce_interval:
+                result["debounced"].append(worker.name)
+                continue
+            try:
+                worker.conn.send(("tick", seq))
+            except (BrokenPipeError, OSError):
+                self._restart(worker)
+                result["skipped"].append(worker.name)
+                continue
+            worker.busy_seq = seq
+            worker.last_dispatch = started
+            worker.deadline = started + worker.time_budget
+            running[worker.conn] = worker
+
+        # workers reiniciados em ticks anteriores avisam que estão prontos por aqui também
+        starting = {w.conn: w for w in self.workers if w.conn is not None and not w.ready}
+        while running:
+            timeout = max(min(w.deadline for w in running.values()) - time.monotonic(), 0)
+            for conn in wait(list(running) + list(starting), timeout=timeout):
+                worker = running.pop(conn, None) or starting.pop(conn)
+                self._receive(worker, result)
+                if worker.busy_seq is not None:
+                    running[conn] = worker
+            now = time.monotonic()
+            for conn, worker in list(running.items()):
+                if worker.busy_seq is None:
+                    running.pop(conn)
+                elif now >= worker.deadline:
+                    running.pop(conn)
+                    worker.timeouts += 1
+                    result["timeouts"].append(worker.name)
+                    logger.warning(f"Estratégia {worker.name} estourou {worker.time_budget:.2f}s; reiniciando o worker")
+                    self._restart(worker)
+
+        result["consensus"] = aggregate_signals(result["signals"])
+        result["elapsed"] = time.monotonic() - started
+        self.ticks += 1
+        self.last_result = result
+        if self.on_signals is not None:
+            self.on_signals(result)
+        return result["consensus"]
+
+    def stats(self) -> Dict[str, dict]:
+        return {
+            w.name: {"ready": w.ready, "timeouts": w.timeouts, "errors": w.errors, "restarts": w.restarts}
+            for w in self.workers
+        }
@@ -0,0 +1,58 @@
+import numpy as np
+
+from backtest import Backtester, evaluate, load_pairs, sweep, synthetic_ohlcv
+from candle_store import CandleStore, align
+from strategy import BaseStrategy, ExampleBatchStrategy
+
+PAIRS = ["BTC/USDT", "ETH/USDT"]
+
+
+def write_data(tmp_path, candles=3000):
+    store = CandleStore(str(tmp_path))
+    for i, pair in enumerate(PAIRS):
+        store.write(pair, "1m", synthetic_ohlcv(candles, seed=i))
+    return load_pairs(str(tmp_path), PAIRS, "1m")
+
+
+class AlwaysLong(BaseStrategy):
+    def analyze(self, ticker_data):
+        return {pair: "alta" for pair in ticker_data}
+
+
+def test_costs_and_returns_accounting():
+    close = np.array([[100.0], [110.0], [121.0], [121.0]])
+    positions = np.array([[1.0], [1.0], [0.0], [0.0]])
+    result = evaluate(positions, close, fee=0.01, slippage=0.0)
+    # compra no candle 0 (paga 1%), rende 10% duas vezes e vende no candle 2 (paga 1%)
+    assert np.isclose(result["total_return"], (1 + 0.1 - 0.01) * (1 + 0.1) * (1 - 0.01) - 1)
+    assert result["trades"] == 2
+
+
+def test_event_mode_matches_vectorized_mode(tmp_path):
+    candles = write_data(tmp_path)
+    backtester = Backtester(candles, fee=0.001, slippage=0.0005)
+    vectorized = backtester.run(ExampleBatchStrategy(fast=5, slow=20), mode="vectorized")
+    event = backtester.run(ExampleBatchStrategy(fast=5, slow=20), mode="event")
+    assert vectorized["trades"] > 0
+    assert vectorized["trades"] == event["trades"]
+    assert np.isclose(vectorized["total_return"], event["total_return"])
+
+    # estratégias só com analyze() (dict) também rodam no modo por eventos
+    assert Backtester(candles).run(AlwaysLong(), mode="event")["exposure"] > 0.99
+
+
+def test_align_fills_gaps_and_late_pairs():
+    a = synthetic_ohlcv(5, seed=1)
+    b = synthetic_ohlcv(5, seed=2)[[2, 4]]
+    ohlcv = align({"A": a, "B": b})
+    assert np.isnan(ohlcv["close"][:2, 1]).all()
+    assert ohlcv["close"][3, 1] == b["close"][0]
+    assert ohlcv["volume"][3, 1] == 0
+
+
+def test_parameter_sweep_runs_in_worker_processes(tmp_path):
+    write_data(tmp_path, candles=1000)
+    results = sweep("strategy:ExampleBatchStrategy", {"fast": [3, 5], "slow": [20]}, str(tmp_path), PAIRS,
+                    workers=2)
+    assert sorted((r["params"]["fast"], r["params"]["slow"]) for r in results) == [(3, 20), (5, 20)]
+    assert results[0]["sharpe"] >= results[1]["sharpe"]
@@ -0,0 +1,113 @@
+import numpy as np
+
+from backtest import synthetic_ohlcv
+from candle_store import CandleStore, warm_up
+from strategy import ExampleBatchStrategy, MarketBatch
+
+STEP = 60_000
+
+
+class FakeExchange:
+    """Serve candles de um histórico fixo e registra os intervalos pedidos"""
+
+    def __init__(self, candles):
+        self.candles = candles
+        self.calls = []
+
+    def fetch(self, pair, timeframe, since, until):
+        self.calls.append((since, until))
+        mask = (self.candles["timestamp"] >= since) & (self.candles["timestamp"] < until)
+        return [list(row) for row in self.candles[mask].tolist()]
+
+
+def test_update_fetches_only_missing_ranges(tmp_path):
+    history = synthetic_ohlcv(100)
+    start = int(history["timestamp"][0])
+    exchange = FakeExchange(history)
+    store = CandleStore(str(tmp_path))
+
+    assert store.update("BTC/USDT", "1m", exchange.fetch, start, start + 59 * STEP) == 60
+    assert store.update("BTC/USDT", "1m", exchange.fetch, start, start + 99 * STEP) == 40
+    assert exchange.calls[-1] == (start + 60 * STEP, start + 100 * STEP)
+    assert store.update("BTC/USDT", "1m", exchange.fetch, start, start + 99 * STEP) == 0
+    assert len(exchange.calls) == 2
+
+    # um índice novo (outro processo) enxerga os mesmos dados
+    candles = CandleStore(str(tmp_path)).read("BTC/USDT", "1m")
+    assert np.array_equal(candles, history)
+
+
+def test_gaps_are_repaired_and_empty_slots_not_refetched(tmp_path):
+    history = synthetic_ohlcv(50)
+    start = int(history["timestamp"][0])
+    store = CandleStore(str(tmp_path))
+    store.write("BTC/USDT", "1m", np.delete(history, np.s_[10:20]))
+    assert store.missing_ranges("BTC/USDT", "1m", start, start + 49 * STEP) == [
+        (start + 10 * STEP, start + 19 * STEP)
+    ]
+
+    # a exchange não tem o começo do buraco: o que fica antes do último candle
+    # devolvido é marcado como "sem candle" e não é pedido de novo
+    exchange = FakeExchange(np.delete(history, np.s_[10:15]))
+    assert store.update("BTC/USDT", "1m", exchange.fetch, start, start + 49 * STEP) == 5
+    assert store.missing_ranges("BTC/USDT", "1m", start, start + 49 * STEP) == []
+    assert len(store.read("BTC/USDT", "1m")) == 45
+
+
+def test_range_reads_and_older_history(tmp_path):
+    history = synthetic_ohlcv(200)
+    start = int(history["timestamp"][0])
+    store = CandleStore(str(tmp_path))
+    store.write("ETH/USDT", "1m", history[100:])
+    store.write("ETH/USDT", "1m", history[:100])  # mais antigo que o início do arquivo
+
+    window = store.read("ETH/USDT", "1m", start + 50 * STEP, start + 149 * STEP)
+    assert np.array_equal(window, history[50:150])
+    assert np.array_equal(store.tail("ETH/USDT", "1m", 10), history[-10:])
+    assert len(store.read("ETH/USDT", "1m", start - 10 * STEP, start - STEP)) == 0
+
+
+def test_partial_fetch_leaves_the_rest_missing(tmp_path):
+    history = synthetic_ohlcv(100)
+    start, end = int(history["timestamp"][0]), int(history["timestamp"][-1])
+    store = CandleStore(str(tmp_path))
+
+    # página que falhou: só os 30 primeiros candles voltam
+    assert store.update("BTC/USDT", "1m", FakeExchange(history[:30]).fetch, start, end) == 30
+    assert store.missing_ranges("BTC/USDT", "1m", start, end) == [(start + 30 * STEP, end)]
+    assert store.update("BTC/USDT", "1m", FakeExchange(history).fetch, start, end) == 70
+    assert np.array_equal(store.read("BTC/USDT", "1m"), history)
+
+
+def test_strategies_warm_up_from_the_cache(tmp_path):
+    store = CandleStore(str(tmp_path))
+    pairs = ["BTC/USDT", "ETH/USDT"]
+    for i, pair in enumerate(pairs):
+        store.write(pair, "1m", synthetic_ohlcv(500, seed=i))
+
+    warm = ExampleBatchStrategy(fast=5, slow=20)
+    assert warm_up(warm, store, pairs, "1m") == warm.warmup_candles == 60
+    assert warm.slow.ready.all()
+
+    # mesmo estado que alimentar os candles tick a tick
+    cold = ExampleBatchStrategy(fast=5, slow=20)
+    batch = MarketBatch(pairs)
+    for close in store.window(pairs, "1m", 60)["close"]:
+        batch["last"][:] = close
+        cold.analyze_batch(batch)
+    assert np.allclose(warm.slow.value, cold.slow.value)
+    assert np.array_equal(warm.trend, cold.trend)
+
+
+def test_hole_the_exchange_cannot_fill_is_marked_once(tmp_path):
+    history = synthetic_ohlcv(50)
+    start, end = int(history["timestamp"][0]), int(history["timestamp"][-1])
+    store = CandleStore(str(tmp_path))
+    store.write("BTC/USDT", "1m", np.delete(history, np.s_[10:20]))
+
+    # manutenção da exchange: o buraco volta vazio
+    exchange = FakeExchange(np.delete(history, np.s_[10:20]))
+    for _ in range(3):
+        assert store.update("BTC/USDT", "1m", exchange.fetch, start, end) == 0
+    assert len(exchange.calls) == 1
+    assert store.missing_ranges("BTC/USDT", "1m", start, end) == []
@@ -0,0 +1,61 @@
+import numpy as np
+
+from indicators import EMA, RSI, VWAP, RollingStd
+
+
+def reference_rsi(prices, period):
+    changes = np.diff(prices)
+    gains, losses = np.maximum(changes, 0), np.maximum(-changes, 0)
+    avg_gain, avg_loss = gains[:period].mean(), losses[:period].mean()
+    for gain, loss in zip(gains[period:], losses[period:]):
+        avg_gain = (avg_gain * (period - 1) + gain) / period
+        avg_loss = (avg_loss * (period - 1) + loss) / period
+    return 100 - 100 / (1 + avg_gain / avg_loss)
+
+
+def test_scalar_indicators_match_full_recomputation():
+    rng = np.random.default_rng(1)
+    prices = 100 + np.cumsum(rng.normal(0, 1, 300))
+    volumes = rng.uniform(1, 10, 300)
+    ema, rsi, std, vwap = EMA(10), RSI(14), RollingStd(20), VWAP(20)
+    expected_ema = prices[0]
+    for price, volume in zip(prices, volumes):
+        expected_ema += 2 / 11 * (price - expected_ema)
+        last_ema = ema.update(price)
+        last_rsi = rsi.update(price)
+        last_std = std.update(price)
+        last_vwap = vwap.update(price, volume)
+    assert isinstance(last_ema, float)
+    assert np.isclose(last_ema, expected_ema)
+    assert np.isclose(last_rsi, reference_rsi(prices, 14))
+    assert np.isclose(last_std, prices[-20:].std())
+    assert np.isclose(last_vwap, (prices[-20:] * volumes[-20:]).sum() / volumes[-20:].sum())
+
+
+def test_vectorized_update_matches_per_pair_and_skips_nan():
+    rng = np.random.default_rng(2)
+    prices = 50 + np.cumsum(rng.normal(0, 1, (200, 3)), axis=0)
+    prices[::3, 1] = np.nan  # par 1 fica sem tick em parte dos batches
+    volumes = rng.uniform(1, 10, (200, 3))
+    batch_std, batch_rsi, batch_vwap = RollingStd(15), RSI(14), VWAP(10)
+    for row, volume in zip(prices, volumes):
+        result_std = batch_std.update(row)
+        result_rsi = batch_rsi.update(row)
+        result_vwap = batch_vwap.update(row, volume)
+    for pair in range(3):
+        ticked = ~np.isnan(prices[:, pair])
+        series = prices[:, pair][ticked]
+        assert np.isclose(result_std[pair], series[-15:].std())
+        assert np.isclose(result_rsi[pair], reference_rsi(series, 14))
+        weights = volumes[:, pair][ticked][-10:]
+        assert np.isclose(result_vwap[pair], (series[-10:] * weights).sum() / weights.sum())
+    assert batch_std.ready.all()
+
+
+def test_ema_not_ready_until_period():
+    ema = EMA(3)
+    ema.update(np.array([1.0, np.nan]))
+    ema.update(np.array([2.0, 5.0]))
+    ema.update(np.array([3.0, 6.0]))
+    assert ema.ready.tolist() == [True, False]
+    assert ema.value[1] == 5.5
@@ -2,4 +2,11 @@ from main import SuperBotTrading
 
 def test_trading_init():
     bot = SuperBotTrading()
-    assert bot.config is not None 
\ No newline at end of file
+    assert bot.config is not None 
+def test_inline_strategies_are_loaded_from_config(tmp_path):
+    bot = SuperBotTrading()
+    bot.config['datadir'] = str(tmp_path)
+    bot.config['strategies'] = {'plugins': ['strategy:ExampleStrategy'], 'isolation': 'inline'}
+    strategies = bot._load_strategies()
+    assert [type(s).__name__ for s in strategies] == ['ExampleStrategy']
+    assert bot.strategy_runner is None
@@ -0,0 +1,70 @@
+import time
+
+from fake_exchange import FakeExchange
+from market_stream import MarketStream, StrategyDispatcher, TickerSnapshot
+
+
+class RecordingStrategy:
+    def __init__(self, debounce_interval=0.0):
+        self.debounce_interval = debounce_interval
+        self.calls = []
+
+    def analyze(self, ticker_data):
+        self.calls.append((time.monotonic(), ticker_data))
+
+
+def wait_until(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_snapshot_ignores_stale_and_unchanged_updates():
+    snapshot = TickerSnapshot(["BTC/USDT"])
+    assert snapshot.update("BTC/USDT", 100.0, 101.0, 1.0, 2.0, update_id=5)
+    assert not snapshot.update("BTC/USDT", 99.0, 100.0, 1.0, 2.0, update_id=4)
+    assert not snapshot.update("BTC/USDT", 100.0, 101.0, 1.0, 2.0, update_id=6)
+    assert snapshot.get("BTC/USDT")["last"] == 100.5
+
+
+def test_stream_keeps_whitelisted_pairs_and_triggers_strategies():
+    exchange = FakeExchange(rate=50)
+    port = exchange.start()
+    snapshot = TickerSnapshot(["BTC/USDT", "ETH/USDT"])
+    strategy = RecordingStrategy()
+    dispatcher = StrategyDispatcher([strategy], snapshot)
+    stream = MarketStream(["BTC/USDT", "ETH/USDT"], snapshot, on_change=dispatcher.notify,
+                          url=f"ws://127.0.0.1:{port}")
+    dispatcher.start()
+    stream.start()
+    try:
+        assert wait_until(lambda: len(snapshot.tickers()) == 2 and len(strategy.calls) >= 3)
+        assert set(strategy.calls[-1][1]) == {"BTC/USDT", "ETH/USDT"}
+        assert stream.messages >= len(strategy.calls)
+    finally:
+        stream.stop()
+        dispatcher.stop()
+        exchange.stop()
+
+
+def test_debounce_coalesces_updates_per_strategy():
+    snapshot = TickerSnapshot(["BTC/USDT"])
+    fast, slow = RecordingStrategy(0.0), RecordingStrategy(0.2)
+    dispatcher = StrategyDispatcher([fast, slow], snapshot)
+    dispatcher.start()
+    try:
+        for i in range(20):
+            snapshot.update("BTC/USDT", 100.0 + i, 101.0 + i, 1.0, 1.0)
+            dispatcher.notify("BTC/USDT")
+            time.sleep(0.01)
+        # a última mudança é avaliada ao fim do debounce
+        assert wait_until(lambda: slow.calls and slow.calls[-1][1]["BTC/USDT"]["bid"] == 119.0)
+        assert len(slow.calls) <= 3
+        assert len(fast.calls) > len(slow.calls)
+        gaps = [b[0] - a[0] for a, b in zip(slow.calls, slow.calls[1:])]
+        assert all(gap >= 0.19 for gap in gaps)
+    finally:
+        dispatcher.stop()
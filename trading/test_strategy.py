@@ -0,0 +1,56 @@
+import time
+
+import numpy as np
+
+from market_stream import StrategyDispatcher, TickerSnapshot
+from strategy import BatchStrategy, ExampleBatchStrategy, MarketBatch
+
+
+class RecordingBatchStrategy(BatchStrategy):
+    def __init__(self):
+        self.batches = []
+
+    def analyze_batch(self, batch):
+        self.batches.append(batch)
+
+
+def test_batch_from_tickers_and_dict_adapter():
+    tickers = {
+        "BTC/USDT": {"bid": 99.0, "ask": 101.0, "last": 100.0, "baseVolume": 7.0},
+        "ETH/USDT": {"bid": 9.0, "ask": 11.0, "last": None},
+    }
+    strategy = RecordingBatchStrategy()
+    strategy.analyze(tickers)
+    batch = strategy.batches[0]
+    assert batch.pairs == ["BTC/USDT", "ETH/USDT"]
+    assert batch["last"][0] == 100.0 and np.isnan(batch["last"][1])
+    assert batch.mid.tolist() == [100.0, 10.0]
+    assert batch["volume"][0] == 7.0
+
+
+def test_dispatcher_sends_snapshot_columns_to_batch_strategies():
+    snapshot = TickerSnapshot(["BTC/USDT", "ETH/USDT", "ADA/USDT"])
+    snapshot.update("ETH/USDT", 9.0, 11.0, 1.0, 2.0)
+    strategy = RecordingBatchStrategy()
+    dispatcher = StrategyDispatcher([strategy], snapshot)
+    dispatcher.start()
+    try:
+        dispatcher.notify("ETH/USDT")
+        deadline = time.monotonic() + 2
+        while not strategy.batches and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        dispatcher.stop()
+    batch = strategy.batches[0]
+    assert isinstance(batch, MarketBatch)
+    assert batch["bid"][1] == 9.0 and np.isnan(batch["bid"][0])
+
+
+def test_example_batch_strategy_signals_crossovers():
+    strategy = ExampleBatchStrategy(fast=2, slow=4)
+    batch = MarketBatch(["A/USDT", "B/USDT"])
+    signals = []
+    for a, b in [(10, 10)] * 5 + [(12, 8)] * 3:
+        batch["last"][:] = (a, b)
+        signals.append(strategy.analyze_batch(batch))
+    assert {"A/USDT": "alta", "B/USDT": "baixa"} in signals
@@ -0,0 +1,102 @@
+import time
+import logging
+
+import numpy as np
+
+from strategy import BaseStrategy, BatchStrategy, MarketBatch
+from strategy_runner import SharedSnapshot, StrategyRunner, aggregate_signals
+
+PAIRS = ["BTC/USDT", "ETH/USDT"]
+
+
+class UpStrategy(BatchStrategy):
+    def analyze_batch(self, batch):
+        return {pair: "alta" for pair, price in zip(batch.pairs, batch["last"]) if price > 0}
+
+
+class DictStrategy(BaseStrategy):
+    def analyze(self, ticker_data):
+        return {pair: "alta" for pair in ticker_data}
+
+
+class SlowStrategy(BaseStrategy):
+    time_budget = 0.3
+
+    def analyze(self, ticker_data):
+        time.sleep(5)
+        return {pair: "baixa" for pair in ticker_data}
+
+
+class DebouncedStrategy(BaseStrategy):
+    debounce_interval = 60.0
+
+    def analyze(self, ticker_data):
+        # Sinal só aparece se o worker configurou o logging
+        return {pair: "baixa" for pair in ticker_data} if logging.getLogger().handlers else {}
+
+
+def batch_with_prices(*prices):
+    batch = MarketBatch(PAIRS)
+    batch["last"][:] = prices
+    return batch
+
+
+def test_shared_snapshot_is_visible_to_attached_reader():
+    writer = SharedSnapshot(PAIRS)
+    reader = SharedSnapshot(PAIRS, name=writer.name)
+    try:
+        assert writer.publish(batch_with_prices(1.0, 2.0)) == 1
+        assert writer.publish(batch_with_prices(3.0, np.nan)) == 2
+        batch = reader.read()
+        assert batch["last"][0] == 3.0 and np.isnan(batch["last"][1])
+    finally:
+        reader.close()
+        writer.close()
+
+
+def test_aggregate_signals_uses_majority_and_drops_ties():
+    consensus = aggregate_signals({
+        "a": {"BTC/USDT": "alta", "ETH/USDT": "alta"},
+        "b": {"BTC/USDT": "alta", "ETH/USDT": "baixa"},
+        "c": {"BTC/USDT": "baixa"},
+    })
+    assert consensus == {"BTC/USDT": "alta"}
+
+
+def test_runner_collects_signals_and_restarts_slow_strategy():
+    runner = StrategyRunner(PAIRS, [
+        "test_strategy_runner:UpStrategy",
+        "test_strategy_runner:DictStrategy",
+        "test_strategy_runner:SlowStrategy",
+    ])
+    try:
+        runner.start()
+        started = time.monotonic()
+        consensus = runner.analyze_batch(batch_with_prices(10.0, 20.0))
+        assert time.monotonic() - started < 2
+        result = runner.last_result
+        assert consensus == {"BTC/USDT": "alta", "ETH/USDT": "alta"}
+        assert set(result["signals"]) == {"UpStrategy", "DictStrategy"}
+        assert result["timeouts"] == ["SlowStrategy"]
+        assert runner.stats()["SlowStrategy"]["restarts"] == 1
+
+        # os demais continuam rodando enquanto o worker reiniciado sobe
+        runner.analyze_batch(batch_with_prices(10.0, -1.0))
+        assert runner.last_result["signals"]["UpStrategy"] == {"BTC/USDT": "alta"}
+    finally:
+        runner.stop()
+
+
+def test_runner_debounces_each_worker_separately():
+    runner = StrategyRunner(PAIRS, ["test_strategy_runner:UpStrategy", "test_strategy_runner:DebouncedStrategy"])
+    try:
+        runner.start()
+        assert runner.debounce_interval == 0.0
+        runner.analyze_batch(batch_with_prices(10.0, 20.0))
+        assert runner.last_result["signals"]["DebouncedStrategy"] == {"BTC/USDT": "baixa", "ETH/USDT": "baixa"}
+
+        runner.analyze_batch(batch_with_prices(11.0, 21.0))
+        assert set(runner.last_result["signals"]) == {"UpStrategy"}
+        assert runner.last_result["debounced"] == ["DebouncedStrategy"]
+    finally:
+        runner.stop()